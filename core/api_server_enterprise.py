@@ -4,7 +4,7 @@ CyberRotate Pro - Production API Server
 Enterprise-grade RESTful API with authentication, rate limiting, and monitoring
 """
 
-from flask import Flask, request, jsonify, render_template_string, g
+from flask import Flask, Response, request, jsonify, render_template_string, g, stream_with_context
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -15,22 +15,31 @@ import hmac
 import time
 import json
 import threading
+import queue
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
 from functools import wraps
 import secrets
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
 import sqlite3
 import os
 
+try:
+    import waitress
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
 from utils.logger import Logger
-from utils.stats_collector import StatsCollector
+from utils.stats_collector import StatsCollector, RotationEvent
 from core.proxy_manager import ProxyManager
 from core.openvpn_manager import OpenVPNManager
 from core.tor_controller import TorController
 from core.network_monitor import NetworkMonitor
 from core.security_utils import SecurityUtils
+from core.rate_limiter import create_rate_limiter
 
 @dataclass
 class APIKey:
@@ -44,6 +53,36 @@ class APIKey:
     is_active: bool = True
     rate_limit: int = 1000  # requests per hour
 
+# Request fields that control how a rotation is submitted, not where it goes
+ROTATION_CONTROL_OPTIONS = ('method', 'async')
+
+@dataclass
+class RotationJob:
+    """Background rotation job data structure"""
+    job_id: str
+    method: str
+    options: Dict[str, Any]
+    status: str = 'pending'  # pending, running, completed, failed
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    waiters: int = 1
+    future: Optional[Future] = field(default=None, repr=False)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize job state for API responses"""
+        return {
+            'job_id': self.job_id,
+            'method': self.method,
+            'status': self.status,
+            'waiters': self.waiters,
+            'created_at': datetime.fromtimestamp(self.created_at).isoformat(),
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            'finished_at': datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None,
+            'result': self.result
+        }
+
 class EnterpriseAPIServer:
     """Production-grade API server for CyberRotate Pro"""
     
@@ -61,12 +100,23 @@ class EnterpriseAPIServer:
             }
         })
         
-        # Configure rate limiting
+        # Configure rate limiting. Default limits cover every client without
+        # an already validated key, including ones presenting unknown keys;
+        # validated keys are held to their own rate_limit by the token bucket
+        # limiter in require_auth.
         self.limiter = Limiter(
             app=self.app,
             key_func=self.get_rate_limit_key,
-            default_limits=["1000 per hour", "100 per minute"]
+            default_limits=["1000 per hour", "100 per minute"],
+            default_limits_exempt_when=lambda: self._get_cached_api_key() is not None
         )
+        self.rate_limiter = create_rate_limiter(config.get('rate_limiting', {}))
+        
+        # Validated API keys, cached so auth and rate limiting skip the database.
+        # Keys revoked through revoke_api_key() are dropped at once; changes
+        # made directly in the database apply within api_key_cache_ttl.
+        self.api_key_cache_ttl = config.get('security', {}).get('api_key_cache_ttl', 60)
+        self._api_key_cache: Dict[str, tuple] = {}
         
         # Initialize components
         self.logger = Logger("api_server", debug=config.get('debug', False))
@@ -74,11 +124,50 @@ class EnterpriseAPIServer:
         
         # Initialize managers
         self.proxy_manager = ProxyManager(self.logger.logger)
-        self.vpn_manager = OpenVPNManager(self.logger.logger)
+        self.vpn_manager = OpenVPNManager(
+            self.logger.logger,
+            make_before_break=config.get('vpn', {}).get('make_before_break', False),
+            standby_pool_size=config.get('vpn', {}).get('standby_pool_size', 0)
+        )
         self.tor_controller = TorController(self.logger.logger)
         self.network_monitor = NetworkMonitor(self.logger.logger)
         self.security_utils = SecurityUtils(self.logger.logger)
         
+        # Status snapshot cache (refreshed by the monitoring thread)
+        self.status_refresh_interval = config.get('monitoring', {}).get('health_check_interval', 30)
+        self._status_snapshot: Optional[Dict[str, Any]] = None
+        self._status_snapshot_time = 0.0
+        self._status_lock = threading.Lock()
+        
+        # Bounded executor for long-running rotations so they cannot starve
+        # the request threads serving fast endpoints
+        rotation_config = config.get('rotation', {})
+        self.rotation_executor = ThreadPoolExecutor(
+            max_workers=rotation_config.get('max_workers', 4),
+            thread_name_prefix='rotation'
+        )
+        self.rotation_wait_timeout = rotation_config.get('wait_timeout', 5.0)
+        self.job_retention = rotation_config.get('job_retention', 3600)
+        self.rotation_jobs: Dict[str, RotationJob] = {}
+        self._jobs_lock = threading.Lock()
+        
+        # In-flight jobs keyed by rotation target, used to coalesce concurrent
+        # requests, and one lock per manager to serialize state changes
+        self._inflight_rotations: Dict[tuple, RotationJob] = {}
+        self._rotation_locks = {
+            'proxy': threading.Lock(),
+            'vpn': threading.Lock(),
+            'tor': threading.Lock()
+        }
+        
+        # Server-sent event subscribers, one bounded queue per client
+        self.event_queue_size = config.get('events', {}).get('queue_size', 100)
+        self.event_heartbeat_interval = config.get('events', {}).get('heartbeat_interval', 15)
+        self.max_event_subscribers = config.get('events', {}).get('max_subscribers', 8)
+        self._event_subscribers: List[queue.Queue] = []
+        self._subscribers_lock = threading.Lock()
+        self.stats.add_listener(self._on_rotation_event)
+        
         # Initialize database
         self.init_database()
         
@@ -160,6 +249,10 @@ class EnterpriseAPIServer:
         if not api_key:
             return None
             
+        cached = self._get_cached_api_key(api_key)
+        if cached:
+            return cached
+        
         key_hash = hashlib.sha256(api_key.encode()).hexdigest()
         
         with self.db_lock:
@@ -179,7 +272,7 @@ class EnterpriseAPIServer:
             ''', (row[0],))
             self.db_connection.commit()
         
-        return APIKey(
+        key_data = APIKey(
             key_id=row[0],
             key_hash=row[1],
             name=row[2],
@@ -189,6 +282,47 @@ class EnterpriseAPIServer:
             is_active=bool(row[6]),
             rate_limit=row[7]
         )
+        
+        self._api_key_cache[key_hash] = (key_data, time.time())
+        return key_data
+    
+    def _get_cached_api_key(self, api_key: str = None) -> Optional[APIKey]:
+        """Cached record of a validated API key (default: the request's), without querying the database"""
+        if api_key is None:
+            api_key = self._get_request_api_key()
+        if not api_key:
+            return None
+        
+        cached = self._api_key_cache.get(hashlib.sha256(api_key.encode()).hexdigest())
+        if cached and time.time() - cached[1] < self.api_key_cache_ttl:
+            return cached[0]
+        return None
+    
+    def revoke_api_key(self, key_id: str) -> bool:
+        """Deactivate an API key; it stops authenticating immediately"""
+        with self.db_lock:
+            cursor = self.db_connection.cursor()
+            cursor.execute('''
+                UPDATE api_keys SET is_active = 0 WHERE key_id = ? AND is_active = 1
+            ''', (key_id,))
+            self.db_connection.commit()
+            revoked = cursor.rowcount > 0
+        
+        self.invalidate_api_key_cache(key_id)
+        
+        if revoked:
+            self.logger.info(f"Revoked API key: {key_id}")
+        return revoked
+    
+    def invalidate_api_key_cache(self, key_id: str = None):
+        """Drop cached API key records, or only those for key_id"""
+        if key_id is None:
+            self._api_key_cache.clear()
+            return
+        
+        for key_hash, (key_data, _) in list(self._api_key_cache.items()):
+            if key_data.key_id == key_id:
+                self._api_key_cache.pop(key_hash, None)
     
     def require_auth(self, permissions: List[str] = None):
         """Decorator for API authentication"""
@@ -196,7 +330,7 @@ class EnterpriseAPIServer:
             @wraps(f)
             def decorated_function(*args, **kwargs):
                 # Get API key from header
-                api_key = request.headers.get('X-API-Key') or request.headers.get('Authorization', '').replace('Bearer ', '')
+                api_key = self._get_request_api_key()
                 
                 if not api_key:
                     return jsonify({'error': 'API key required'}), 401
@@ -211,8 +345,19 @@ class EnterpriseAPIServer:
                     if not all(perm in key_data.permissions for perm in permissions):
                         return jsonify({'error': 'Insufficient permissions'}), 403
                 
+                # Enforce the key's own hourly limit
+                limit = self.rate_limiter.hit(f"api_key:{key_data.key_id}", key_data.rate_limit)
+                if not limit.allowed:
+                    response = jsonify({'error': 'Rate limit exceeded'})
+                    response.status_code = 429
+                    response.headers['Retry-After'] = str(int(limit.retry_after) + 1)
+                    response.headers['X-RateLimit-Limit'] = str(limit.limit)
+                    response.headers['X-RateLimit-Remaining'] = '0'
+                    return response
+                
                 # Store key data in Flask's g object
                 g.api_key = key_data
+                g.rate_limit = limit
                 
                 # Record API usage
                 self.record_api_usage(key_data.key_id, request.endpoint, request.method, request.remote_addr)
@@ -221,13 +366,18 @@ class EnterpriseAPIServer:
             return decorated_function
         return decorator
     
+    def _get_request_api_key(self) -> str:
+        """Get the API key sent with the current request"""
+        return request.headers.get('X-API-Key') or request.headers.get('Authorization', '').replace('Bearer ', '')
+    
     def get_rate_limit_key(self):
         """Get rate limiting key"""
-        api_key = request.headers.get('X-API-Key') or request.headers.get('Authorization', '').replace('Bearer ', '')
-        if api_key:
-            key_data = self.validate_api_key(api_key)
-            if key_data:
-                return f"api_key:{key_data.key_id}"
+        # Only keys already validated (and cached) get their own counters, so
+        # computing the key never touches the database and unknown keys
+        # share the client address's limits instead of getting fresh ones
+        key_data = self._get_cached_api_key()
+        if key_data:
+            return f"api_key:{key_data.key_id}"
         return get_remote_address()
     
     def record_api_usage(self, key_id: str, endpoint: str, method: str, ip_address: str):
@@ -276,6 +426,20 @@ class EnterpriseAPIServer:
                 self.logger.error(f"Failed to generate API key: {e}")
                 return jsonify({'error': 'Failed to generate API key'}), 500
         
+        @self.app.route('/api/v1/auth/revoke-key', methods=['POST'])
+        @self.require_auth(['admin'])
+        def revoke_key():
+            """Revoke an API key"""
+            data = request.get_json() or {}
+            key_id = data.get('key_id')
+            if not key_id:
+                return jsonify({'error': 'key_id required'}), 400
+            
+            if not self.revoke_api_key(key_id):
+                return jsonify({'error': 'API key not found or already revoked'}), 404
+            
+            return jsonify({'success': True})
+        
         # Status endpoints
         @self.app.route('/api/v1/status', methods=['GET'])
         @self.require_auth(['read'])
@@ -317,16 +481,77 @@ class EnterpriseAPIServer:
             method = data.get('method', 'auto')  # auto, proxy, vpn, tor
             
             try:
-                result = self.perform_rotation(method, data)
+                job = self.submit_rotation(method, data)
+                
+                # Wait briefly for fast rotations; slow ones continue in the
+                # background and can be polled through the jobs endpoint
+                if not data.get('async', False):
+                    try:
+                        job.future.result(timeout=self.rotation_wait_timeout)
+                    except FutureTimeoutError:
+                        pass
+                
+                if job.status in ('completed', 'failed'):
+                    return jsonify({
+                        'success': True,
+                        'data': job.result,
+                        'job_id': job.job_id,
+                        'timestamp': datetime.now().isoformat()
+                    })
+                
                 return jsonify({
                     'success': True,
-                    'data': result,
+                    'data': job.to_dict(),
+                    'status_url': f"/api/v1/jobs/{job.job_id}",
                     'timestamp': datetime.now().isoformat()
-                })
+                }), 202
             except Exception as e:
                 self.logger.error(f"IP rotation failed: {e}")
                 return jsonify({'error': str(e)}), 500
         
+        @self.app.route('/api/v1/jobs/<job_id>', methods=['GET'])
+        @self.require_auth(['read'])
+        def get_rotation_job(job_id):
+            """Get rotation job status"""
+            job = self.rotation_jobs.get(job_id)
+            if not job:
+                return jsonify({'error': 'Job not found'}), 404
+            
+            return jsonify({
+                'success': True,
+                'data': job.to_dict(),
+                'timestamp': datetime.now().isoformat()
+            })
+        
+        # Event streaming
+        @self.app.route('/api/v1/events/stream', methods=['GET'])
+        @self.require_auth(['read'])
+        def stream_events():
+            """Stream rotation, health and leak events as Server-Sent Events"""
+            subscriber = self.subscribe_events()
+            if subscriber is None:
+                return jsonify({'error': 'Too many event stream clients'}), 503
+            
+            def generate():
+                try:
+                    yield 'retry: 5000\n\n'
+                    while True:
+                        try:
+                            event = subscriber.get(timeout=self.event_heartbeat_interval)
+                        except queue.Empty:
+                            # Comment line keeps proxies from closing idle streams
+                            yield ': heartbeat\n\n'
+                            continue
+                        yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+                finally:
+                    self.unsubscribe_events(subscriber)
+            
+            return Response(
+                stream_with_context(generate()),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+        
         # Proxy management
         @self.app.route('/api/v1/proxy/rotate', methods=['POST'])
         @self.require_auth(['rotate'])
@@ -375,7 +600,7 @@ class EnterpriseAPIServer:
                 if server:
                     result = self.vpn_manager.connect_by_name(server)
                 else:
-                    result = self.vpn_manager.rotate_connection()
+                    result = self.vpn_manager.rotate_connection(country=data.get('country'))
                 
                 return jsonify({
                     'success': result,
@@ -450,6 +675,26 @@ class EnterpriseAPIServer:
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
         
+        # Network endpoints
+        @self.app.route('/api/v1/network/bandwidth', methods=['GET'])
+        @self.require_auth(['read'])
+        def get_bandwidth():
+            """Get bandwidth statistics per interface"""
+            try:
+                interface = request.args.get('interface')
+                window = request.args.get('window', 60, type=float)
+                
+                data = {'stats': self.network_monitor.get_bandwidth_stats(interface, window)}
+                if interface and request.args.get('series', 'false').lower() == 'true':
+                    data['series'] = self.network_monitor.get_bandwidth_series(interface, window)
+                
+                return jsonify({
+                    'success': True,
+                    'data': data
+                })
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+        
         # Analytics endpoints
         @self.app.route('/api/v1/analytics/stats', methods=['GET'])
         @self.require_auth(['read'])
@@ -493,7 +738,67 @@ class EnterpriseAPIServer:
                 return jsonify({'error': str(e)}), 500
     
     def get_system_status(self) -> Dict[str, Any]:
-        """Get current system status"""
+        """Get current system status from the cached snapshot"""
+        snapshot = self._get_status_snapshot()
+        return {**snapshot['status'], 'snapshot': self._get_snapshot_metadata()}
+    
+    def get_detailed_system_status(self) -> Dict[str, Any]:
+        """Get detailed system status from the cached snapshot"""
+        snapshot = self._get_status_snapshot()
+        
+        # Proxy counters are in-memory and cheap, so they are always live
+        detailed = {
+            **snapshot['status'],
+            'proxy_manager': {
+                'total_proxies': len(self.proxy_manager.proxies),
+                'working_proxies': len(self.proxy_manager.get_working_proxies()),
+                'failed_proxies': len(self.proxy_manager.get_failed_proxies())
+            },
+            'network_interfaces': snapshot['network_interfaces'],
+            'performance': snapshot['performance'],
+            'snapshot': self._get_snapshot_metadata()
+        }
+        
+        return detailed
+    
+    def refresh_status_snapshot(self) -> Dict[str, Any]:
+        """Collect system status and store it as the current snapshot"""
+        snapshot = {
+            'status': self._collect_system_status(),
+            'network_interfaces': self.network_monitor.get_network_interfaces(),
+            'performance': self.stats.get_stats()
+        }
+        
+        with self._status_lock:
+            previous = self._status_snapshot
+            self._status_snapshot = snapshot
+            self._status_snapshot_time = time.time()
+        
+        self._publish_health_changes(previous['status'] if previous else None, snapshot['status'])
+        
+        return snapshot
+    
+    def _get_status_snapshot(self) -> Dict[str, Any]:
+        """Return the cached snapshot, collecting it once if none exists yet"""
+        snapshot = self._status_snapshot
+        if snapshot is None:
+            snapshot = self.refresh_status_snapshot()
+        return snapshot
+    
+    def _get_snapshot_metadata(self) -> Dict[str, Any]:
+        """Get staleness metadata for the cached status snapshot"""
+        generated_at = self._status_snapshot_time
+        age = time.time() - generated_at if generated_at else None
+        
+        return {
+            'generated_at': datetime.fromtimestamp(generated_at).isoformat() if generated_at else None,
+            'age': age,
+            'refresh_interval': self.status_refresh_interval,
+            'stale': age is None or age > self.status_refresh_interval * 2
+        }
+    
+    def _collect_system_status(self) -> Dict[str, Any]:
+        """Probe services and network for the current system status"""
         try:
             # Get current IP
             ip_info = self.network_monitor.get_public_ip()
@@ -527,23 +832,87 @@ class EnterpriseAPIServer:
             self.logger.error(f"Error getting system status: {e}")
             return {'error': str(e)}
     
-    def get_detailed_system_status(self) -> Dict[str, Any]:
-        """Get detailed system status"""
-        basic_status = self.get_system_status()
+    def submit_rotation(self, method: str, options: Dict[str, Any]) -> RotationJob:
+        """
+        Queue a rotation on the bounded executor and return its job
         
-        # Add detailed information
-        detailed = {
-            **basic_status,
-            'proxy_manager': {
-                'total_proxies': len(self.proxy_manager.proxies),
-                'working_proxies': len(self.proxy_manager.get_working_proxies()),
-                'failed_proxies': len(self.proxy_manager.get_failed_proxies())
-            },
-            'network_interfaces': self.network_monitor.get_network_interfaces(),
-            'performance': self.stats.get_stats()
-        }
+        Concurrent requests for the same rotation join the job already in
+        flight instead of starting another reconnect, so every waiter gets
+        the same result.
+        """
+        key = self._rotation_key(method, options)
         
-        return detailed
+        with self._jobs_lock:
+            job = self._inflight_rotations.get(key)
+            if job:
+                job.waiters += 1
+                self.logger.debug(f"Coalesced rotation request into job {job.job_id} ({job.waiters} waiters)")
+                return job
+            
+            self._prune_rotation_jobs()
+            job = RotationJob(job_id=secrets.token_urlsafe(12), method=method, options=options)
+            self.rotation_jobs[job.job_id] = job
+            self._inflight_rotations[key] = job
+            job.future = self.rotation_executor.submit(self._run_rotation_job, job, key)
+        
+        return job
+    
+    def _run_rotation_job(self, job: RotationJob, key: tuple) -> Dict[str, Any]:
+        """Execute a rotation job and record its outcome"""
+        try:
+            lock = self._rotation_locks.get(key[0])
+            
+            job.status = 'running'
+            job.started_at = time.time()
+            
+            if lock:
+                with lock:
+                    result = self.perform_rotation(job.method, job.options)
+            else:
+                result = self.perform_rotation(job.method, job.options)
+            
+            job.result = result
+            job.status = 'completed' if result.get('success') else 'failed'
+        except Exception as e:
+            job.result = {'method': job.method, 'success': False, 'error': str(e)}
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            with self._jobs_lock:
+                if self._inflight_rotations.get(key) is job:
+                    del self._inflight_rotations[key]
+        
+        # Recording the rotation also publishes it to event stream subscribers
+        self.stats.record_rotation(
+            method=job.result.get('method', job.method),
+            success=job.result.get('success', False),
+            response_time=job.result.get('response_time', 0),
+            error_message=job.result.get('error')
+        )
+        
+        return job.result
+    
+    def _rotation_key(self, method: str, options: Dict[str, Any]) -> tuple:
+        """Get the coalescing key for a rotation request"""
+        # 'auto' currently rotates proxies, so it shares the proxy slot
+        target = 'proxy' if method == 'auto' else method
+        if target != 'vpn':
+            return (target,)
+        
+        # Server, country and any other VPN option can pick a different
+        # endpoint, so only requests with identical selections share a job
+        selection = {k: v for k, v in options.items() if k not in ROTATION_CONTROL_OPTIONS}
+        return (target, json.dumps(selection, sort_keys=True, default=str))
+    
+    def _prune_rotation_jobs(self):
+        """Drop finished jobs older than the retention window"""
+        cutoff = time.time() - self.job_retention
+        expired = [
+            job_id for job_id, job in self.rotation_jobs.items()
+            if job.finished_at and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self.rotation_jobs[job_id]
     
     def perform_rotation(self, method: str, options: Dict[str, Any]) -> Dict[str, Any]:
         """Perform IP rotation with specified method"""
@@ -566,7 +935,7 @@ class EnterpriseAPIServer:
                 if server:
                     result = self.vpn_manager.connect_by_name(server)
                 else:
-                    result = self.vpn_manager.rotate_connection()
+                    result = self.vpn_manager.rotate_connection(country=options.get('country'))
                 
                 if result:
                     response_time = time.time() - start_time
@@ -610,6 +979,9 @@ class EnterpriseAPIServer:
             dns_check = self.network_monitor.check_dns_leaks()
             results['dns_leaks'] = dns_check
             
+            if not dns_check.get('secure', True):
+                self.publish_event('leak', {'type': 'dns_leak', 'details': dns_check})
+            
             # Get network details for analysis
             network_details = self.network_monitor.get_network_details()
             results['network_analysis'] = network_details
@@ -656,6 +1028,66 @@ class EnterpriseAPIServer:
                 'api_keys': key_stats
             }
     
+    def subscribe_events(self) -> Optional[queue.Queue]:
+        """Register a new event stream subscriber, or None when at capacity"""
+        subscriber = queue.Queue(maxsize=self.event_queue_size)
+        with self._subscribers_lock:
+            # Each open stream holds a server thread for its whole lifetime
+            if len(self._event_subscribers) >= self.max_event_subscribers:
+                return None
+            self._event_subscribers.append(subscriber)
+        return subscriber
+    
+    def unsubscribe_events(self, subscriber: queue.Queue):
+        """Remove an event stream subscriber"""
+        with self._subscribers_lock:
+            if subscriber in self._event_subscribers:
+                self._event_subscribers.remove(subscriber)
+    
+    def publish_event(self, event_type: str, data: Dict[str, Any]):
+        """Push an event to every stream subscriber"""
+        event = {
+            'type': event_type,
+            'data': data,
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        with self._subscribers_lock:
+            subscribers = list(self._event_subscribers)
+        
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Slow clients lose events rather than stalling the publisher
+                self.logger.debug("Event subscriber queue full, dropping event")
+    
+    def _on_rotation_event(self, event: RotationEvent):
+        """Forward recorded rotations to event stream subscribers"""
+        self.publish_event('rotation', asdict(event))
+    
+    def _publish_health_changes(self, previous: Optional[Dict[str, Any]], current: Dict[str, Any]):
+        """Publish a health event when service state or exit IP changes"""
+        if previous is None:
+            return
+        
+        old_services = previous.get('services', {})
+        new_services = current.get('services', {})
+        changed = {
+            name: service for name, service in new_services.items()
+            if service != old_services.get(name)
+        }
+        
+        old_ip = previous.get('network', {}).get('current_ip')
+        new_ip = current.get('network', {}).get('current_ip')
+        
+        if changed or old_ip != new_ip:
+            self.publish_event('health', {
+                'services': changed,
+                'current_ip': new_ip,
+                'previous_ip': old_ip
+            })
+    
     def start_monitoring(self):
         """Start background monitoring thread"""
         self.start_time = time.time()
@@ -663,15 +1095,21 @@ class EnterpriseAPIServer:
         def monitor():
             while True:
                 try:
-                    # Update system status
-                    self.network_monitor.get_public_ip()
-                    time.sleep(30)  # Update every 30 seconds
+                    # Update system status snapshot
+                    self.refresh_status_snapshot()
+                    time.sleep(self.status_refresh_interval)
                 except Exception as e:
                     self.logger.error(f"Monitoring error: {e}")
                     time.sleep(60)
         
         monitor_thread = threading.Thread(target=monitor, daemon=True)
         monitor_thread.start()
+        
+        # Keep bandwidth series and interface state current for dashboards
+        self.network_monitor.start_monitoring()
+        
+        # Pick up added or edited OpenVPN configs without a restart
+        self.vpn_manager.watch_configs()
     
     def get_api_docs(self) -> str:
         """Return API documentation HTML"""
@@ -710,12 +1148,30 @@ class EnterpriseAPIServer:
                 <p>Rotate IP address</p>
             </div>
             
+            <div class="endpoint">
+                <div class="method">GET</div>
+                <div class="path">/api/v1/jobs/&lt;job_id&gt;</div>
+                <p>Poll the status of a background rotation job</p>
+            </div>
+            
+            <div class="endpoint">
+                <div class="method">GET</div>
+                <div class="path">/api/v1/events/stream</div>
+                <p>Stream rotation, health and leak events (Server-Sent Events)</p>
+            </div>
+            
             <div class="endpoint">
                 <div class="method">POST</div>
                 <div class="path">/api/v1/proxy/rotate</div>
                 <p>Rotate proxy connection</p>
             </div>
             
+            <div class="endpoint">
+                <div class="method">GET</div>
+                <div class="path">/api/v1/network/bandwidth</div>
+                <p>Get windowed, EWMA and percentile bandwidth per interface</p>
+            </div>
+            
             <div class="endpoint">
                 <div class="method">GET</div>
                 <div class="path">/api/v1/analytics/stats</div>
@@ -727,10 +1183,27 @@ class EnterpriseAPIServer:
         </html>
         '''
     
-    def run(self, host='0.0.0.0', port=8080, debug=False):
+    def run(self, host='0.0.0.0', port=8080, debug=False, production=False):
         """Start the API server"""
         self.logger.info(f"Starting CyberRotate Pro API Server on {host}:{port}")
+        
+        if production:
+            if WAITRESS_AVAILABLE:
+                self.run_production(host=host, port=port)
+                return
+            self.logger.warning("Production mode requires waitress: pip install waitress")
+        
         self.app.run(host=host, port=port, debug=debug, threaded=True)
+    
+    def run_production(self, host='0.0.0.0', port=8080):
+        """Serve the API through waitress with a fixed pool of request threads"""
+        threads = self.config.get('server', {}).get('threads', 16)
+        if self.max_event_subscribers >= threads:
+            self.logger.warning(
+                f"events.max_subscribers ({self.max_event_subscribers}) leaves no threads "
+                f"for other requests with server.threads={threads}"
+            )
+        waitress.serve(self.app, host=host, port=port, threads=threads)
 
 # Module-level app instance for testing/import purposes
 app = None
@@ -752,6 +1225,7 @@ def main():
     parser.add_argument('--host', default='0.0.0.0', help='Host to bind to')
     parser.add_argument('--port', type=int, default=8080, help='Port to bind to')
     parser.add_argument('--debug', action='store_true', help='Enable debug mode')
+    parser.add_argument('--production', action='store_true', help='Serve through waitress with a thread pool')
     parser.add_argument('--config', default='config/api_config.json', help='Configuration file')
     
     args = parser.parse_args()
@@ -764,7 +1238,7 @@ def main():
     
     # Create and run server
     server = EnterpriseAPIServer(config)
-    server.run(host=args.host, port=args.port, debug=args.debug)
+    server.run(host=args.host, port=args.port, debug=args.debug, production=args.production)
 
 if __name__ == '__main__':
     main()
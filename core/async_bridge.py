@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Async Bridge - Shared background event loop for synchronous callers
+
+Flask views, the CLI and worker threads run coroutines of the database and
+license managers on one long-lived event loop instead of creating and
+closing a loop per call. Pooled connections, flush tasks and periodic jobs
+stay attached to that loop for the life of the process.
+"""
+
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Awaitable, Optional
+
+class AsyncBridge:
+    """Event loop running on a daemon thread, with a thread-safe submit/await API"""
+    
+    def __init__(self, logger: Optional[logging.Logger] = None, name: str = "async-bridge"):
+        self.logger = logger or logging.getLogger(__name__)
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Start the loop thread if it is not running"""
+        with self._lock:
+            if self.thread and self.thread.is_alive():
+                return
+            
+            started = threading.Event()
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self._run, args=(self.loop, started),
+                                           name=self.name, daemon=True)
+            self.thread.start()
+            started.wait()
+    
+    def _run(self, loop: asyncio.AbstractEventLoop, started: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(started.set)
+        try:
+            loop.run_forever()
+        finally:
+            # Let cancelled tasks run their cleanup before closing
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+    
+    def in_loop_thread(self) -> bool:
+        """Whether the caller is running on the bridge's own thread"""
+        return self.thread is not None and threading.current_thread() is self.thread
+    
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """
+        Schedule a coroutine on the shared loop without waiting for it
+        
+        Returns:
+            concurrent.futures.Future with the coroutine's result
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the shared loop and wait for its result
+        
+        Raises:
+            RuntimeError: When called from the loop thread, which would deadlock
+            concurrent.futures.TimeoutError: When timeout expires; the
+                coroutine is cancelled
+        """
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("AsyncBridge.run() called from the bridge loop; await the coroutine instead")
+        
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop the loop, cancelling outstanding tasks"""
+        with self._lock:
+            if not self.thread:
+                return
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout)
+            self.thread = None
+
+_bridge: Optional[AsyncBridge] = None
+_bridge_lock = threading.Lock()
+
+def get_async_bridge() -> AsyncBridge:
+    """Get the process-wide async bridge"""
+    global _bridge
+    
+    with _bridge_lock:
+        if _bridge is None:
+            _bridge = AsyncBridge()
+        return _bridge
+
+def run_sync(coro: Awaitable, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the shared loop from synchronous code"""
+    return get_async_bridge().run(coro, timeout)
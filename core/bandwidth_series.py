@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Bandwidth Series - Fixed-size per-interface bandwidth history
+
+Samples are stored in preallocated arrays used as a ring buffer, so
+recording a sample is O(1) with no allocation and the memory per interface
+is bounded. Rates are derived when a sample is recorded; windowed averages,
+EWMA and percentiles are answered from the stored series without
+re-sampling the interface counters.
+"""
+
+import math
+from array import array
+from typing import Dict, List, Optional, Any
+
+class BandwidthSeries:
+    """Ring buffer of byte counter samples and derived rates for one interface"""
+    
+    def __init__(self, capacity: int = 720, ewma_alpha: float = 0.3):
+        self.capacity = capacity
+        self.ewma_alpha = ewma_alpha
+        
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.bytes_sent = array('d', bytes(8 * capacity))
+        self.bytes_recv = array('d', bytes(8 * capacity))
+        self.upload_rate = array('d', bytes(8 * capacity))
+        self.download_rate = array('d', bytes(8 * capacity))
+        
+        self.count = 0
+        self.total = 0
+        self.head = 0  # next slot to write
+        
+        self.upload_ewma = 0.0
+        self.download_ewma = 0.0
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def _index(self, age: int) -> int:
+        """Slot of the sample `age` positions back from the newest (0 = newest)"""
+        return (self.head - 1 - age) % self.capacity
+    
+    def append(self, timestamp: float, bytes_sent: int, bytes_recv: int):
+        """Record a counter sample and derive rates against the previous one"""
+        upload = download = 0.0
+        
+        if self.count:
+            prev = self._index(0)
+            elapsed = timestamp - self.timestamps[prev]
+            sent = bytes_sent - self.bytes_sent[prev]
+            recv = bytes_recv - self.bytes_recv[prev]
+            
+            # Counters reset when an interface is recreated; skip that interval
+            if elapsed > 0 and sent >= 0 and recv >= 0:
+                upload = sent / elapsed
+                download = recv / elapsed
+                
+                if self.count == 1:
+                    self.upload_ewma, self.download_ewma = upload, download
+                else:
+                    alpha = self.ewma_alpha
+                    self.upload_ewma += alpha * (upload - self.upload_ewma)
+                    self.download_ewma += alpha * (download - self.download_ewma)
+        
+        slot = self.head
+        self.timestamps[slot] = timestamp
+        self.bytes_sent[slot] = bytes_sent
+        self.bytes_recv[slot] = bytes_recv
+        self.upload_rate[slot] = upload
+        self.download_rate[slot] = download
+        
+        self.head = (slot + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.total += 1
+    
+    def _window_size(self, window: Optional[float]) -> int:
+        """Number of newest samples that fall inside the time window"""
+        if not self.count:
+            return 0
+        if window is None:
+            return self.count
+        
+        cutoff = self.timestamps[self._index(0)] - window
+        size = 0
+        while size < self.count and self.timestamps[self._index(size)] >= cutoff:
+            size += 1
+        return size
+    
+    def latest(self) -> Dict[str, float]:
+        """Rates between the two newest samples, in bytes per second"""
+        if self.count < 2:
+            return {}
+        
+        newest = self._index(0)
+        return {
+            'upload_speed': self.upload_rate[newest],
+            'download_speed': self.download_rate[newest]
+        }
+    
+    def rate(self, window: float) -> Dict[str, float]:
+        """Average rates over the last `window` seconds, in bytes per second"""
+        size = self._window_size(window)
+        if size < 2:
+            return self.latest()
+        
+        newest = self._index(0)
+        oldest = self._index(size - 1)
+        elapsed = self.timestamps[newest] - self.timestamps[oldest]
+        if elapsed <= 0:
+            return self.latest()
+        
+        return {
+            'upload_speed': max(0.0, self.bytes_sent[newest] - self.bytes_sent[oldest]) / elapsed,
+            'download_speed': max(0.0, self.bytes_recv[newest] - self.bytes_recv[oldest]) / elapsed
+        }
+    
+    def ewma(self) -> Dict[str, float]:
+        """Exponentially weighted moving average of the rates"""
+        return {
+            'upload_speed': self.upload_ewma,
+            'download_speed': self.download_ewma
+        }
+    
+    def percentiles(self, window: Optional[float] = None,
+                    points: tuple = (50, 95, 100)) -> Dict[str, Dict[str, float]]:
+        """Rate percentiles over the window (nearest-rank), in bytes per second"""
+        # The very first sample has no rate of its own
+        rated = self.count if self.total > self.count else self.count - 1
+        size = min(self._window_size(window), rated)
+        if size <= 0:
+            return {}
+        
+        result = {}
+        for key, rates in (('upload_speed', self.upload_rate), ('download_speed', self.download_rate)):
+            values = sorted(rates[self._index(age)] for age in range(size))
+            result[key] = {
+                f'p{p}': values[min(size, max(1, math.ceil(p / 100.0 * size))) - 1]
+                for p in points
+            }
+        return result
+    
+    def samples(self, window: Optional[float] = None) -> List[Dict[str, float]]:
+        """Samples in the window, oldest first, for charting"""
+        size = self._window_size(window)
+        samples = []
+        
+        for age in range(size - 1, -1, -1):
+            slot = self._index(age)
+            samples.append({
+                'timestamp': self.timestamps[slot],
+                'upload_speed': self.upload_rate[slot],
+                'download_speed': self.download_rate[slot]
+            })
+        
+        return samples
+    
+    def summary(self, window: float = 60.0) -> Dict[str, Any]:
+        """Windowed average, EWMA and percentiles in one structure"""
+        return {
+            'samples': self._window_size(window),
+            'window': window,
+            'average': self.rate(window),
+            'ewma': self.ewma(),
+            'percentiles': self.percentiles(window),
+            'last_sample': self.timestamps[self._index(0)] if self.count else None
+        }
+
+def to_mbps(bytes_per_second: float) -> float:
+    """Convert a byte rate to megabits per second"""
+    return bytes_per_second * 8 / 1000000
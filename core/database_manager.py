@@ -6,7 +6,10 @@ Enterprise database management with SQLite and PostgreSQL support
 import sqlite3
 import asyncio
 import json
-from datetime import datetime, timedelta
+import time
+import threading
+from collections import deque
+from datetime import datetime, timedelta, date
 from typing import Dict, List, Optional, Any, Union
 from pathlib import Path
 import logging
@@ -24,6 +27,171 @@ try:
 except ImportError:
     SQLITE_ASYNC_AVAILABLE = False
 
+# Tables stored as one partition per day, so retention drops whole days
+PARTITIONED_TABLES = ('system_logs', 'api_usage', 'analytics')
+
+# Applied to every pooled SQLite connection
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
+)
+
+class SQLiteConnectionPool:
+    """
+    Persistent SQLite connections shared by all async callers
+    
+    Connections are opened on demand up to pool_size and then reused, so
+    queries no longer pay an open/close each. WAL lets readers run alongside
+    the writer and synchronous=NORMAL avoids an fsync on every commit.
+    Uses aiosqlite when available, plain sqlite3 otherwise.
+    """
+    
+    def __init__(self, db_path: str, pool_size: int = 10, cached_statements: int = 256):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.cached_statements = cached_statements
+        
+        self._idle = deque()
+        self._waiters = deque()
+        self._opened = 0
+        self._closed = False
+        self._lock = threading.Lock()
+    
+    async def _open(self):
+        """Open a connection and apply the pragmas"""
+        if SQLITE_ASYNC_AVAILABLE:
+            conn = await aiosqlite.connect(self.db_path, cached_statements=self.cached_statements)
+            conn.row_factory = sqlite3.Row
+            for pragma in SQLITE_PRAGMAS:
+                await conn.execute(pragma)
+        else:
+            conn = sqlite3.connect(self.db_path, cached_statements=self.cached_statements,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            for pragma in SQLITE_PRAGMAS:
+                conn.execute(pragma)
+        return conn
+    
+    async def _get(self):
+        """Take an idle connection, open a new one, or wait for one"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            if self._idle:
+                return self._idle.pop()
+            
+            can_open = self._opened < self.pool_size
+            if can_open:
+                self._opened += 1
+            else:
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+        
+        if can_open:
+            try:
+                return await self._open()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            # Handed a connection just as the wait was cancelled
+            if waiter.done() and not waiter.cancelled():
+                self._put(waiter.result())
+            raise
+    
+    def _put(self, conn):
+        """Hand a connection to the next waiter or return it to the pool"""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    # Waiters may belong to another thread's event loop
+                    waiter.get_loop().call_soon_threadsafe(self._hand_over, waiter, conn)
+                    return
+            self._idle.append(conn)
+    
+    def _hand_over(self, waiter: asyncio.Future, conn):
+        if waiter.done():
+            self._put(conn)
+        else:
+            waiter.set_result(conn)
+    
+    async def _finish(self, conn, commit: bool):
+        """Commit or roll back whatever the caller left open"""
+        if not conn.in_transaction:
+            return
+        
+        if SQLITE_ASYNC_AVAILABLE:
+            if commit:
+                await conn.commit()
+            else:
+                await conn.rollback()
+        else:
+            if commit:
+                conn.commit()
+            else:
+                conn.rollback()
+    
+    @asynccontextmanager
+    async def acquire(self):
+        """
+        Borrow a connection
+        
+        Like sqlite3's connection context manager, an open transaction is
+        committed when the block succeeds and rolled back when it raises.
+        """
+        conn = await self._get()
+        try:
+            try:
+                yield conn
+            except BaseException:
+                await self._finish(conn, commit=False)
+                raise
+            else:
+                await self._finish(conn, commit=True)
+        finally:
+            if self._closed:
+                await self._close_connection(conn)
+            else:
+                self._put(conn)
+    
+    async def _close_connection(self, conn):
+        with self._lock:
+            self._opened -= 1
+        
+        if SQLITE_ASYNC_AVAILABLE:
+            await conn.close()
+        else:
+            conn.close()
+    
+    async def close(self):
+        """Close idle connections now and borrowed ones when returned"""
+        with self._lock:
+            self._closed = True
+            connections = list(self._idle)
+            self._idle.clear()
+        
+        for conn in connections:
+            await self._close_connection(conn)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Pool occupancy"""
+        with self._lock:
+            return {
+                'size': self.pool_size,
+                'open': self._opened,
+                'idle': len(self._idle),
+                'waiting': len(self._waiters)
+            }
+
 class DatabaseManager:
     """Enterprise database management system"""
     
@@ -31,9 +199,36 @@ class DatabaseManager:
         self.database_url = database_url or "sqlite:///data/cyberrotate.db"
         self.pool_size = pool_size
         self.connection_pool = None
+        self.db_path = None
         self.db_type = self._detect_db_type()
         self.logger = logging.getLogger(__name__)
         
+        # Buffered analytics ingestion. The buffer is not tied to an event
+        # loop, since callers drive the manager from several loops.
+        self.analytics_batch_size = 500
+        self.analytics_flush_interval = 1.0
+        self.analytics_max_pending = 20000
+        self.analytics_dropped = 0
+        self._analytics_buffer = deque()
+        
+        # Events that failed with a transient error are retried with
+        # exponential backoff, up to analytics_max_retries times
+        self.analytics_retry_backoff = 1.0
+        self.analytics_max_backoff = 30.0
+        self.analytics_max_retries = 5
+        self._analytics_failures = 0
+        self._analytics_retry_at = 0.0
+        self._analytics_lock = threading.Lock()
+        self._analytics_flush_task = None
+        self._analytics_size_flush = None
+        
+        # Known daily partitions, and on PostgreSQL which tables are
+        # natively partitioned (databases created before partitioning
+        # keep plain tables)
+        self._partitions = set()
+        self._pg_partitioned = set()
+        self._sqlite_table_sql = {}
+        
         # Note: initialize_database() should be called explicitly in async context
     
     def _detect_db_type(self) -> str:
@@ -70,6 +265,8 @@ class DatabaseManager:
             
             # Create schema
             await self._create_postgresql_schema()
+            await self._init_partitions()
+            await self._init_usage_summaries()
             self.logger.info("PostgreSQL database initialized")
             
         except Exception as e:
@@ -86,15 +283,19 @@ class DatabaseManager:
         # Ensure directory exists
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         
+        self.db_path = db_path
+        self.connection_pool = SQLiteConnectionPool(db_path, self.pool_size)
+        
         if SQLITE_ASYNC_AVAILABLE:
             # Use async SQLite
-            self.connection_pool = db_path
             await self._create_sqlite_schema()
         else:
             # Use sync SQLite
-            self.connection_pool = db_path
             self._create_sqlite_schema_sync()
         
+        await self._init_partitions()
+        await self._init_usage_summaries()
+        
         self.logger.info(f"SQLite database initialized: {db_path}")
     
     async def _create_postgresql_schema(self):
@@ -147,32 +348,34 @@ class DatabaseManager:
             error_message TEXT
         );
         
-        -- Analytics table
+        -- Analytics table (daily range partitions)
         CREATE TABLE IF NOT EXISTS analytics (
-            id SERIAL PRIMARY KEY,
+            id SERIAL,
             user_id INTEGER REFERENCES users(id),
             event_type VARCHAR(100) NOT NULL,
             event_data JSONB,
             ip_address INET,
             user_agent TEXT,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
+            timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp);
         
-        -- System logs table
+        -- System logs table (daily range partitions)
         CREATE TABLE IF NOT EXISTS system_logs (
-            id SERIAL PRIMARY KEY,
+            id SERIAL,
             level VARCHAR(20) NOT NULL,
             message TEXT NOT NULL,
             module VARCHAR(100),
             user_id INTEGER REFERENCES users(id),
             ip_address INET,
             metadata JSONB,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
+            timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp);
         
-        -- API usage table
+        -- API usage table (daily range partitions)
         CREATE TABLE IF NOT EXISTS api_usage (
-            id SERIAL PRIMARY KEY,
+            id SERIAL,
             api_key VARCHAR(255),
             endpoint VARCHAR(255) NOT NULL,
             method VARCHAR(10) NOT NULL,
@@ -180,7 +383,20 @@ class DatabaseManager:
             response_time FLOAT,
             ip_address INET,
             user_agent TEXT,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp);
+        
+        -- Daily usage summaries, maintained as sessions start and end
+        CREATE TABLE IF NOT EXISTS usage_daily (
+            user_id INTEGER NOT NULL,
+            day DATE NOT NULL,
+            total_sessions INTEGER DEFAULT 0,
+            successful_sessions INTEGER DEFAULT 0,
+            total_data BIGINT DEFAULT 0,
+            total_duration DOUBLE PRECISION DEFAULT 0,
+            ended_sessions INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, day)
         );
         
         -- Create indexes
@@ -282,6 +498,18 @@ class DatabaseManager:
             timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
         
+        -- Daily usage summaries, maintained as sessions start and end
+        CREATE TABLE IF NOT EXISTS usage_daily (
+            user_id INTEGER NOT NULL,
+            day DATE NOT NULL,
+            total_sessions INTEGER DEFAULT 0,
+            successful_sessions INTEGER DEFAULT 0,
+            total_data INTEGER DEFAULT 0,
+            total_duration REAL DEFAULT 0,
+            ended_sessions INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        );
+        
         -- Create indexes
         CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id);
         CREATE INDEX IF NOT EXISTS idx_sessions_start_time ON sessions(start_time);
@@ -292,7 +520,7 @@ class DatabaseManager:
         CREATE INDEX IF NOT EXISTS idx_api_usage_timestamp ON api_usage(timestamp);
         """
         
-        async with aiosqlite.connect(self.connection_pool) as conn:
+        async with self.connection_pool.acquire() as conn:
             await conn.executescript(schema_sql)
             await conn.commit()
     
@@ -381,27 +609,167 @@ class DatabaseManager:
             user_agent TEXT,
             timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
+        
+        -- Daily usage summaries, maintained as sessions start and end
+        CREATE TABLE IF NOT EXISTS usage_daily (
+            user_id INTEGER NOT NULL,
+            day DATE NOT NULL,
+            total_sessions INTEGER DEFAULT 0,
+            successful_sessions INTEGER DEFAULT 0,
+            total_data INTEGER DEFAULT 0,
+            total_duration REAL DEFAULT 0,
+            ended_sessions INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        );
         """
         
-        with sqlite3.connect(self.connection_pool) as conn:
+        with sqlite3.connect(self.db_path) as conn:
             conn.executescript(schema_sql)
             conn.commit()
     
+    async def _init_partitions(self):
+        """Discover existing partitions and create today's and tomorrow's"""
+        today = datetime.utcnow().date()
+        
+        async with self.get_connection() as conn:
+            if self.db_type == "postgresql":
+                rows = await conn.fetch(
+                    "SELECT c.relname FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                    "WHERE c.relname = ANY($1::text[])",
+                    list(PARTITIONED_TABLES)
+                )
+                self._pg_partitioned = {row['relname'] for row in rows}
+                
+                # Rows outside every daily partition land here
+                for table in self._pg_partitioned:
+                    await conn.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+            else:
+                for table in PARTITIONED_TABLES:
+                    rows = await self._sqlite_fetchall(
+                        conn, "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+                    self._sqlite_table_sql[table] = rows[0][0]
+            
+            for table in PARTITIONED_TABLES:
+                for name, _ in await self._list_partitions(conn, table):
+                    self._partitions.add(name)
+                
+                for day in (today, today + timedelta(days=1)):
+                    await self._ensure_partition(conn, table, day, refresh_view=False)
+                
+                if self.db_type == "sqlite":
+                    await self._refresh_partition_view(conn, table)
+    
+    @staticmethod
+    def _partition_name(table: str, day: date) -> str:
+        return f"{table}_p{day.strftime('%Y%m%d')}"
+    
+    @staticmethod
+    def _partition_day(table: str, name: str) -> Optional[date]:
+        """Day covered by a partition table, or None if it is not one"""
+        prefix = f"{table}_p"
+        if not name.startswith(prefix):
+            return None
+        try:
+            return datetime.strptime(name[len(prefix):], '%Y%m%d').date()
+        except ValueError:
+            return None
+    
+    async def _sqlite_fetchall(self, conn, query: str, params: tuple = ()) -> List:
+        if SQLITE_ASYNC_AVAILABLE:
+            cursor = await conn.execute(query, params)
+            return await cursor.fetchall()
+        return conn.execute(query, params).fetchall()
+    
+    async def _sqlite_execute(self, conn, query: str, params: tuple = ()):
+        if SQLITE_ASYNC_AVAILABLE:
+            await conn.execute(query, params)
+        else:
+            conn.execute(query, params)
+    
+    async def _list_partitions(self, conn, table: str) -> List[tuple]:
+        """(name, day) of every daily partition of a table"""
+        if self.db_type == "postgresql":
+            if table not in self._pg_partitioned:
+                return []
+            rows = await conn.fetch(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = $1::regclass",
+                table
+            )
+            names = [row['relname'] for row in rows]
+        else:
+            rows = await self._sqlite_fetchall(
+                conn, "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?", (f"{table}_p%",))
+            names = [row[0] for row in rows]
+        
+        partitions = [(name, self._partition_day(table, name)) for name in names]
+        return sorted(p for p in partitions if p[1] is not None)
+    
+    async def _ensure_partition(self, conn, table: str, day: date, refresh_view: bool = True) -> str:
+        """
+        Create the partition holding a day's rows if needed
+        
+        Returns:
+            Table to write the day's rows to
+        """
+        name = self._partition_name(table, day)
+        if name in self._partitions:
+            return name
+        
+        if self.db_type == "postgresql":
+            if table not in self._pg_partitioned:
+                return table
+            try:
+                await conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+                )
+            except Exception as e:
+                # e.g. the default partition already holds rows for that day
+                self.logger.warning(f"Could not create partition {name}: {e}")
+                return table
+        else:
+            # Same definition as the base table
+            create_sql = self._sqlite_table_sql[table].replace(
+                f"CREATE TABLE {table}", f"CREATE TABLE IF NOT EXISTS {name}", 1)
+            await self._sqlite_execute(conn, create_sql)
+        
+        self._partitions.add(name)
+        
+        if self.db_type == "sqlite" and refresh_view:
+            await self._refresh_partition_view(conn, table)
+        
+        return name
+    
+    async def _refresh_partition_view(self, conn, table: str):
+        """Recreate the {table}_all view over the base table and its partitions"""
+        partitions = await self._list_partitions(conn, table)
+        selects = [f"SELECT * FROM {table}"] + [f"SELECT * FROM {name}" for name, _ in partitions]
+        
+        try:
+            await self._sqlite_execute(conn, f"DROP VIEW IF EXISTS {table}_all")
+            await self._sqlite_execute(conn, f"CREATE VIEW {table}_all AS {' UNION ALL '.join(selects)}")
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not create view {table}_all: {e}")
+    
     @asynccontextmanager
     async def get_connection(self):
         """Get database connection from pool"""
-        if self.db_type == "postgresql":
-            async with self.connection_pool.acquire() as conn:
-                yield conn
-        else:
-            if SQLITE_ASYNC_AVAILABLE:
-                async with aiosqlite.connect(self.connection_pool) as conn:
-                    yield conn
-            else:
-                # Sync SQLite connection (wrapped to look async)
-                with sqlite3.connect(self.connection_pool) as conn:
-                    conn.row_factory = sqlite3.Row
-                    yield conn
+        # Both backends hand out persistent pooled connections; for SQLite
+        # these are sync sqlite3 connections when aiosqlite is missing
+        async with self.connection_pool.acquire() as conn:
+            yield conn
+    
+    async def close(self):
+        """Flush buffered analytics and close all pooled connections"""
+        if self._analytics_flush_task is not None:
+            self._analytics_flush_task.cancel()
+            self._analytics_flush_task = None
+        
+        if self.connection_pool is not None:
+            await self.flush_analytics(force=True)
+            await self.connection_pool.close()
+            self.connection_pool = None
     
     async def create_user(self, username: str, email: str, password_hash: str, role: str = "user") -> int:
         """Create a new user"""
@@ -458,9 +826,15 @@ class DatabaseManager:
         
         query = f"INSERT INTO sessions ({', '.join(fields)}) VALUES ({', '.join(placeholders)}) RETURNING id"
         
+        # Count the session in its day's usage summary
+        summary_query = self._usage_summary_upsert(
+            "SELECT COALESCE(user_id, 0), {day}, 1, 0, 0, 0, 0 FROM sessions WHERE id = {param}")
+        
         async with self.get_connection() as conn:
             if self.db_type == "postgresql":
-                result = await conn.fetchrow(query, *values)
+                async with conn.transaction():
+                    result = await conn.fetchrow(query, *values)
+                    await conn.execute(summary_query, result['id'])
                 return result['id']
             else:
                 if SQLITE_ASYNC_AVAILABLE:
@@ -468,6 +842,7 @@ class DatabaseManager:
                         query.replace(" RETURNING id", ""),
                         values
                     )
+                    await conn.execute(summary_query, (cursor.lastrowid,))
                     await conn.commit()
                     return cursor.lastrowid
                 else:
@@ -475,97 +850,413 @@ class DatabaseManager:
                         query.replace(" RETURNING id", ""),
                         values
                     )
+                    conn.execute(summary_query, (cursor.lastrowid,))
                     conn.commit()
                     return cursor.lastrowid
     
-    async def log_analytics_event(self, user_id: int, event_type: str, event_data: Dict = None, **kwargs):
-        """Log analytics event"""
-        event_data_json = json.dumps(event_data) if event_data else None
+    async def end_session(self, session_id: str, status: str = "completed",
+                          data_transferred: Optional[int] = None) -> bool:
+        """
+        Close a session and fold it into its day's usage summary
+        
+        Returns:
+            False if the session does not exist or was already closed
+        """
+        summary_query = self._usage_summary_upsert(
+            "SELECT COALESCE(user_id, 0), {day}, 0, "
+            "CASE WHEN status = 'completed' THEN 1 ELSE 0 END, "
+            "COALESCE(data_transferred, 0), {duration}, 1 "
+            "FROM sessions WHERE session_id = {param}")
         
         async with self.get_connection() as conn:
             if self.db_type == "postgresql":
-                await conn.execute(
-                    "INSERT INTO analytics (user_id, event_type, event_data, ip_address, user_agent) VALUES ($1, $2, $3, $4, $5)",
-                    user_id, event_type, event_data, kwargs.get('ip_address'), kwargs.get('user_agent')
-                )
+                async with conn.transaction():
+                    result = await conn.execute(
+                        "UPDATE sessions SET end_time = CURRENT_TIMESTAMP, status = $1, "
+                        "data_transferred = COALESCE($2, data_transferred) "
+                        "WHERE session_id = $3 AND end_time IS NULL",
+                        status, data_transferred, session_id
+                    )
+                    if result.split()[-1] == '0':
+                        return False
+                    await conn.execute(summary_query, session_id)
+                return True
             else:
+                query = ("UPDATE sessions SET end_time = CURRENT_TIMESTAMP, status = ?, "
+                         "data_transferred = COALESCE(?, data_transferred) "
+                         "WHERE session_id = ? AND end_time IS NULL")
+                params = (status, data_transferred, session_id)
+                
                 if SQLITE_ASYNC_AVAILABLE:
-                    await conn.execute(
-                        "INSERT INTO analytics (user_id, event_type, event_data, ip_address, user_agent) VALUES (?, ?, ?, ?, ?)",
-                        (user_id, event_type, event_data_json, kwargs.get('ip_address'), kwargs.get('user_agent'))
-                    )
+                    cursor = await conn.execute(query, params)
+                    if cursor.rowcount == 0:
+                        return False
+                    await conn.execute(summary_query, (session_id,))
                     await conn.commit()
                 else:
-                    conn.execute(
-                        "INSERT INTO analytics (user_id, event_type, event_data, ip_address, user_agent) VALUES (?, ?, ?, ?, ?)",
-                        (user_id, event_type, event_data_json, kwargs.get('ip_address'), kwargs.get('user_agent'))
-                    )
+                    cursor = conn.execute(query, params)
+                    if cursor.rowcount == 0:
+                        return False
+                    conn.execute(summary_query, (session_id,))
                     conn.commit()
+                return True
     
-    async def get_usage_stats(self, user_id: int = None, days: int = 30) -> Dict:
-        """Get usage statistics"""
-        since_date = datetime.now() - timedelta(days=days)
-        
-        base_query = """
-        SELECT 
-            COUNT(*) as total_sessions,
-            COUNT(CASE WHEN status = 'completed' THEN 1 END) as successful_sessions,
-            SUM(data_transferred) as total_data,
-            AVG(EXTRACT(EPOCH FROM (end_time - start_time))) as avg_duration
-        FROM sessions 
-        WHERE start_time >= %s
+    def _usage_summary_upsert(self, select: str) -> str:
         """
+        Upsert adding a sessions SELECT's counts to usage_daily
         
-        if user_id:
-            base_query += " AND user_id = %s"
-            params = [since_date, user_id]
+        The SELECT uses {day}, {duration} and {param} placeholders for the
+        backend-specific session day, duration and single parameter.
+        """
+        if self.db_type == "postgresql":
+            select = select.format(day="CAST(start_time AS DATE)",
+                                   duration="EXTRACT(EPOCH FROM (end_time - start_time))",
+                                   param="$1")
         else:
-            params = [since_date]
+            select = select.format(day="date(start_time)",
+                                   duration="(julianday(end_time) - julianday(start_time)) * 86400",
+                                   param="?")
         
-        # Adjust query for SQLite
-        if self.db_type == "sqlite":
-            base_query = base_query.replace("EXTRACT(EPOCH FROM (end_time - start_time))", 
-                                          "(julianday(end_time) - julianday(start_time)) * 86400")
-            base_query = base_query.replace("%s", "?")
+        return f"""
+        INSERT INTO usage_daily (user_id, day, total_sessions, successful_sessions,
+                                 total_data, total_duration, ended_sessions)
+        {select}
+        ON CONFLICT (user_id, day) DO UPDATE SET
+            total_sessions = usage_daily.total_sessions + excluded.total_sessions,
+            successful_sessions = usage_daily.successful_sessions + excluded.successful_sessions,
+            total_data = usage_daily.total_data + excluded.total_data,
+            total_duration = usage_daily.total_duration + excluded.total_duration,
+            ended_sessions = usage_daily.ended_sessions + excluded.ended_sessions
+        """
+    
+    async def _init_usage_summaries(self):
+        """Build usage summaries from existing sessions on first start"""
+        async with self.get_connection() as conn:
+            if self.db_type == "postgresql":
+                if await conn.fetchval("SELECT EXISTS (SELECT 1 FROM usage_daily)"):
+                    return
+                if not await conn.fetchval("SELECT EXISTS (SELECT 1 FROM sessions)"):
+                    return
+            else:
+                rows = await self._sqlite_fetchall(
+                    conn, "SELECT EXISTS (SELECT 1 FROM usage_daily), EXISTS (SELECT 1 FROM sessions)")
+                if rows[0][0] or not rows[0][1]:
+                    return
+        
+        await self.rebuild_usage_summaries()
+    
+    async def rebuild_usage_summaries(self):
+        """Recompute every daily usage summary from the sessions table"""
+        query = self._usage_summary_upsert(
+            "SELECT COALESCE(user_id, 0), {day}, COUNT(*), "
+            "COUNT(CASE WHEN status = 'completed' THEN 1 END), "
+            "COALESCE(SUM(CASE WHEN end_time IS NOT NULL THEN data_transferred END), 0), "
+            "COALESCE(SUM({duration}), 0), COUNT(end_time) "
+            "FROM sessions WHERE true GROUP BY 1, 2")
         
         async with self.get_connection() as conn:
             if self.db_type == "postgresql":
-                result = await conn.fetchrow(base_query, *params)
+                async with conn.transaction():
+                    await conn.execute("DELETE FROM usage_daily")
+                    await conn.execute(query)
             else:
+                await self._sqlite_execute(conn, "DELETE FROM usage_daily")
+                await self._sqlite_execute(conn, query)
                 if SQLITE_ASYNC_AVAILABLE:
-                    cursor = await conn.execute(base_query, params)
-                    result = await cursor.fetchone()
+                    await conn.commit()
                 else:
-                    cursor = conn.execute(base_query, params)
-                    result = cursor.fetchone()
+                    conn.commit()
+        
+        self.logger.info("Rebuilt daily usage summaries")
+    
+    async def log_analytics_event(self, user_id: int, event_type: str, event_data: Dict = None, **kwargs):
+        """
+        Log analytics event
+        
+        Events are buffered and written in batches by a background flush, so
+        this returns without waiting on the database. Only when the buffer
+        holds analytics_max_pending events does the caller flush it itself.
+        """
+        event_data_json = json.dumps(event_data) if event_data else None
+        
+        # Stamp the event now, since it is written later (UTC, like CURRENT_TIMESTAMP)
+        record = (user_id, event_type, event_data_json, kwargs.get('ip_address'),
+                  kwargs.get('user_agent'), datetime.utcnow().replace(microsecond=0))
+        
+        with self._analytics_lock:
+            self._analytics_buffer.append(record)
+            pending = len(self._analytics_buffer)
+        
+        self._ensure_analytics_flusher()
+        
+        if pending >= self.analytics_max_pending:
+            # Backpressure: the writer has fallen behind
+            await self.flush_analytics(force=True)
+        elif pending >= self.analytics_batch_size:
+            flush = self._analytics_size_flush
+            if flush is None or flush.done():
+                self._analytics_size_flush = asyncio.get_running_loop().create_task(self.flush_analytics())
+    
+    def _ensure_analytics_flusher(self):
+        """Start the time-triggered flush on the running loop if needed"""
+        loop = asyncio.get_running_loop()
+        task = self._analytics_flush_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._analytics_flush_task = loop.create_task(self._analytics_flush_loop())
+    
+    async def _analytics_flush_loop(self):
+        """Flush buffered analytics events every analytics_flush_interval"""
+        while self.connection_pool is not None:
+            await asyncio.sleep(self.analytics_flush_interval)
+            if self._analytics_buffer:
+                await self.flush_analytics()
+    
+    async def flush_analytics(self, force: bool = False) -> int:
+        """
+        Write buffered analytics events now
+        
+        If a batch fails, its events are written one by one so only the
+        rows that fail are dropped. A transient error (locked database, lost
+        connection) puts the unwritten events back at the head of the buffer
+        and postpones flushing with exponential backoff.
+        
+        Args:
+            force: Flush even while backing off after a failure
+        
+        Returns:
+            Number of events written
+        """
+        if not force and time.monotonic() < self._analytics_retry_at:
+            return 0
+        
+        written = 0
+        
+        while True:
+            with self._analytics_lock:
+                count = min(self.analytics_batch_size, len(self._analytics_buffer))
+                batch = [self._analytics_buffer.popleft() for _ in range(count)]
+            
+            if not batch:
+                return written
+            
+            try:
+                await self._write_analytics_batch(batch)
+            except Exception as e:
+                self.logger.warning(f"Failed to write {len(batch)} analytics events as a batch, "
+                                    f"retrying row by row: {e}")
+                rows_written, unwritten = await self._write_analytics_rows(batch)
+                written += rows_written
+                
+                if unwritten:
+                    with self._analytics_lock:
+                        self._analytics_buffer.extendleft(reversed(unwritten))
+                    return written
+                continue
             
-            return dict(result) if result else {}
+            written += len(batch)
+            self._analytics_failures = 0
+            self._analytics_retry_at = 0.0
+    
+    async def _write_analytics_rows(self, batch: List[tuple]) -> tuple:
+        """
+        Insert analytics records one at a time, dropping the ones that fail
+        
+        Returns:
+            (number written, records to retry after a transient error)
+        """
+        written = 0
+        
+        for index, record in enumerate(batch):
+            try:
+                await self._write_analytics_batch([record])
+                written += 1
+                self._analytics_failures = 0
+            except Exception as e:
+                if not self._is_transient_error(e):
+                    self.analytics_dropped += 1
+                    self.logger.error(f"Dropped analytics event {record[1]!r}: {e}")
+                    continue
+                
+                remaining = batch[index:]
+                
+                if self._analytics_failures >= self.analytics_max_retries:
+                    self._analytics_failures = 0
+                    self.analytics_dropped += len(remaining)
+                    self.logger.error(f"Dropped {len(remaining)} analytics events after "
+                                      f"{self.analytics_max_retries} retries: {e}")
+                    return written, []
+                
+                self._analytics_failures += 1
+                delay = min(self.analytics_retry_backoff * 2 ** (self._analytics_failures - 1),
+                            self.analytics_max_backoff)
+                self._analytics_retry_at = time.monotonic() + delay
+                self.logger.error(f"Failed to write {len(remaining)} analytics events, "
+                                  f"retrying in {delay:.1f}s: {e}")
+                return written, remaining
+        
+        return written, []
     
-    async def cleanup_old_data(self, days: int = 90):
-        """Clean up old data"""
-        cutoff_date = datetime.now() - timedelta(days=days)
+    @staticmethod
+    def _is_transient_error(error: Exception) -> bool:
+        """Whether a failed write may succeed when retried"""
+        if isinstance(error, (sqlite3.OperationalError, OSError, asyncio.TimeoutError)):
+            return True
         
-        cleanup_queries = [
-            "DELETE FROM system_logs WHERE timestamp < %s",
-            "DELETE FROM api_usage WHERE timestamp < %s",
-            "DELETE FROM analytics WHERE timestamp < %s"
-        ]
+        if POSTGRESQL_AVAILABLE:
+            return isinstance(error, (asyncpg.exceptions.PostgresConnectionError,
+                                      asyncpg.exceptions.InterfaceError,
+                                      asyncpg.exceptions.TooManyConnectionsError,
+                                      asyncpg.exceptions.DeadlockDetectedError))
+        return False
+    
+    async def _write_analytics_batch(self, batch: List[tuple]):
+        """Insert a batch of analytics records in one round trip"""
+        columns = ['user_id', 'event_type', 'event_data', 'ip_address', 'user_agent', 'timestamp']
         
-        if self.db_type == "sqlite":
-            cleanup_queries = [q.replace("%s", "?") for q in cleanup_queries]
+        # Group by day, since each day is its own partition
+        days = {}
+        for record in batch:
+            days.setdefault(record[5].date(), []).append(record)
         
         async with self.get_connection() as conn:
-            for query in cleanup_queries:
-                if self.db_type == "postgresql":
-                    await conn.execute(query, cutoff_date)
-                else:
+            if self.db_type == "postgresql":
+                # Rows are routed to the daily partitions by the server
+                for day in days:
+                    await self._ensure_partition(conn, 'analytics', day)
+                await conn.copy_records_to_table('analytics', records=batch, columns=columns)
+            else:
+                for day, records in days.items():
+                    table = await self._ensure_partition(conn, 'analytics', day)
+                    
+                    # Same text format as CURRENT_TIMESTAMP
+                    rows = [record[:5] + (record[5].isoformat(sep=' '),) for record in records]
+                    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES (?, ?, ?, ?, ?, ?)"
+                    
                     if SQLITE_ASYNC_AVAILABLE:
-                        await conn.execute(query, (cutoff_date,))
+                        await conn.executemany(query, rows)
+                    else:
+                        conn.executemany(query, rows)
+                
+                if SQLITE_ASYNC_AVAILABLE:
+                    await conn.commit()
+                else:
+                    conn.commit()
+    
+    def get_analytics_ingestion_stats(self) -> Dict[str, int]:
+        """Buffered and dropped analytics event counts"""
+        return {
+            'pending': len(self._analytics_buffer),
+            'dropped': self.analytics_dropped,
+            'batch_size': self.analytics_batch_size,
+            'retrying': self._analytics_failures
+        }
+    
+    async def get_usage_stats(self, user_id: int = None, days: int = 30) -> Dict:
+        """Get usage statistics"""
+        return (await self.get_usage_stats_windows((days,), user_id))[days]
+    
+    async def get_usage_stats_windows(self, windows=(30, 7, 1), user_id: int = None) -> Dict[int, Dict]:
+        """
+        Get usage statistics for several windows in one query
+        
+        Answered from the daily summaries, so the cost does not grow with
+        session history. Windows are whole UTC days including today.
+        
+        Args:
+            windows: Window lengths in days
+            user_id: Restrict to one user
+        
+        Returns:
+            Dict of window length to statistics
+        """
+        today = datetime.utcnow().date()
+        pg = self.db_type == "postgresql"
+        
+        def since(days):
+            day = today - timedelta(days=max(days, 1) - 1)
+            return day if pg else day.isoformat()
+        
+        # Numbered parameters, since each window's is used five times
+        mark = '$' if pg else '?'
+        columns = []
+        params = []
+        for i, days in enumerate(windows):
+            params.append(since(days))
+            placeholder = f"{mark}{len(params)}"
+            for column in ('total_sessions', 'successful_sessions', 'total_data', 'total_duration', 'ended_sessions'):
+                columns.append(f"SUM(CASE WHEN day >= {placeholder} THEN {column} ELSE 0 END) AS {column}_{i}")
+        
+        params.append(since(max(windows)))
+        query = f"SELECT {', '.join(columns)} FROM usage_daily WHERE day >= {mark}{len(params)}"
+        
+        if user_id:
+            params.append(user_id)
+            query += f" AND user_id = {mark}{len(params)}"
+        
+        async with self.get_connection() as conn:
+            if pg:
+                row = await conn.fetchrow(query, *params)
+            else:
+                row = (await self._sqlite_fetchall(conn, query, tuple(params)))[0]
+        
+        row = dict(row)
+        stats = {}
+        for i, days in enumerate(windows):
+            ended = row[f'ended_sessions_{i}'] or 0
+            stats[days] = {
+                'total_sessions': row[f'total_sessions_{i}'] or 0,
+                'successful_sessions': row[f'successful_sessions_{i}'] or 0,
+                'total_data': row[f'total_data_{i}'] or 0,
+                'avg_duration': row[f'total_duration_{i}'] / ended if ended else None
+            }
+        
+        return stats
+    
+    async def cleanup_old_data(self, days: int = 90) -> Dict[str, Any]:
+        """
+        Clean up old data
+        
+        Daily partitions older than the cutoff are dropped whole, which
+        takes the same time however many rows they hold. Only rows in
+        tables created before partitioning (and PostgreSQL's default
+        partition) are deleted row by row.
+        """
+        # Timestamps are stored in UTC, like CURRENT_TIMESTAMP
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        dropped = []
+        
+        async with self.get_connection() as conn:
+            for table in PARTITIONED_TABLES:
+                for name, day in await self._list_partitions(conn, table):
+                    if day >= cutoff_date.date():
+                        continue
+                    
+                    if self.db_type == "postgresql":
+                        await conn.execute(f"DROP TABLE IF EXISTS {name}")
                     else:
-                        conn.execute(query, (cutoff_date,))
+                        await self._sqlite_execute(conn, f"DROP TABLE IF EXISTS {name}")
+                    
+                    self._partitions.discard(name)
+                    dropped.append(name)
+                
+                if self.db_type == "postgresql":
+                    remainder = f"{table}_default" if table in self._pg_partitioned else table
+                    await conn.execute(f"DELETE FROM {remainder} WHERE timestamp < $1", cutoff_date)
+                else:
+                    await self._sqlite_execute(conn, f"DELETE FROM {table} WHERE timestamp < ?",
+                                               (cutoff_date.isoformat(sep=' ', timespec='seconds'),))
+                    await self._refresh_partition_view(conn, table)
             
-            if self.db_type == "sqlite" and not SQLITE_ASYNC_AVAILABLE:
-                conn.commit()
+            if self.db_type == "sqlite":
+                if SQLITE_ASYNC_AVAILABLE:
+                    await conn.commit()
+                else:
+                    conn.commit()
+        
+        if dropped:
+            self.logger.info(f"Dropped {len(dropped)} expired partitions")
+        
+        return {'dropped_partitions': dropped, 'cutoff': cutoff_date.isoformat()}
 
 # Global database manager instance
 db_manager = None
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Latency Prober - Concurrent handshake RTT measurement for VPN servers
+
+Measures the round trip of a TCP connect or an OpenVPN UDP hard-reset
+exchange to each server:port in parallel, and caches the results so
+server selection can prefer nearby servers without full tunnel connects.
+Selection never waits for more than one round of probes; expired and
+missing results are refreshed in the background.
+"""
+
+import os
+import time
+import socket
+import random
+import struct
+import logging
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Dict, Tuple, Any
+
+# P_CONTROL_HARD_RESET_CLIENT_V2 with key id 0
+OPENVPN_HARD_RESET_CLIENT = 7 << 3
+
+@dataclass
+class LatencyResult:
+    """Outcome of a single probe"""
+    server: str
+    port: int
+    protocol: str
+    rtt: Optional[float]
+    measured_at: float
+    error: Optional[str] = None
+    
+    @property
+    def reachable(self) -> bool:
+        return self.rtt is not None
+
+class LatencyProber:
+    """Measure and cache handshake latency to VPN servers"""
+    
+    def __init__(self, logger: logging.Logger, timeout: float = 2.0,
+                 cache_ttl: float = 300.0, max_workers: int = 16):
+        self.logger = logger
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.max_workers = max_workers
+        
+        self._cache: Dict[Tuple[str, int, str], LatencyResult] = {}
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+    
+    def probe(self, server: str, port: int, protocol: str = 'udp') -> LatencyResult:
+        """Measure handshake RTT to one server, bypassing the cache"""
+        protocol = (protocol or 'udp').lower()
+        
+        try:
+            address = socket.getaddrinfo(server, port, socket.AF_INET)[0][4]
+            
+            if protocol.startswith('tcp'):
+                rtt = self._probe_tcp(address)
+            else:
+                rtt = self._probe_udp(address)
+            
+            result = LatencyResult(server, port, protocol, rtt, time.time())
+        except (OSError, socket.timeout) as e:
+            result = LatencyResult(server, port, protocol, None, time.time(), str(e))
+        
+        with self._lock:
+            self._cache[(server, port, protocol)] = result
+        
+        return result
+    
+    def _probe_tcp(self, address: Tuple[str, int]) -> float:
+        """Time a TCP three-way handshake"""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            start = time.perf_counter()
+            sock.connect(address)
+            return time.perf_counter() - start
+    
+    def _probe_udp(self, address: Tuple[str, int]) -> float:
+        """Time an OpenVPN hard reset request/response over UDP"""
+        session_id = os.urandom(8)
+        # opcode/key id, session id, empty ack array, packet id 0
+        packet = struct.pack('!B8sBI', OPENVPN_HARD_RESET_CLIENT, session_id, 0, 0)
+        
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(address)
+            start = time.perf_counter()
+            sock.send(packet)
+            sock.recv(1024)
+            return time.perf_counter() - start
+    
+    def get_cached(self, server: str, port: int, protocol: str = 'udp',
+                   max_age: Optional[float] = None) -> Optional[LatencyResult]:
+        """Get a cached result no older than max_age (default: cache_ttl)"""
+        key = (server, port, (protocol or 'udp').lower())
+        max_age = self.cache_ttl if max_age is None else max_age
+        
+        with self._lock:
+            result = self._cache.get(key)
+        
+        if result and time.time() - result.measured_at < max_age:
+            return result
+        return None
+    
+    def probe_configs(self, configs: List[Any], force: bool = False) -> Dict[str, LatencyResult]:
+        """
+        Probe configs in parallel, reusing fresh cached results
+        
+        Args:
+            configs: Objects with name, server, port and protocol attributes
+            force: Re-probe even if a fresh cached result exists
+        
+        Returns:
+            Dict mapping config name to its latency result
+        """
+        results = {}
+        pending = []
+        
+        for config in configs:
+            cached = None if force else self.get_cached(config.server, config.port, config.protocol)
+            if cached:
+                results[config.name] = cached
+            else:
+                pending.append(config)
+        
+        if not pending:
+            return results
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+            future_to_config = {
+                executor.submit(self.probe, config.server, config.port, config.protocol): config
+                for config in pending
+            }
+            
+            for future in as_completed(future_to_config):
+                config = future_to_config[future]
+                try:
+                    results[config.name] = future.result()
+                except Exception as e:
+                    self.logger.debug(f"Error probing {config.server}:{config.port}: {e}")
+        
+        reachable = sum(1 for result in results.values() if result.reachable)
+        self.logger.debug(f"Latency probe complete: {reachable}/{len(configs)} servers reachable")
+        return results
+    
+    def refresh_async(self, configs: List[Any]) -> bool:
+        """
+        Probe configs without fresh results on a background thread
+        
+        Returns:
+            bool: False if a refresh is already running
+        """
+        with self._lock:
+            if self._refresh_thread and self._refresh_thread.is_alive():
+                return False
+            
+            self._refresh_thread = threading.Thread(
+                target=self._refresh, args=(list(configs),), name='latency-refresh', daemon=True
+            )
+            self._refresh_thread.start()
+            return True
+    
+    def _refresh(self, configs: List[Any]):
+        try:
+            self.probe_configs(configs)
+        except Exception as e:
+            self.logger.debug(f"Background latency refresh failed: {e}")
+    
+    def select(self, configs: List[Any], country: Optional[str] = None,
+               tolerance: float = 1.5) -> Optional[Any]:
+        """
+        Pick a low-latency config
+        
+        Chooses randomly among reachable servers within `tolerance` times the
+        best RTT, so rotation keeps some variety while staying on fast
+        servers. Falls back to a random choice if nothing answers.
+        
+        Ranks servers by their last known RTT, even if it has expired. Only
+        when no server has been measured yet is one round of up to
+        max_workers random servers probed inline; everything else is
+        refreshed in the background.
+        """
+        if country:
+            configs = [config for config in configs if (config.country or '').lower() == country.lower()]
+        
+        if not configs:
+            return None
+        
+        stale = [config for config in configs
+                 if not self.get_cached(config.server, config.port, config.protocol)]
+        
+        if stale:
+            if len(stale) == len(configs) and not any(
+                    self.get_cached(config.server, config.port, config.protocol, max_age=float('inf'))
+                    for config in configs):
+                # Cold cache: bound the inline work to a single probe round
+                self.probe_configs(random.sample(configs, min(self.max_workers, len(configs))))
+            
+            self.refresh_async(stale)
+        
+        measured = []
+        for config in configs:
+            result = self.get_cached(config.server, config.port, config.protocol, max_age=float('inf'))
+            if result and result.reachable:
+                measured.append((result.rtt, config))
+        
+        if not measured:
+            return random.choice(configs)
+        
+        best = min(rtt for rtt, _ in measured)
+        fast = [config for rtt, config in measured if rtt <= best * tolerance]
+        return random.choice(fast)
+    
+    def clear_cache(self):
+        """Forget all cached results"""
+        with self._lock:
+            self._cache.clear()
@@ -4,11 +4,13 @@ Enterprise-grade license validation and management
 """
 
 import json
+import asyncio
 import datetime
 import hashlib
 import hmac
 import base64
 import uuid
+import functools
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from cryptography.fernet import Fernet
@@ -19,6 +21,8 @@ import time
 import threading
 from pathlib import Path
 
+from core.async_bridge import get_async_bridge
+
 @dataclass
 class LicenseInfo:
     """License information structure"""
@@ -32,6 +36,59 @@ class LicenseInfo:
     valid: bool = True
     last_validated: Optional[datetime.datetime] = None
 
+# Cache fields that change on every validation without changing the license
+VOLATILE_CACHE_FIELDS = ('last_validated',)
+
+# Bit assigned to each feature name seen in a license, shared by all snapshots
+FEATURE_BITS: Dict[str, int] = {}
+_feature_bits_lock = threading.Lock()
+
+def _feature_mask(features: List[str]) -> int:
+    """Bitset of features, assigning bits to names not seen before"""
+    mask = 0
+    with _feature_bits_lock:
+        for feature in features:
+            bit = FEATURE_BITS.get(feature)
+            if bit is None:
+                bit = FEATURE_BITS[feature] = 1 << len(FEATURE_BITS)
+            mask |= bit
+    return mask
+
+@dataclass(frozen=True)
+class LicenseSnapshot:
+    """
+    Immutable license decision state
+    
+    Rebuilt whenever the license changes and swapped in with a single
+    attribute assignment, so checks read it without locking.
+    """
+    valid: bool = False
+    feature_bits: int = 0
+    expires_at: float = 0.0
+    max_users: int = 1
+    
+    @classmethod
+    def from_license_info(cls, license_info: Optional[LicenseInfo]) -> 'LicenseSnapshot':
+        if not license_info or not license_info.valid:
+            return cls()
+        
+        return cls(
+            valid=True,
+            feature_bits=_feature_mask(license_info.features),
+            expires_at=license_info.expiry_date.timestamp(),
+            max_users=license_info.max_users
+        )
+    
+    def allows(self, feature: str = None) -> bool:
+        """Whether the license is valid, unexpired and includes the feature"""
+        if not self.valid or time.time() >= self.expires_at:
+            return False
+        if feature is None:
+            return True
+        
+        bit = FEATURE_BITS.get(feature)
+        return bit is not None and bool(self.feature_bits & bit)
+
 class LicenseManager:
     """Enterprise license management system"""
     
@@ -40,15 +97,39 @@ class LicenseManager:
         self.local_cache_path = Path(local_cache_path)
         self.local_cache = {}
         self.validation_interval = 3600  # 1 hour
-        self.encryption_key = self._get_encryption_key()
         self.license_info: Optional[LicenseInfo] = None
         
-        # Load cached license data
-        self._load_cache()
+        # Key derivation and cache decryption are deferred to first use
+        self._encryption_key: Optional[bytes] = None
+        self._key_lock = threading.Lock()
+        self._cache_loaded = False
         
-        # Start background validation thread
+        # Encrypted form of each cache entry as last written, by license key
+        self._encrypted_cache: Dict[str, Tuple[str, str]] = {}
+        
+        # Start periodic validation on the shared event loop
+        self._validation_task = None
         self._start_validation_thread()
     
+    @property
+    def license_info(self) -> Optional[LicenseInfo]:
+        return self._license_info
+    
+    @license_info.setter
+    def license_info(self, license_info: Optional[LicenseInfo]):
+        # Assign a new LicenseInfo rather than mutating it, so the snapshot follows
+        self._license_info = license_info
+        self.snapshot = LicenseSnapshot.from_license_info(license_info)
+    
+    @property
+    def encryption_key(self) -> bytes:
+        """Cache encryption key, derived on first use"""
+        if self._encryption_key is None:
+            with self._key_lock:
+                if self._encryption_key is None:
+                    self._encryption_key = self._get_encryption_key()
+        return self._encryption_key
+    
     def _get_encryption_key(self) -> bytes:
         """Generate encryption key from machine-specific data"""
         # Use machine-specific data for key derivation
@@ -96,7 +177,11 @@ class LicenseManager:
         return f.decrypt(encrypted_data.encode()).decode()
     
     def _load_cache(self):
-        """Load license cache from local storage"""
+        """Load license cache from local storage, once"""
+        if self._cache_loaded:
+            return
+        self._cache_loaded = True
+        
         try:
             if self.local_cache_path.exists():
                 with open(self.local_cache_path, 'r') as f:
@@ -105,8 +190,9 @@ class LicenseManager:
                 # Decrypt cache data
                 for key, encrypted_value in encrypted_cache.items():
                     try:
-                        decrypted_value = self._decrypt_data(encrypted_value)
-                        self.local_cache[key] = json.loads(decrypted_value)
+                        value = json.loads(self._decrypt_data(encrypted_value))
+                        self.local_cache[key] = value
+                        self._encrypted_cache[key] = (self._cache_fingerprint(value), encrypted_value)
                     except Exception:
                         # Skip corrupted cache entries
                         continue
@@ -114,29 +200,55 @@ class LicenseManager:
             print(f"Warning: Could not load license cache: {e}")
     
     def _save_cache(self):
-        """Save license cache to local storage"""
+        """
+        Save license cache to local storage
+        
+        Only entries whose license fields changed are re-encrypted, and the
+        file is not rewritten when nothing changed. A new last_validated
+        alone does not count as a change, so the stored timestamp is the
+        one from the last write.
+        """
         try:
-            # Ensure directory exists
-            self.local_cache_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Encrypt cache data
             encrypted_cache = {}
             for key, value in self.local_cache.items():
-                json_value = json.dumps(value, default=str)
-                encrypted_cache[key] = self._encrypt_data(json_value)
+                fingerprint = self._cache_fingerprint(value)
+                previous = self._encrypted_cache.get(key)
+                if previous and previous[0] == fingerprint:
+                    encrypted_cache[key] = previous
+                else:
+                    encrypted_cache[key] = (fingerprint, self._encrypt_data(json.dumps(value, default=str)))
+            
+            if encrypted_cache == self._encrypted_cache and self.local_cache_path.exists():
+                return
+            
+            # Ensure directory exists
+            self.local_cache_path.parent.mkdir(parents=True, exist_ok=True)
             
             with open(self.local_cache_path, 'w') as f:
-                json.dump(encrypted_cache, f)
+                json.dump({key: token for key, (_, token) in encrypted_cache.items()}, f)
+            
+            self._encrypted_cache = encrypted_cache
         except Exception as e:
             print(f"Warning: Could not save license cache: {e}")
     
+    def _cache_fingerprint(self, value: Dict) -> str:
+        """Serialized cache entry without its volatile fields"""
+        stable = {k: v for k, v in value.items() if k not in VOLATILE_CACHE_FIELDS}
+        return json.dumps(stable, default=str, sort_keys=True)
+    
     async def validate_license(self, license_key: str) -> LicenseInfo:
         """Validate license with license server"""
+        self._load_cache()
+        cached_license = None
+        
         try:
             # Check local cache first
             cached_license = self.local_cache.get(license_key)
             if cached_license and self._is_cache_valid(cached_license):
-                return self._dict_to_license_info(cached_license)
+                license_info = self._dict_to_license_info(cached_license)
+                if license_info != self.license_info:
+                    self.license_info = license_info
+                return license_info
             
             # Validate with license server
             response = await self._check_license_server(license_key)
@@ -154,8 +266,8 @@ class LicenseManager:
                     last_validated=datetime.datetime.now()
                 )
                 
-                # Cache valid license
-                self.local_cache[license_key] = asdict(license_info)
+                # Cache valid license, in the same form it is loaded back in
+                self.local_cache[license_key] = json.loads(json.dumps(asdict(license_info), default=str))
                 self._save_cache()
                 
                 self.license_info = license_info
@@ -188,11 +300,14 @@ class LicenseManager:
                 "signature": signature
             }
             
-            response = requests.post(
+            # requests is blocking; keep it off the event loop
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, functools.partial(
+                requests.post,
                 f"{self.license_server_url}/validate",
                 json=data,
                 timeout=10
-            )
+            ))
             
             if response.status_code == 200:
                 return response.json()
@@ -239,27 +354,25 @@ class LicenseManager:
         )
     
     def _start_validation_thread(self):
-        """Start background thread for periodic license validation"""
-        def validation_worker():
-            while True:
-                try:
-                    if self.license_info:
-                        # Re-validate current license
-                        import asyncio
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        loop.run_until_complete(
-                            self.validate_license(self.license_info.license_key)
-                        )
-                        loop.close()
-                except Exception as e:
-                    print(f"Background license validation failed: {e}")
-                
-                # Wait for next validation cycle
-                time.sleep(self.validation_interval)
-        
-        thread = threading.Thread(target=validation_worker, daemon=True)
-        thread.start()
+        """Schedule periodic license validation on the shared event loop"""
+        if self._validation_task is None or self._validation_task.done():
+            self._validation_task = get_async_bridge().submit(self._validation_loop())
+    
+    async def _validation_loop(self):
+        """Re-validate the current license once per validation interval"""
+        while True:
+            try:
+                if self.license_info:
+                    await self.validate_license(self.license_info.license_key)
+            except Exception as e:
+                print(f"Background license validation failed: {e}")
+            
+            # Wait for next validation cycle
+            await asyncio.sleep(self.validation_interval)
+    
+    def validate_license_sync(self, license_key: str, timeout: Optional[float] = None) -> LicenseInfo:
+        """Validate a license from synchronous code, on the shared event loop"""
+        return get_async_bridge().run(self.validate_license(license_key), timeout)
     
     def get_license_info(self) -> Optional[LicenseInfo]:
         """Get current license information"""
@@ -267,17 +380,12 @@ class LicenseManager:
     
     def is_feature_enabled(self, feature: str) -> bool:
         """Check if a specific feature is enabled"""
-        if not self.license_info or not self.license_info.valid:
-            return False
-        
-        return feature in self.license_info.features
+        return self.snapshot.allows(feature)
     
     def get_max_users(self) -> int:
         """Get maximum allowed users"""
-        if not self.license_info or not self.license_info.valid:
-            return 1  # Default to single user
-        
-        return self.license_info.max_users
+        # Defaults to single user without a valid license
+        return self.snapshot.max_users
     
     def check_user_limit(self, current_users: int) -> bool:
         """Check if current user count is within license limit"""
@@ -339,12 +447,12 @@ def require_license(feature: str = None):
     """Decorator to require valid license for function execution"""
     def decorator(func):
         def wrapper(*args, **kwargs):
-            mgr = get_license_manager()
+            snapshot = get_license_manager().snapshot
             
-            if not mgr.license_info or not mgr.license_info.valid:
+            if not snapshot.allows():
                 raise Exception("Valid license required")
             
-            if feature and not mgr.is_feature_enabled(feature):
+            if feature and not snapshot.allows(feature):
                 raise Exception(f"Feature '{feature}' not enabled in current license")
             
             return func(*args, **kwargs)
@@ -363,8 +471,7 @@ if __name__ == "__main__":
     test_license = "CYBERROTATE-ENT-2024-SAMPLE-LICENSE-KEY"
     
     try:
-        import asyncio
-        license_info = asyncio.run(mgr.validate_license(test_license))
+        license_info = mgr.validate_license_sync(test_license)
         print(f"License validated: {license_info}")
         print(f"License status: {mgr.get_license_status()}")
     except Exception as e:
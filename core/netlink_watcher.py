@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Netlink Watcher - Link, address and route change notifications on Linux
+
+Subscribes to rtnetlink multicast groups so interface churn (tunnels coming
+up or going down, addresses and routes changing) is reported as it
+happens, instead of being discovered by the next polling pass.
+"""
+
+import sys
+import time
+import socket
+import struct
+import logging
+import threading
+from typing import Callable, Optional, Set
+
+# rtnetlink multicast groups
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV4_ROUTE = 0x40
+RTMGRP_IPV6_IFADDR = 0x100
+RTMGRP_IPV6_ROUTE = 0x400
+
+# rtnetlink message types, mapped to the kind of change they report
+RTM_MESSAGE_KINDS = {
+    16: 'link',      # RTM_NEWLINK
+    17: 'link',      # RTM_DELLINK
+    20: 'address',   # RTM_NEWADDR
+    21: 'address',   # RTM_DELADDR
+    24: 'route',     # RTM_NEWROUTE
+    25: 'route',     # RTM_DELROUTE
+}
+
+NLMSG_HEADER = struct.Struct('=IHHII')
+
+def netlink_available() -> bool:
+    """Whether rtnetlink notifications can be used on this platform"""
+    return sys.platform.startswith('linux') and hasattr(socket, 'AF_NETLINK')
+
+class NetlinkWatcher:
+    """Report rtnetlink change notifications to a callback"""
+    
+    def __init__(self, logger: logging.Logger, callback: Callable[[Set[str]], None],
+                 debounce: float = 0.2):
+        """
+        Args:
+            logger: Logger instance
+            callback: Called with the set of change kinds ('link',
+                'address', 'route') seen in a burst of notifications
+            debounce: Seconds to collect related notifications before
+                calling back, since a tunnel coming up emits several
+        """
+        self.logger = logger
+        self.callback = callback
+        self.debounce = debounce
+        self.sock: Optional[socket.socket] = None
+        self.thread = None
+        self.running = False
+    
+    def start(self) -> bool:
+        """Open the netlink socket and start listening"""
+        if not netlink_available():
+            return False
+        
+        try:
+            self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            self.sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR |
+                               RTMGRP_IPV4_ROUTE | RTMGRP_IPV6_ROUTE))
+            
+            # A receive timeout lets stop() take effect without a notification.
+            # Set it before the thread starts, as stop() may close the socket
+            # before the thread first runs.
+            self.sock.settimeout(1.0)
+        except OSError as e:
+            self.logger.debug(f"rtnetlink unavailable, falling back to polling: {e}")
+            self.sock = None
+            return False
+        
+        self.running = True
+        self.thread = threading.Thread(target=self._listen_loop, args=(self.sock,), daemon=True)
+        self.thread.start()
+        return True
+    
+    def stop(self):
+        """Stop listening"""
+        self.running = False
+        
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+        
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
+    
+    def _listen_loop(self, sock: socket.socket):
+        """Collect notifications and report them in debounced batches"""
+        while self.running:
+            try:
+                kinds = self._parse(sock.recv(65536))
+                if not kinds:
+                    continue
+                
+                # Gather the rest of the burst
+                deadline = time.time() + self.debounce
+                sock.settimeout(self.debounce)
+                try:
+                    while time.time() < deadline:
+                        kinds |= self._parse(sock.recv(65536))
+                except socket.timeout:
+                    pass
+                finally:
+                    sock.settimeout(1.0)
+                
+                self.callback(kinds)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                if not self.running:
+                    break
+                
+                # The kernel dropped notifications (ENOBUFS), so anything
+                # may have changed
+                self.logger.debug(f"rtnetlink receive error: {e}")
+                self.callback({'link', 'address', 'route'})
+            except Exception as e:
+                self.logger.error(f"Error handling rtnetlink notification: {e}")
+    
+    def _parse(self, data: bytes) -> Set[str]:
+        """Extract the change kinds from a buffer of netlink messages"""
+        kinds = set()
+        offset = 0
+        
+        while offset + NLMSG_HEADER.size <= len(data):
+            length, msg_type, _, _, _ = NLMSG_HEADER.unpack_from(data, offset)
+            if length < NLMSG_HEADER.size:
+                break
+            
+            kind = RTM_MESSAGE_KINDS.get(msg_type)
+            if kind:
+                kinds.add(kind)
+            
+            # Messages are padded to 4 byte boundaries
+            offset += (length + 3) & ~3
+        
+        return kinds
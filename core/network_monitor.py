@@ -14,6 +14,10 @@ from dataclasses import dataclass
 import threading
 from collections import defaultdict
 
+from core.netlink_watcher import NetlinkWatcher
+from core.bandwidth_series import BandwidthSeries, to_mbps
+from core.proc_connections import ProcConnectionTable, proc_net_available
+
 @dataclass
 class NetworkInterface:
     """Network interface information"""
@@ -59,20 +63,37 @@ class NetworkMonitor:
         self.monitoring = False
         self.monitor_thread = None
         
+        # Configuration
+        self.monitor_interval = 5.0  # seconds
+        self.max_history_entries = 720  # one hour at the default interval
+        
         # Statistics
-        self.stats_history = defaultdict(list)
+        self.stats_history: Dict[str, BandwidthSeries] = {}
         self.last_stats_time = time.time()
+        self._stats_lock = threading.Lock()
         
-        # Configuration
-        self.monitor_interval = 5.0  # seconds
-        self.max_history_entries = 100
+        # Socket table read straight from /proc/net on Linux
+        self.proc_table = ProcConnectionTable(logger) if proc_net_available() else None
+        self._connection_index = {}
+        self.connection_changes = {'opened': [], 'closed': [], 'timestamp': None}
+        
+        # Link/address/route change notifications
+        self.netlink_watcher = None
+        self._change_event = threading.Event()
+        self._pending_changes = set()
+        self._change_lock = threading.Lock()
+        self._change_listeners = []
         
         self.logger.info("Network Monitor initialized")
     
-    def get_network_interfaces(self) -> Dict[str, NetworkInterface]:
+    def get_network_interfaces(self, counters: Optional[Dict[str, Any]] = None) -> Dict[str, NetworkInterface]:
         """Get all network interfaces"""
         interfaces = {}
         
+        # Read counters once for all interfaces
+        if counters is None:
+            counters = self._read_counters()
+        
         try:
             # Get interface names
             interface_names = netifaces.interfaces()
@@ -93,11 +114,11 @@ class NetworkMonitor:
                     mac_address = mac_info.get('addr', '')
                     
                     # Interface status
-                    is_up = self._is_interface_up(name)
+                    is_up = self._is_interface_up(name, counters)
                     is_loopback = name.startswith('lo') or name == 'Loopback'
                     
                     # Network statistics
-                    stats = self._get_interface_stats(name)
+                    stats = self._get_interface_stats(name, counters)
                     
                     interface = NetworkInterface(
                         name=name,
@@ -126,19 +147,27 @@ class NetworkMonitor:
             self.logger.error(f"Error getting network interfaces: {e}")
             return {}
     
-    def _is_interface_up(self, interface_name: str) -> bool:
+    def _read_counters(self) -> Dict[str, Any]:
+        """Read I/O counters for all interfaces in one call"""
+        try:
+            return psutil.net_io_counters(pernic=True)
+        except Exception as e:
+            self.logger.debug(f"Error reading interface counters: {e}")
+            return {}
+    
+    def _is_interface_up(self, interface_name: str, counters: Optional[Dict[str, Any]] = None) -> bool:
         """Check if network interface is up"""
         try:
             # Try to get interface statistics
-            stats = psutil.net_io_counters(pernic=True)
+            stats = counters if counters is not None else psutil.net_io_counters(pernic=True)
             return interface_name in stats
         except Exception:
             return False
     
-    def _get_interface_stats(self, interface_name: str) -> Dict[str, int]:
+    def _get_interface_stats(self, interface_name: str, counters: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
         """Get interface statistics"""
         try:
-            stats = psutil.net_io_counters(pernic=True)
+            stats = counters if counters is not None else psutil.net_io_counters(pernic=True)
             if interface_name in stats:
                 stat = stats[interface_name]
                 return {
@@ -158,45 +187,24 @@ class NetworkMonitor:
     
     def get_active_connections(self) -> List[ConnectionInfo]:
         """Get active network connections"""
-        connections = []
-        
         try:
-            # Get all connections
-            conns = psutil.net_connections(kind='inet')
-            
-            for conn in conns:
-                try:
-                    # Get process information
-                    process_name = 'Unknown'
-                    if conn.pid:
-                        try:
-                            process = psutil.Process(conn.pid)
-                            process_name = process.name()
-                        except (psutil.NoSuchProcess, psutil.AccessDenied):
-                            pass
-                    
-                    # Parse addresses
-                    local_addr = conn.laddr.ip if conn.laddr else ''
-                    local_port = conn.laddr.port if conn.laddr else 0
-                    remote_addr = conn.raddr.ip if conn.raddr else ''
-                    remote_port = conn.raddr.port if conn.raddr else 0
-                    
-                    connection = ConnectionInfo(
-                        local_address=local_addr,
-                        local_port=local_port,
-                        remote_address=remote_addr,
-                        remote_port=remote_port,
-                        status=conn.status,
-                        pid=conn.pid or 0,
+            if self.proc_table:
+                connections = [
+                    ConnectionInfo(
+                        local_address=sock.local_address,
+                        local_port=sock.local_port,
+                        remote_address=sock.remote_address,
+                        remote_port=sock.remote_port,
+                        status=sock.status,
+                        pid=pid,
                         process_name=process_name
                     )
-                    
-                    connections.append(connection)
-                    
-                except Exception as e:
-                    self.logger.debug(f"Error processing connection: {e}")
-                    continue
+                    for sock, pid, process_name in self.proc_table.snapshot()
+                ]
+            else:
+                connections = self._get_connections_psutil()
             
+            self._record_connection_changes(connections)
             self.connections = connections
             return connections
             
@@ -204,6 +212,78 @@ class NetworkMonitor:
             self.logger.error(f"Error getting active connections: {e}")
             return []
     
+    def _get_connections_psutil(self) -> List[ConnectionInfo]:
+        """Get connections through psutil, resolving each pid once"""
+        connections = []
+        process_names = {}
+        
+        # Get all connections
+        conns = psutil.net_connections(kind='inet')
+        
+        for conn in conns:
+            try:
+                # Get process information
+                process_name = process_names.get(conn.pid, 'Unknown')
+                if conn.pid and conn.pid not in process_names:
+                    try:
+                        process = psutil.Process(conn.pid)
+                        process_name = process.name()
+                    except (psutil.NoSuchProcess, psutil.AccessDenied):
+                        pass
+                    process_names[conn.pid] = process_name
+                    
+                # Parse addresses
+                local_addr = conn.laddr.ip if conn.laddr else ''
+                local_port = conn.laddr.port if conn.laddr else 0
+                remote_addr = conn.raddr.ip if conn.raddr else ''
+                remote_port = conn.raddr.port if conn.raddr else 0
+                
+                connection = ConnectionInfo(
+                    local_address=local_addr,
+                    local_port=local_port,
+                    remote_address=remote_addr,
+                    remote_port=remote_port,
+                    status=conn.status,
+                    pid=conn.pid or 0,
+                    process_name=process_name
+                )
+                
+                connections.append(connection)
+                
+            except Exception as e:
+                self.logger.debug(f"Error processing connection: {e}")
+                continue
+        
+        return connections
+    
+    def _record_connection_changes(self, connections: List[ConnectionInfo]):
+        """Diff a connection snapshot against the previous one"""
+        # Owner is left out of the key: a new socket may only be attributed
+        # to its process on a later snapshot
+        index = {
+            (conn.local_address, conn.local_port, conn.remote_address, conn.remote_port): conn
+            for conn in connections
+        }
+        
+        self.connection_changes = {
+            'opened': [conn for key, conn in index.items() if key not in self._connection_index],
+            'closed': [conn for key, conn in self._connection_index.items() if key not in index],
+            'timestamp': time.time()
+        }
+        self._connection_index = index
+    
+    def get_connection_changes(self, refresh: bool = True) -> Dict[str, Any]:
+        """
+        Connections opened and closed since the previous snapshot
+        
+        Args:
+            refresh: Take a new snapshot first; otherwise return the diff
+                recorded by the last snapshot (e.g. the monitoring loop's)
+        """
+        if refresh:
+            self.get_active_connections()
+        return self.connection_changes
+    
     def get_default_gateway(self) -> Optional[str]:
         """Get default gateway IP"""
         try:
@@ -280,45 +360,40 @@ class NetworkMonitor:
         
         return None
     
-    def monitor_bandwidth(self, interface_name: str = None) -> Dict[str, float]:
+    def sample_bandwidth(self, counters: Optional[Dict[str, Any]] = None):
+        """Record one bandwidth sample for every interface"""
+        if counters is None:
+            counters = self._read_counters()
+        
+        current_time = time.time()
+        
+        with self._stats_lock:
+            for name, stats in counters.items():
+                series = self.stats_history.get(name)
+                if series is None:
+                    series = self.stats_history[name] = BandwidthSeries(self.max_history_entries)
+                series.append(current_time, stats.bytes_sent, stats.bytes_recv)
+            
+            self.last_stats_time = current_time
+    
+    def monitor_bandwidth(self, interface_name: str = None, counters: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
         """Monitor bandwidth usage"""
         try:
-            current_time = time.time()
-            current_stats = psutil.net_io_counters(pernic=True)
+            # The monitoring loop samples every tick; otherwise sample now
+            if counters is not None or not self.monitoring:
+                self.sample_bandwidth(counters)
             
             bandwidth_info = {}
             
-            if interface_name:
-                # Monitor specific interface
-                if interface_name in current_stats:
-                    stats = current_stats[interface_name]
-                    
-                    # Calculate bandwidth if we have previous data
-                    if interface_name in self.stats_history:
-                        prev_stats = self.stats_history[interface_name][-1]
-                        time_diff = current_time - prev_stats['timestamp']
-                        
-                        if time_diff > 0:
-                            bytes_sent_diff = stats.bytes_sent - prev_stats['bytes_sent']
-                            bytes_recv_diff = stats.bytes_recv - prev_stats['bytes_recv']
-                            
-                            bandwidth_info = {
-                                'upload_speed': bytes_sent_diff / time_diff,  # bytes per second
-                                'download_speed': bytes_recv_diff / time_diff,
-                                'upload_speed_mbps': (bytes_sent_diff / time_diff) * 8 / 1000000,  # Mbps
-                                'download_speed_mbps': (bytes_recv_diff / time_diff) * 8 / 1000000,
-                            }
-                    
-                    # Store current stats
-                    self.stats_history[interface_name].append({
-                        'timestamp': current_time,
-                        'bytes_sent': stats.bytes_sent,
-                        'bytes_recv': stats.bytes_recv
-                    })
-                    
-                    # Limit history size
-                    if len(self.stats_history[interface_name]) > self.max_history_entries:
-                        self.stats_history[interface_name].pop(0)
+            if interface_name and interface_name in self.stats_history:
+                rates = self.stats_history[interface_name].latest()
+                if rates:
+                    bandwidth_info = {
+                        'upload_speed': rates['upload_speed'],  # bytes per second
+                        'download_speed': rates['download_speed'],
+                        'upload_speed_mbps': to_mbps(rates['upload_speed']),
+                        'download_speed_mbps': to_mbps(rates['download_speed']),
+                    }
             
             return bandwidth_info
             
@@ -326,44 +401,156 @@ class NetworkMonitor:
             self.logger.error(f"Error monitoring bandwidth: {e}")
             return {}
     
+    def get_bandwidth_stats(self, interface_name: Optional[str] = None,
+                            window: float = 60.0) -> Dict[str, Dict[str, Any]]:
+        """
+        Windowed average, EWMA and percentile bandwidth per interface
+        
+        Args:
+            interface_name: Single interface to report, or None for all
+            window: Window in seconds for averages and percentiles
+            
+        Returns:
+            Dict mapping interface name to its summary, rates in bytes/s
+        """
+        if not self.monitoring:
+            self.sample_bandwidth()
+        
+        with self._stats_lock:
+            names = [interface_name] if interface_name else list(self.stats_history)
+            return {
+                name: self.stats_history[name].summary(window)
+                for name in names if name in self.stats_history
+            }
+    
+    def get_bandwidth_series(self, interface_name: str, window: Optional[float] = None) -> List[Dict[str, float]]:
+        """Recorded bandwidth samples for charting, oldest first"""
+        with self._stats_lock:
+            series = self.stats_history.get(interface_name)
+            return series.samples(window) if series else []
+    
     def start_monitoring(self):
         """Start continuous network monitoring"""
         if self.monitoring:
             return
         
         self.monitoring = True
+        
+        # Interface changes are pushed by rtnetlink on Linux; elsewhere
+        # they are picked up by re-enumerating on every tick
+        self.netlink_watcher = NetlinkWatcher(self.logger, self._on_network_change)
+        if not self.netlink_watcher.start():
+            self.netlink_watcher = None
+        
         self.monitor_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
         self.monitor_thread.start()
         
-        self.logger.info("Network monitoring started")
+        mode = "event-driven" if self.netlink_watcher else "polling"
+        self.logger.info(f"Network monitoring started ({mode})")
     
     def stop_monitoring(self):
         """Stop network monitoring"""
         self.monitoring = False
+        self._change_event.set()
+        
+        if self.netlink_watcher:
+            self.netlink_watcher.stop()
+            self.netlink_watcher = None
+        
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5)
         
         self.logger.info("Network monitoring stopped")
     
+    def add_change_listener(self, callback):
+        """Register a callback for interface, address and route changes"""
+        self._change_listeners.append(callback)
+    
+    def remove_change_listener(self, callback):
+        """Unregister a change callback"""
+        if callback in self._change_listeners:
+            self._change_listeners.remove(callback)
+    
+    def _on_network_change(self, kinds):
+        """Wake the monitoring loop when rtnetlink reports a change"""
+        with self._change_lock:
+            self._pending_changes |= kinds
+        self._change_event.set()
+    
+    def _refresh_interfaces(self, counters: Dict[str, Any]):
+        """Re-enumerate interfaces and tell listeners what changed"""
+        previous = set(self.interfaces)
+        current = set(self.get_network_interfaces(counters))
+        
+        with self._change_lock:
+            kinds = self._pending_changes
+            self._pending_changes = set()
+        
+        # The first enumeration is a baseline, not a change
+        if not previous:
+            return
+        
+        added = sorted(current - previous)
+        removed = sorted(previous - current)
+        
+        for name in added:
+            self.logger.info(f"Network interface {name} appeared")
+        for name in removed:
+            self.logger.info(f"Network interface {name} went away")
+        
+        if not (kinds or added or removed):
+            return
+        
+        change = {
+            'kinds': sorted(kinds or {'link'}),
+            'added': added,
+            'removed': removed,
+            'timestamp': time.time()
+        }
+        
+        for listener in list(self._change_listeners):
+            try:
+                listener(change)
+            except Exception as e:
+                self.logger.error(f"Error in network change listener: {e}")
+    
+    def _update_interface_counters(self, counters: Dict[str, Any]):
+        """Refresh byte and packet counters of known interfaces"""
+        for name, interface in self.interfaces.items():
+            stat = counters.get(name)
+            if stat:
+                interface.bytes_sent = stat.bytes_sent
+                interface.bytes_recv = stat.bytes_recv
+                interface.packets_sent = stat.packets_sent
+                interface.packets_recv = stat.packets_recv
+    
     def _monitoring_loop(self):
         """Main monitoring loop"""
+        changed = True
+        
         while self.monitoring:
             try:
+                # One counters read per tick, shared by all interfaces
+                counters = self._read_counters()
+                
                 # Update interface information
-                self.get_network_interfaces()
+                if changed or not self.netlink_watcher:
+                    self._refresh_interfaces(counters)
+                else:
+                    self._update_interface_counters(counters)
                 
                 # Update connection information
                 self.get_active_connections()
                 
-                # Monitor bandwidth for all interfaces
-                for interface_name in self.interfaces:
-                    self.monitor_bandwidth(interface_name)
-                
-                time.sleep(self.monitor_interval)
+                # Sample bandwidth for all interfaces in one pass
+                self.sample_bandwidth(counters)
                 
             except Exception as e:
                 self.logger.error(f"Error in monitoring loop: {e}")
-                time.sleep(self.monitor_interval)
+            
+            # Sleep until the next tick, or until rtnetlink reports a change
+            changed = self._change_event.wait(self.monitor_interval)
+            self._change_event.clear()
     
     def get_network_summary(self) -> Dict[str, Any]:
         """Get network summary information"""
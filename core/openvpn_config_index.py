@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+OpenVPN Config Index - Persistent index of parsed OpenVPN configurations
+
+Parsed server entries are stored per file together with the file's mtime
+and size, so startup only re-reads files that were added or changed. The
+config directory can be watched (watchdog when installed, polling
+otherwise) to pick up provider config drops without a restart.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+    FileSystemEventHandler = object
+
+INDEX_VERSION = 1
+
+class _ConfigDirHandler(FileSystemEventHandler):
+    """Flag config directory changes for the index watcher"""
+    
+    def __init__(self, index: 'OpenVPNConfigIndex'):
+        super().__init__()
+        self.index = index
+    
+    def on_any_event(self, event):
+        for path in (getattr(event, 'src_path', ''), getattr(event, 'dest_path', '')):
+            if path and self.index.is_config_file(os.path.basename(path)):
+                self.index._changed.set()
+                return
+
+class OpenVPNConfigIndex:
+    """Index of parsed config files keyed by path, mtime and size"""
+    
+    def __init__(self, config_dir: str, logger: logging.Logger,
+                 parser: Callable[[str], List[Dict[str, Any]]],
+                 index_path: Optional[str] = None):
+        """
+        Args:
+            config_dir: Directory holding .ovpn files and servers.json
+            logger: Logger instance
+            parser: Parses one file into a list of server entries
+            index_path: Where to persist the index
+        """
+        self.config_dir = os.path.abspath(config_dir)
+        self.logger = logger
+        self.parser = parser
+        self.index_path = index_path or os.path.join(
+            os.path.dirname(__file__), '..', 'data', 'openvpn_config_index.json'
+        )
+        
+        self._entries: Dict[str, Dict[str, Any]] = self._load_index()
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._watch_thread = None
+        self._watching = False
+        self._observer = None
+    
+    @staticmethod
+    def is_config_file(filename: str) -> bool:
+        """Whether a file in the config directory contributes servers"""
+        return filename.endswith('.ovpn') or filename == 'servers.json'
+    
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Load the persisted index, ignoring it if stale or unreadable"""
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+            
+            if data.get('version') != INDEX_VERSION or data.get('config_dir') != self.config_dir:
+                return {}
+            return data.get('files', {})
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_index(self):
+        """Persist the index atomically"""
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'version': INDEX_VERSION,
+                    'config_dir': self.config_dir,
+                    'files': self._entries
+                }, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            self.logger.debug(f"Could not save OpenVPN config index: {e}")
+    
+    def refresh(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Bring the index up to date with the config directory
+        
+        Returns:
+            Tuple of (server entries, whether anything changed)
+        """
+        with self._lock:
+            seen = {}
+            parsed = 0
+            
+            try:
+                with os.scandir(self.config_dir) as it:
+                    for entry in it:
+                        if not self.is_config_file(entry.name) or not entry.is_file():
+                            continue
+                        
+                        stat = entry.stat()
+                        cached = self._entries.get(entry.name)
+                        
+                        if cached and cached['mtime'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+                            seen[entry.name] = cached
+                            continue
+                        
+                        seen[entry.name] = {
+                            'mtime': stat.st_mtime_ns,
+                            'size': stat.st_size,
+                            'configs': self.parser(entry.path)
+                        }
+                        parsed += 1
+            except OSError as e:
+                self.logger.error(f"Error scanning OpenVPN config directory: {e}")
+                return self._collect(self._entries), False
+            
+            changed = parsed > 0 or seen.keys() != self._entries.keys()
+            self._entries = seen
+            
+            if changed:
+                self._save_index()
+                self.logger.debug(f"OpenVPN config index updated ({parsed} files parsed, {len(seen)} indexed)")
+            
+            return self._collect(seen), changed
+    
+    def _collect(self, entries: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Flatten entries in a stable order: .ovpn files first, then servers.json"""
+        names = sorted(name for name in entries if name != 'servers.json')
+        if 'servers.json' in entries:
+            names.append('servers.json')
+        
+        configs = []
+        for name in names:
+            configs.extend(entries[name]['configs'])
+        return configs
+    
+    def watch(self, callback: Callable[[List[Dict[str, Any]]], None], interval: float = 30.0):
+        """
+        Call `callback` with the new server entries whenever the directory changes
+        
+        Uses watchdog notifications when available, checked every `interval`
+        seconds as a fallback.
+        """
+        if self._watching:
+            return
+        
+        self._watching = True
+        
+        if WATCHDOG_AVAILABLE:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_ConfigDirHandler(self), self.config_dir, recursive=False)
+                self._observer.start()
+            except Exception as e:
+                self.logger.debug(f"watchdog unavailable for {self.config_dir}, polling instead: {e}")
+                self._observer = None
+        
+        def watch_loop():
+            while self._watching:
+                self._changed.wait(interval)
+                if not self._watching:
+                    break
+                
+                if self._changed.is_set():
+                    # Let bulk copies settle before re-scanning
+                    time.sleep(1)
+                    self._changed.clear()
+                
+                try:
+                    configs, changed = self.refresh()
+                    if changed:
+                        callback(configs)
+                except Exception as e:
+                    self.logger.error(f"Error refreshing OpenVPN config index: {e}")
+        
+        self._watch_thread = threading.Thread(target=watch_loop, daemon=True)
+        self._watch_thread.start()
+    
+    def stop(self):
+        """Stop watching the config directory"""
+        self._watching = False
+        self._changed.set()
+        
+        if self._observer:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        
+        if self._watch_thread:
+            self._watch_thread.join(timeout=5)
+            self._watch_thread = None
+        
+        self._changed.clear()
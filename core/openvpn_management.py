@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+OpenVPN Management Interface - Event-driven connection state for OpenVPN
+
+Each tunnel is started with --management on its own local endpoint. The
+client here attaches to it and consumes >STATE, >BYTECOUNT, >LOG and >FATAL
+notifications on a background thread, so connection completion, failures
+and traffic counters are known as soon as OpenVPN reports them.
+"""
+
+import os
+import sys
+import time
+import socket
+import shutil
+import logging
+import tempfile
+import threading
+from typing import List, Optional, Dict, Any, Callable
+
+# OpenVPN states that mean the tunnel will not come up
+FAILED_STATES = {'EXITING'}
+
+class OpenVPNManagementClient:
+    """Client for a single OpenVPN process's management interface"""
+    
+    def __init__(self, logger: logging.Logger, name: str = "openvpn"):
+        """Allocate a management endpoint for a new OpenVPN process"""
+        self.logger = logger
+        self.name = name
+        self.sock: Optional[socket.socket] = None
+        self.reader_thread = None
+        
+        # Latest state reported by OpenVPN
+        self.state = 'INITIAL'
+        self.state_description = ''
+        self.local_ip = None
+        self.remote_ip = None
+        self.remote_port = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.last_error = None
+        self.state_changed_at = time.time()
+        
+        self._connected = False
+        self._finished = False
+        self._state_changed = threading.Condition()
+        self._lock = threading.Lock()
+        
+        # Unix sockets keep the interface private to this user; Windows
+        # OpenVPN only supports TCP management endpoints
+        self._socket_dir = None
+        if hasattr(socket, 'AF_UNIX') and sys.platform != 'win32':
+            self._socket_dir = tempfile.mkdtemp(prefix='cyberrotate-ovpn-')
+            self.address = os.path.join(self._socket_dir, 'management.sock')
+        else:
+            self.address = ('127.0.0.1', self._find_free_port())
+    
+    def _find_free_port(self) -> int:
+        """Find a free local TCP port for the management interface"""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(('127.0.0.1', 0))
+            return s.getsockname()[1]
+    
+    def get_openvpn_args(self) -> List[str]:
+        """Command line arguments that enable this management endpoint"""
+        if isinstance(self.address, str):
+            return ['--management', self.address, 'unix']
+        return ['--management', self.address[0], str(self.address[1])]
+    
+    def attach(self, timeout: float = 10.0, is_alive: Optional[Callable[[], bool]] = None) -> bool:
+        """Connect to the management interface once OpenVPN is listening"""
+        deadline = time.time() + timeout
+        
+        while time.time() < deadline:
+            # Stop retrying if the OpenVPN process has already exited
+            if is_alive and not is_alive():
+                break
+            
+            if isinstance(self.address, str):
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            else:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            
+            try:
+                sock.settimeout(2)
+                sock.connect(self.address)
+                sock.settimeout(None)
+                self.sock = sock
+                break
+            except OSError:
+                sock.close()
+                time.sleep(0.1)
+        
+        if not self.sock:
+            self.logger.debug(f"Could not attach to management interface of {self.name}")
+            return False
+        
+        self.reader_thread = threading.Thread(target=self._read_loop, daemon=True)
+        self.reader_thread.start()
+        
+        # Subscribe to real-time notifications and fetch the current state,
+        # in case OpenVPN got ahead of us
+        self.send_command('state on')
+        self.send_command('bytecount 1')
+        self.send_command('log on')
+        self.send_command('state')
+        
+        return True
+    
+    def send_command(self, command: str) -> bool:
+        """Send a command to the management interface"""
+        if not self.sock:
+            return False
+        
+        try:
+            with self._lock:
+                self.sock.sendall(f"{command}\n".encode())
+            return True
+        except OSError as e:
+            self.logger.debug(f"Management command '{command}' failed for {self.name}: {e}")
+            return False
+    
+    def _read_loop(self):
+        """Consume management interface output until the socket closes"""
+        buffer = b''
+        
+        try:
+            while True:
+                data = self.sock.recv(4096)
+                if not data:
+                    break
+                
+                buffer += data
+                while b'\n' in buffer:
+                    line, buffer = buffer.split(b'\n', 1)
+                    self._handle_line(line.decode(errors='replace').rstrip('\r'))
+        except OSError:
+            pass
+        finally:
+            # Management socket closes when the OpenVPN process exits
+            if self.state != 'EXITING':
+                self._set_state('EXITING', 'management interface closed')
+    
+    def _handle_line(self, line: str):
+        """Dispatch one line of management interface output"""
+        if line.startswith('>STATE:'):
+            self._handle_state(line[len('>STATE:'):])
+        elif line.startswith('>BYTECOUNT:'):
+            try:
+                bytes_in, bytes_out = line[len('>BYTECOUNT:'):].split(',')[:2]
+                self.bytes_in = int(bytes_in)
+                self.bytes_out = int(bytes_out)
+            except ValueError:
+                pass
+        elif line.startswith('>LOG:'):
+            parts = line[len('>LOG:'):].split(',', 2)
+            message = parts[-1]
+            flags = parts[1] if len(parts) == 3 else ''
+            if 'F' in flags or 'N' in flags:
+                self.logger.warning(f"[{self.name}] {message}")
+            else:
+                self.logger.debug(f"[{self.name}] {message}")
+        elif line.startswith('>FATAL:'):
+            self.last_error = line[len('>FATAL:'):]
+            self.logger.error(f"[{self.name}] OpenVPN fatal error: {self.last_error}")
+            self._set_state('EXITING', self.last_error)
+        elif line.startswith('>PASSWORD:') and 'Verification Failed' in line:
+            self.last_error = 'authentication failed'
+            self._set_state('EXITING', self.last_error)
+        elif line and line[0].isdigit() and ',' in line:
+            # Reply to the one-shot 'state' command
+            self._handle_state(line)
+    
+    def _handle_state(self, payload: str):
+        """Parse a state record: time,state,description,local_ip,remote_ip,remote_port,..."""
+        fields = payload.split(',')
+        if len(fields) < 2:
+            return
+        
+        description = fields[2] if len(fields) > 2 else ''
+        if len(fields) > 3 and fields[3]:
+            self.local_ip = fields[3]
+        if len(fields) > 4 and fields[4]:
+            self.remote_ip = fields[4]
+        if len(fields) > 5 and fields[5]:
+            self.remote_port = fields[5]
+        
+        self._set_state(fields[1], description)
+    
+    def _set_state(self, state: str, description: str = ''):
+        """Record a state transition and wake waiters"""
+        if state != self.state:
+            self.logger.debug(f"[{self.name}] state {self.state} -> {state} {description}".rstrip())
+            self.state_changed_at = time.time()
+        
+        with self._state_changed:
+            self.state = state
+            self.state_description = description
+            self._connected = state == 'CONNECTED'
+            if state in FAILED_STATES:
+                self._finished = True
+            self._state_changed.notify_all()
+    
+    def wait_for_connected(self, timeout: float) -> bool:
+        """Block until OpenVPN reports CONNECTED, fails, or timeout expires"""
+        with self._state_changed:
+            self._state_changed.wait_for(lambda: self._connected or self._finished, timeout)
+            return self._connected
+    
+    def is_connected(self) -> bool:
+        """Whether OpenVPN currently reports the tunnel as connected"""
+        return self._connected
+    
+    def find_device(self) -> Optional[str]:
+        """Find the interface carrying this tunnel's local address"""
+        if not self.local_ip:
+            return None
+        
+        try:
+            import netifaces
+            for name in netifaces.interfaces():
+                for addr in netifaces.ifaddresses(name).get(netifaces.AF_INET, []):
+                    if addr.get('addr') == self.local_ip:
+                        return name
+        except Exception as e:
+            self.logger.debug(f"Could not resolve device for {self.local_ip}: {e}")
+        
+        return None
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get the latest reported tunnel status"""
+        return {
+            'state': self.state,
+            'description': self.state_description,
+            'local_ip': self.local_ip,
+            'remote_ip': self.remote_ip,
+            'remote_port': self.remote_port,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'state_changed_at': self.state_changed_at,
+            'last_error': self.last_error
+        }
+    
+    def close(self):
+        """Detach from the management interface and remove the socket"""
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+        
+        if self._socket_dir:
+            shutil.rmtree(self._socket_dir, ignore_errors=True)
+            self._socket_dir = None
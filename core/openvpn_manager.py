@@ -11,13 +11,19 @@ import sys
 import time
 import subprocess
 import json
-import random
+import socket
 import logging
+import threading
 from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 import psutil
 import netifaces
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
+
+from core.openvpn_management import OpenVPNManagementClient
+from core.latency_prober import LatencyProber
+from core.openvpn_config_index import OpenVPNConfigIndex
+from core.process_supervisor import SupervisedProcess, get_process_supervisor
 
 @dataclass
 class OpenVPNConfig:
@@ -34,6 +40,15 @@ class OpenVPNConfig:
     cert_file: Optional[str] = None
     key_file: Optional[str] = None
 
+@dataclass
+class StandbyTunnel:
+    """An established OpenVPN tunnel kept idle, off the default route"""
+    config: OpenVPNConfig
+    process: SupervisedProcess
+    management: OpenVPNManagementClient
+    device: str
+    established_at: float
+
 class OpenVPNManager:
     """
     OpenVPN Connection Manager
@@ -43,13 +58,33 @@ class OpenVPNManager:
     - Server selection and rotation
     - Connection monitoring and health checks
     - Configuration management
+    - Make-before-break rotation (new tunnel up before the old one goes down)
+    - Pre-warmed standby tunnels for near-instant rotation
     """
     
-    def __init__(self, logger: logging.Logger):
+    def __init__(self, logger: logging.Logger, make_before_break: bool = False,
+                 standby_pool_size: int = 0):
         """Initialize OpenVPN manager"""
         self.logger = logger
         self.current_process = None
         self.current_config = None
+        self.current_device = None
+        self.current_routes: List[List[str]] = []
+        self.current_management: Optional[OpenVPNManagementClient] = None
+        self.make_before_break = make_before_break
+        
+        # Standby tunnel pool
+        self.standby_pool_size = standby_pool_size
+        self.standby_tunnels: List[StandbyTunnel] = []
+        self.standby_refill_interval = 30
+        self._pool_lock = threading.Lock()
+        self._pool_refill_event = threading.Event()
+        self._pool_thread = None
+        self._pool_running = False
+        self._reserved_devices = set()
+        
+        # Handshake latency to each server, used to prefer nearby servers
+        self.latency_prober = LatencyProber(logger)
         self.available_configs = []
         self.connection_start_time = None
         self.connection_attempts = 0
@@ -58,6 +93,7 @@ class OpenVPNManager:
         # OpenVPN paths (will be detected automatically)
         self.openvpn_binary = self._find_openvpn_binary()
         self.config_dir = self._get_config_directory()
+        self.config_index = OpenVPNConfigIndex(self.config_dir, logger, self._parse_config_file)
         
         # Initialize available configurations
         self._load_available_configs()
@@ -112,39 +148,9 @@ class OpenVPNManager:
             self.logger.warning(f"OpenVPN config directory not found: {self.config_dir}")
             return
         
-        self.available_configs = []
-        
-        # Look for .ovpn files
-        for file in os.listdir(self.config_dir):
-            if file.endswith('.ovpn'):
-                config_path = os.path.join(self.config_dir, file)
-                config = self._parse_ovpn_file(config_path)
-                if config:
-                    self.available_configs.append(config)
-        
-        # Look for configuration JSON files
-        config_json_path = os.path.join(self.config_dir, 'servers.json')
-        if os.path.exists(config_json_path):
-            try:
-                with open(config_json_path, 'r') as f:
-                    servers_data = json.load(f)
-                    for server in servers_data.get('servers', []):
-                        config = OpenVPNConfig(
-                            name=server.get('name'),
-                            config_file=server.get('config_file'),
-                            country=server.get('country'),
-                            city=server.get('city'),
-                            server=server.get('server'),
-                            port=server.get('port'),
-                            protocol=server.get('protocol'),
-                            auth_file=server.get('auth_file'),
-                            ca_file=server.get('ca_file'),
-                            cert_file=server.get('cert_file'),
-                            key_file=server.get('key_file')
-                        )
-                        self.available_configs.append(config)
-            except Exception as e:
-                self.logger.error(f"Error loading servers.json: {e}")
+        # Only files added or changed since the last run are parsed
+        configs, _ = self.config_index.refresh()
+        self.available_configs = [OpenVPNConfig(**config) for config in configs]
         
         if not self.available_configs:
             self.logger.warning("No OpenVPN configurations found")
@@ -152,6 +158,45 @@ class OpenVPNManager:
         else:
             self.logger.info(f"Loaded {len(self.available_configs)} OpenVPN configurations")
     
+    def _parse_config_file(self, config_path: str) -> List[Dict[str, Any]]:
+        """Parse one file from the config directory into index entries"""
+        if os.path.basename(config_path) != 'servers.json':
+            config = self._parse_ovpn_file(config_path)
+            return [asdict(config)] if config else []
+        
+        configs = []
+        try:
+            with open(config_path, 'r') as f:
+                servers_data = json.load(f)
+                for server in servers_data.get('servers', []):
+                    config = OpenVPNConfig(
+                        name=server.get('name'),
+                        config_file=server.get('config_file'),
+                        country=server.get('country'),
+                        city=server.get('city'),
+                        server=server.get('server'),
+                        port=server.get('port'),
+                        protocol=server.get('protocol'),
+                        auth_file=server.get('auth_file'),
+                        ca_file=server.get('ca_file'),
+                        cert_file=server.get('cert_file'),
+                        key_file=server.get('key_file')
+                    )
+                    configs.append(asdict(config))
+        except Exception as e:
+            self.logger.error(f"Error loading servers.json: {e}")
+        
+        return configs
+    
+    def watch_configs(self, interval: float = 30.0):
+        """Reload configurations when files in the config directory change"""
+        self.config_index.watch(self._on_configs_changed, interval)
+    
+    def _on_configs_changed(self, configs: List[Dict[str, Any]]):
+        """Swap in configurations after a config directory change"""
+        self.available_configs = [OpenVPNConfig(**config) for config in configs]
+        self.logger.info(f"Reloaded {len(self.available_configs)} OpenVPN configurations")
+    
     def _parse_ovpn_file(self, config_path: str) -> Optional[OpenVPNConfig]:
         """Parse an .ovpn configuration file"""
         try:
@@ -264,20 +309,24 @@ verb 3
             if self.current_process.poll() is not None:
                 return False
             
+            # Management interface reports state without scanning interfaces
+            if self.current_management and self.current_management.sock:
+                return self.current_management.is_connected()
+            
             # Check for VPN interface
-            return self._check_vpn_interface()
+            return self._check_vpn_interface(self.current_device)
             
         except Exception as e:
             self.logger.error(f"Error checking connection status: {e}")
             return False
     
-    def _check_vpn_interface(self) -> bool:
+    def _check_vpn_interface(self, device: Optional[str] = None) -> bool:
         """Check if VPN network interface exists"""
         try:
             interfaces = netifaces.interfaces()
             
-            # Look for typical VPN interfaces
-            vpn_interfaces = ['tun0', 'tun1', 'tap0', 'tap1', 'ppp0']
+            # Look for the tunnel's own device, or typical VPN interfaces
+            vpn_interfaces = [device] if device else ['tun0', 'tun1', 'tap0', 'tap1', 'ppp0']
             for interface in vpn_interfaces:
                 if interface in interfaces:
                     # Check if interface has an IP address
@@ -294,12 +343,13 @@ verb 3
             self.logger.error(f"Error checking VPN interface: {e}")
             return False
     
-    def connect(self, config: Optional[OpenVPNConfig] = None) -> bool:
+    def connect(self, config: Optional[OpenVPNConfig] = None, country: Optional[str] = None) -> bool:
         """
         Connect to OpenVPN server
         
         Args:
-            config: Specific configuration to use, or None for random selection
+            config: Specific configuration to use, or None to pick a low-latency server
+            country: Only consider servers in this country when picking one
             
         Returns:
             bool: True if connection successful
@@ -318,75 +368,281 @@ verb 3
         
         # Select configuration
         if not config:
-            config = random.choice(self.available_configs)
+            config = self.select_server(country=country)
+            if not config:
+                self.logger.error(f"No OpenVPN servers available in {country}")
+                return False
         
         self.current_config = config
         self.connection_attempts += 1
         
         try:
-            # Build OpenVPN command
-            cmd = [self.openvpn_binary, '--config', config.config_file]
-            
-            # Add authentication if specified
-            if config.auth_file and os.path.exists(config.auth_file):
-                cmd.extend(['--auth-user-pass', config.auth_file])
-            
-            # Add additional options for better compatibility
-            cmd.extend([
-                '--verb', '3',
-                '--script-security', '2',
-                '--up-delay',
-                '--down-pre',
-                '--pull-filter', 'ignore', 'redirect-gateway',
-                '--route-method', 'exe',
-                '--route-delay', '2'
-            ])
-            
             self.logger.info(f"Connecting to OpenVPN server: {config.name}")
             
             # Start OpenVPN process
-            self.current_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if sys.platform == 'win32' else 0
-            )
-            
+            self.current_process, self.current_management = self._start_openvpn(config)
+            self.current_device = None
             self.connection_start_time = time.time()
             
             # Wait for connection to establish
-            return self._wait_for_connection()
+            if self._wait_for_connection(self.current_process, management=self.current_management):
+                self.current_device = self.current_management.find_device()
+                self.logger.info(f"OpenVPN connected successfully to {self.current_config.name}")
+                
+                # Warm standby tunnels now that there is a tunnel to rotate away from
+                if self.standby_pool_size > 0:
+                    self.start_standby_pool()
+                return True
+            
+            self.disconnect()
+            return False
             
         except Exception as e:
             self.logger.error(f"Error connecting to OpenVPN: {e}")
             return False
     
-    def _wait_for_connection(self, timeout: int = 30) -> bool:
+    def connect_make_before_break(self, config: OpenVPNConfig) -> bool:
+        """
+        Bring up a tunnel to config on a separate tun device while the
+        current tunnel keeps carrying traffic, switch routes over to it and
+        only then tear the old tunnel down.
+        
+        Returns:
+            bool: True if the new tunnel is up and carrying traffic
+        """
+        if not self.openvpn_binary:
+            self.logger.error("OpenVPN binary not found")
+            return False
+        
+        if not self.is_connected():
+            return self.connect(config)
+        
+        device = self._allocate_tun_device()
+        
+        self.connection_attempts += 1
+        self.logger.info(f"Bringing up {config.name} on {device} before releasing {self.current_config.name}")
+        
+        try:
+            try:
+                process, management = self._start_openvpn(config, device)
+            except Exception as e:
+                self.logger.error(f"Error starting OpenVPN for {config.name}: {e}")
+                return False
+            
+            if not self._wait_for_connection(process, device, management):
+                self._terminate_process(process)
+                management.close()
+                self.logger.warning(f"New tunnel to {config.name} failed, keeping {self.current_config.name}")
+                return False
+            
+            self._promote_tunnel(config, process, management, device)
+            return True
+        finally:
+            self._release_device(device)
+    
+    def _promote_tunnel(self, config: OpenVPNConfig, process: SupervisedProcess,
+                        management: OpenVPNManagementClient, device: str):
+        """Route traffic through an established tunnel and release the current one"""
+        old_process = self.current_process
+        old_management = self.current_management
+        old_routes = self.current_routes
+        
+        # Point traffic at the new tunnel before the old one goes away
+        routes = self._switch_routes(device, config)
+        
+        self.current_process = process
+        self.current_management = management
+        self.current_config = config
+        self.current_device = device
+        self.current_routes = routes
+        self.connection_start_time = time.time()
+        
+        if old_process:
+            self._terminate_process(old_process)
+        if old_management:
+            old_management.close()
+        self._remove_routes(old_routes, keep=routes)
+        
+        self.logger.info(f"OpenVPN switched to {config.name} on {device}")
+    
+    def _build_command(self, config: OpenVPNConfig, device: Optional[str] = None,
+                       standby: bool = False) -> List[str]:
+        """Build the OpenVPN command line for a configuration"""
+        cmd = [self.openvpn_binary, '--config', config.config_file]
+        
+        # Add authentication if specified
+        if config.auth_file and os.path.exists(config.auth_file):
+            cmd.extend(['--auth-user-pass', config.auth_file])
+        
+        # Pin the tunnel to its own device so two tunnels can coexist
+        if device:
+            cmd.extend(['--dev', device, '--dev-type', 'tun'])
+        
+        # Standby tunnels install no routes at all until they are promoted
+        if standby:
+            cmd.append('--route-noexec')
+        
+        # Add additional options for better compatibility
+        cmd.extend([
+            '--verb', '3',
+            '--script-security', '2',
+            '--up-delay',
+            '--down-pre',
+            '--pull-filter', 'ignore', 'redirect-gateway',
+            '--route-method', 'exe',
+            '--route-delay', '2'
+        ])
+        
+        return cmd
+    
+    def _start_openvpn(self, config: OpenVPNConfig, device: Optional[str] = None,
+                       standby: bool = False) -> Tuple[SupervisedProcess, OpenVPNManagementClient]:
+        """Start an OpenVPN process for a configuration with its own management interface"""
+        management = OpenVPNManagementClient(self.logger, name=config.name)
+        cmd = self._build_command(config, device, standby) + management.get_openvpn_args()
+        
+        # The supervisor drains output continuously so --verb 3 logging
+        # can never fill the pipe and stall the tunnel
+        try:
+            process = get_process_supervisor(self.logger).start(
+                f"openvpn-{config.name}",
+                cmd,
+                ready_markers=("Initialization Sequence Completed",)
+            )
+        except Exception:
+            management.close()
+            raise
+        
+        return process, management
+    
+    def _wait_for_connection(self, process: SupervisedProcess, device: Optional[str] = None,
+                             management: Optional[OpenVPNManagementClient] = None,
+                             timeout: int = 30) -> bool:
         """Wait for OpenVPN connection to establish"""
         start_time = time.time()
         
-        while time.time() - start_time < timeout:
-            if not self.current_process:
-                return False
+        # Prefer state notifications from the management interface
+        if management and management.attach(timeout=min(10, timeout), is_alive=lambda: process.poll() is None):
+            remaining = timeout - (time.time() - start_time)
+            if management.wait_for_connected(remaining):
+                return True
             
+            if process.poll() is not None:
+                self.logger.error(f"OpenVPN process terminated: {management.last_error or process.tail()}")
+            elif management.state == 'EXITING':
+                self.logger.error(f"OpenVPN connection failed: {management.state_description}")
+            else:
+                self.logger.error(f"OpenVPN connection timeout (last state: {management.state})")
+            return False
+        
+        # Fall back to polling for the tunnel interface
+        while time.time() - start_time < timeout:
             # Check if process died
-            if self.current_process.poll() is not None:
-                stderr = self.current_process.stderr.read()
-                self.logger.error(f"OpenVPN process terminated: {stderr}")
+            if process.poll() is not None:
+                self.logger.error(f"OpenVPN process terminated: {process.tail()}")
                 return False
             
             # Check if VPN interface is up
-            if self._check_vpn_interface():
-                self.logger.info(f"OpenVPN connected successfully to {self.current_config.name}")
+            if self._check_vpn_interface(device):
                 return True
             
-            time.sleep(1)
+            if process.wait_ready(1):
+                return True
         
         self.logger.error("OpenVPN connection timeout")
-        self.disconnect()
         return False
     
+    def _allocate_tun_device(self) -> str:
+        """Pick a tun device name not used by any existing interface"""
+        try:
+            in_use = set(netifaces.interfaces())
+        except Exception:
+            in_use = set()
+        
+        if self.current_device:
+            in_use.add(self.current_device)
+        
+        with self._pool_lock:
+            in_use.update(self._reserved_devices)
+            in_use.update(tunnel.device for tunnel in self.standby_tunnels)
+            
+            index = 0
+            while f"tun{index}" in in_use:
+                index += 1
+            
+            device = f"tun{index}"
+            self._reserved_devices.add(device)
+        
+        return device
+    
+    def _release_device(self, device: str):
+        """Release a device name reserved by _allocate_tun_device"""
+        with self._pool_lock:
+            self._reserved_devices.discard(device)
+    
+    def _switch_routes(self, device: str, config: OpenVPNConfig) -> List[List[str]]:
+        """
+        Route traffic through device
+        
+        Uses the two /1 halves of the address space, like OpenVPN's def1, so
+        the original default route is never deleted. `ip route replace`
+        swaps each route in a single netlink operation, so there is no
+        window without a route. Returns the routes installed.
+        """
+        if not sys.platform.startswith('linux'):
+            self.logger.warning("Make-before-break route switching is only supported on Linux")
+            return []
+        
+        routes = []
+        
+        # Keep the VPN server itself reachable through the physical gateway
+        try:
+            server_ip = socket.gethostbyname(config.server)
+            gateway = netifaces.gateways().get('default', {}).get(netifaces.AF_INET, [None])[0]
+            if gateway:
+                routes.append([f"{server_ip}/32", 'via', gateway])
+        except Exception as e:
+            self.logger.warning(f"Could not pin route to VPN server {config.server}: {e}")
+        
+        routes.append(['0.0.0.0/1', 'dev', device])
+        routes.append(['128.0.0.0/1', 'dev', device])
+        
+        for route in routes:
+            try:
+                subprocess.run(['ip', 'route', 'replace'] + route, check=True,
+                               capture_output=True, timeout=5)
+            except Exception as e:
+                self.logger.error(f"Failed to install route {' '.join(route)}: {e}")
+        
+        return routes
+    
+    def _remove_routes(self, routes: List[List[str]], keep: List[List[str]] = None):
+        """Delete routes installed for a previous tunnel"""
+        keep_targets = {route[0] for route in keep or []}
+        
+        for route in routes:
+            if route[0] in keep_targets:
+                continue
+            try:
+                subprocess.run(['ip', 'route', 'del'] + route, capture_output=True, timeout=5)
+            except Exception as e:
+                self.logger.debug(f"Failed to remove route {' '.join(route)}: {e}")
+    
+    def _terminate_process(self, process: SupervisedProcess):
+        """Terminate an OpenVPN process, killing it if it does not exit"""
+        if sys.platform == 'win32':
+            process.terminate()
+        else:
+            process.send_signal(subprocess.signal.SIGTERM)
+        
+        # Wait for process to terminate
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.logger.warning("OpenVPN process didn't terminate gracefully, killing it")
+            process.kill()
+            process.wait()
+    
     def disconnect(self) -> bool:
         """Disconnect from OpenVPN"""
         if not self.current_process:
@@ -396,21 +652,17 @@ verb 3
             self.logger.info("Disconnecting from OpenVPN")
             
             # Terminate the process
-            if sys.platform == 'win32':
-                self.current_process.terminate()
-            else:
-                self.current_process.send_signal(subprocess.signal.SIGTERM)
+            self._terminate_process(self.current_process)
+            self._remove_routes(self.current_routes)
             
-            # Wait for process to terminate
-            try:
-                self.current_process.wait(timeout=10)
-            except subprocess.TimeoutExpired:
-                self.logger.warning("OpenVPN process didn't terminate gracefully, killing it")
-                self.current_process.kill()
-                self.current_process.wait()
+            if self.current_management:
+                self.current_management.close()
             
             self.current_process = None
+            self.current_management = None
             self.current_config = None
+            self.current_device = None
+            self.current_routes = []
             self.connection_start_time = None
             
             return True
@@ -419,10 +671,16 @@ verb 3
             self.logger.error(f"Error disconnecting from OpenVPN: {e}")
             return False
     
-    def rotate_connection(self) -> bool:
+    def rotate_connection(self, make_before_break: Optional[bool] = None,
+                          country: Optional[str] = None) -> bool:
         """
         Rotate to a new OpenVPN server
         
+        Args:
+            make_before_break: Bring the new tunnel up before dropping the
+                current one. Defaults to the manager's make_before_break setting.
+            country: Only rotate to servers in this country
+        
         Returns:
             bool: True if rotation successful
         """
@@ -443,14 +701,160 @@ verb 3
             self.logger.warning("No alternative OpenVPN servers available")
             return False
         
+        # A pre-warmed standby tunnel turns rotation into a route switch
+        tunnel = self._take_standby_tunnel(country)
+        if tunnel:
+            self.logger.info(f"Rotating from {current_config.name if current_config else 'None'} to standby {tunnel.config.name}")
+            self.connection_attempts += 1
+            self._promote_tunnel(tunnel.config, tunnel.process, tunnel.management, tunnel.device)
+            return True
+        
         # Select new configuration
-        new_config = random.choice(available_configs)
+        new_config = self.latency_prober.select(available_configs, country=country)
+        if not new_config:
+            self.logger.warning(f"No alternative OpenVPN servers available in {country}")
+            return False
         
         self.logger.info(f"Rotating from {current_config.name if current_config else 'None'} to {new_config.name}")
         
         # Connect to new server
+        if make_before_break is None:
+            make_before_break = self.make_before_break
+        
+        if make_before_break:
+            return self.connect_make_before_break(new_config)
+        
         return self.connect(new_config)
     
+    def start_standby_pool(self, size: Optional[int] = None):
+        """Start keeping `size` idle tunnels established for rotation"""
+        if size is not None:
+            self.standby_pool_size = size
+        
+        if self.standby_pool_size <= 0 or self._pool_running:
+            return
+        
+        if not self.openvpn_binary:
+            self.logger.warning("OpenVPN binary not found, standby pool disabled")
+            return
+        
+        self._pool_running = True
+        self._pool_thread = threading.Thread(target=self._standby_pool_loop, daemon=True)
+        self._pool_thread.start()
+        
+        self.logger.info(f"OpenVPN standby pool started ({self.standby_pool_size} tunnels)")
+    
+    def stop_standby_pool(self):
+        """Stop refilling the pool and tear down idle standby tunnels"""
+        self._pool_running = False
+        self._pool_refill_event.set()
+        
+        if self._pool_thread:
+            self._pool_thread.join(timeout=5)
+            self._pool_thread = None
+        
+        with self._pool_lock:
+            tunnels = self.standby_tunnels
+            self.standby_tunnels = []
+        
+        for tunnel in tunnels:
+            self._close_standby_tunnel(tunnel)
+    
+    def _standby_pool_loop(self):
+        """Keep the standby pool filled in the background"""
+        while self._pool_running:
+            try:
+                self._prune_standby_tunnels()
+                
+                while self._pool_running and len(self.standby_tunnels) < self.standby_pool_size:
+                    if not self._add_standby_tunnel():
+                        break
+            except Exception as e:
+                self.logger.error(f"Error refilling OpenVPN standby pool: {e}")
+            
+            self._pool_refill_event.wait(self.standby_refill_interval)
+            self._pool_refill_event.clear()
+    
+    def _add_standby_tunnel(self) -> bool:
+        """Establish one idle tunnel to a server not already in use"""
+        with self._pool_lock:
+            busy = {tunnel.config.name for tunnel in self.standby_tunnels}
+        if self.current_config:
+            busy.add(self.current_config.name)
+        
+        candidates = [config for config in self.available_configs if config.name not in busy]
+        if not candidates:
+            return False
+        
+        config = self.latency_prober.select(candidates)
+        device = self._allocate_tun_device()
+        
+        try:
+            process, management = self._start_openvpn(config, device, standby=True)
+            
+            if not self._wait_for_connection(process, device, management):
+                self._terminate_process(process)
+                management.close()
+                self.logger.warning(f"Standby tunnel to {config.name} failed")
+                return False
+            
+            with self._pool_lock:
+                self.standby_tunnels.append(StandbyTunnel(
+                    config=config,
+                    process=process,
+                    management=management,
+                    device=device,
+                    established_at=time.time()
+                ))
+            
+            self.logger.debug(f"Standby tunnel to {config.name} ready on {device}")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Error starting standby tunnel to {config.name}: {e}")
+            return False
+        finally:
+            self._release_device(device)
+    
+    def _take_standby_tunnel(self, country: Optional[str] = None) -> Optional[StandbyTunnel]:
+        """Remove and return a healthy standby tunnel, if any"""
+        self._prune_standby_tunnels()
+        
+        with self._pool_lock:
+            tunnel = None
+            for candidate in self.standby_tunnels:
+                if not country or (candidate.config.country or '').lower() == country.lower():
+                    tunnel = candidate
+                    self.standby_tunnels.remove(candidate)
+                    break
+        
+        # Refill in the background while the caller switches over
+        if tunnel:
+            self._pool_refill_event.set()
+        
+        return tunnel
+    
+    def _prune_standby_tunnels(self):
+        """Drop standby tunnels whose process exited or that lost their connection"""
+        with self._pool_lock:
+            dead = [
+                tunnel for tunnel in self.standby_tunnels
+                if tunnel.process.poll() is not None or not tunnel.management.is_connected()
+            ]
+            self.standby_tunnels = [tunnel for tunnel in self.standby_tunnels if tunnel not in dead]
+        
+        for tunnel in dead:
+            self.logger.debug(f"Dropping dead standby tunnel to {tunnel.config.name}")
+            self._close_standby_tunnel(tunnel)
+    
+    def _close_standby_tunnel(self, tunnel: StandbyTunnel):
+        """Tear down a standby tunnel"""
+        try:
+            self._terminate_process(tunnel.process)
+        except Exception as e:
+            self.logger.debug(f"Error stopping standby tunnel to {tunnel.config.name}: {e}")
+        tunnel.management.close()
+    
     def get_current_connection_info(self) -> Optional[Dict[str, Any]]:
         """Get information about current connection"""
         if not self.is_connected() or not self.current_config:
@@ -473,31 +877,47 @@ verb 3
     
     def get_available_servers(self) -> List[Dict[str, Any]]:
         """Get list of available OpenVPN servers"""
-        return [
-            {
+        servers = []
+        
+        for config in self.available_configs:
+            latency = self.latency_prober.get_cached(config.server, config.port, config.protocol)
+            servers.append({
                 'name': config.name,
                 'server': config.server,
                 'country': config.country,
                 'city': config.city,
                 'protocol': config.protocol,
-                'port': config.port
-            }
-            for config in self.available_configs
-        ]
+                'port': config.port,
+                'latency_ms': round(latency.rtt * 1000, 1) if latency and latency.reachable else None
+            })
+        
+        return servers
+    
+    def select_server(self, country: Optional[str] = None,
+                      exclude: Optional[OpenVPNConfig] = None) -> Optional[OpenVPNConfig]:
+        """
+        Pick a low-latency server
+        
+        Args:
+            country: Only consider servers in this country
+            exclude: Server to skip, usually the current one
+            
+        Returns:
+            OpenVPNConfig or None if no server matches
+        """
+        configs = [config for config in self.available_configs if config != exclude]
+        return self.latency_prober.select(configs, country=country)
+    
+    def probe_servers(self, force: bool = False) -> Dict[str, Optional[float]]:
+        """Measure handshake latency to all servers in parallel, in seconds"""
+        results = self.latency_prober.probe_configs(self.available_configs, force=force)
+        return {name: result.rtt for name, result in results.items()}
     
     def test_connection(self, config: OpenVPNConfig) -> bool:
         """Test connection to a specific OpenVPN server"""
         try:
-            # Simple connectivity test
-            import socket
-            
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(10)
-            
-            result = sock.connect_ex((config.server, config.port))
-            sock.close()
-            
-            return result == 0
+            result = self.latency_prober.probe(config.server, config.port, config.protocol)
+            return result.reachable
             
         except Exception as e:
             self.logger.error(f"Error testing connection to {config.server}: {e}")
@@ -505,6 +925,9 @@ verb 3
     
     def cleanup(self):
         """Cleanup OpenVPN connections"""
+        self.stop_standby_pool()
+        self.config_index.stop()
+        
         if self.is_connected():
             self.disconnect()
         
@@ -517,7 +940,8 @@ verb 3
             'current_server': None,
             'connection_time': 0,
             'total_attempts': self.connection_attempts,
-            'available_servers': len(self.available_configs)
+            'available_servers': len(self.available_configs),
+            'standby_tunnels': len(self.standby_tunnels)
         }
         
         if self.current_config:
@@ -526,6 +950,17 @@ verb 3
         if self.connection_start_time:
             stats['connection_time'] = time.time() - self.connection_start_time
         
+        if self.current_management:
+            management_status = self.current_management.get_status()
+            stats['state'] = management_status['state']
+            stats['bytes_in'] = management_status['bytes_in']
+            stats['bytes_out'] = management_status['bytes_out']
+            stats['tunnel_ip'] = management_status['local_ip']
+            stats['device'] = self.current_device
+        
+        if self.current_process:
+            stats['process'] = self.current_process.get_resource_usage()
+        
         return stats
 
     def connect_by_name(self, server_name: str) -> bool:
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Proc Connections - Fast socket table for Linux built from /proc/net
+
+Reads /proc/net/{tcp,tcp6,udp,udp6} in bulk and maps socket inodes to
+owning processes through a cache, so repeated snapshots only walk
+/proc/<pid>/fd when sockets of unknown ownership appear.
+"""
+
+import os
+import sys
+import time
+import socket
+import logging
+from typing import Dict, List, Set, Tuple, NamedTuple
+
+# TCP states as encoded in /proc/net/tcp, named like psutil's constants
+TCP_STATES = {
+    '01': 'ESTABLISHED',
+    '02': 'SYN_SENT',
+    '03': 'SYN_RECV',
+    '04': 'FIN_WAIT1',
+    '05': 'FIN_WAIT2',
+    '06': 'TIME_WAIT',
+    '07': 'CLOSE',
+    '08': 'CLOSE_WAIT',
+    '09': 'LAST_ACK',
+    '0A': 'LISTEN',
+    '0B': 'CLOSING',
+}
+
+PROC_NET_FILES = (
+    ('tcp', socket.AF_INET),
+    ('tcp6', socket.AF_INET6),
+    ('udp', socket.AF_INET),
+    ('udp6', socket.AF_INET6),
+)
+
+class ProcSocket(NamedTuple):
+    """One row of a /proc/net socket table"""
+    protocol: str
+    local_address: str
+    local_port: int
+    remote_address: str
+    remote_port: int
+    status: str
+    inode: int
+
+def proc_net_available() -> bool:
+    """Whether the /proc/net fast path can be used"""
+    return sys.platform.startswith('linux') and os.path.exists('/proc/net/tcp')
+
+def _decode_address(encoded: str, family: int) -> Tuple[str, int]:
+    """Decode a hex ADDR:PORT pair from /proc/net"""
+    address, port = encoded.split(':')
+    raw = bytes.fromhex(address)
+    
+    # Addresses are stored as host-order (little-endian) 32-bit words
+    raw = b''.join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+    
+    # Like psutil, keep wildcard addresses ('0.0.0.0', '::') and leave only
+    # unset endpoints (port 0, e.g. the remote end of a listener) empty
+    port = int(port, 16)
+    if not port:
+        return '', 0
+    return socket.inet_ntop(family, raw), port
+
+class ProcConnectionTable:
+    """Socket table with cached inode to process resolution"""
+    
+    def __init__(self, logger: logging.Logger, proc_root: str = '/proc',
+                 rescan_interval: float = 2.0):
+        self.logger = logger
+        self.proc_root = proc_root
+        self.rescan_interval = rescan_interval
+        
+        self._inode_pids: Dict[int, int] = {}
+        self._process_names: Dict[int, str] = {}
+        self._unresolved: Set[int] = set()
+        self._last_scan = 0.0
+    
+    def read_sockets(self) -> List[ProcSocket]:
+        """Parse all inet socket tables"""
+        sockets = []
+        
+        for name, family in PROC_NET_FILES:
+            path = os.path.join(self.proc_root, 'net', name)
+            try:
+                with open(path, 'r') as f:
+                    lines = f.readlines()[1:]
+            except OSError:
+                continue
+            
+            is_tcp = name.startswith('tcp')
+            
+            for line in lines:
+                fields = line.split()
+                if len(fields) < 10:
+                    continue
+                
+                try:
+                    local_ip, local_port = _decode_address(fields[1], family)
+                    remote_ip, remote_port = _decode_address(fields[2], family)
+                except ValueError:
+                    continue
+                
+                status = TCP_STATES.get(fields[3], 'NONE') if is_tcp else 'NONE'
+                
+                sockets.append(ProcSocket(
+                    protocol=name,
+                    local_address=local_ip,
+                    local_port=local_port,
+                    remote_address=remote_ip,
+                    remote_port=remote_port,
+                    status=status,
+                    inode=int(fields[9])
+                ))
+        
+        return sockets
+    
+    def _scan_fds(self):
+        """Walk /proc/<pid>/fd once to rebuild the inode to pid map"""
+        inode_pids = {}
+        
+        try:
+            pids = [int(entry) for entry in os.listdir(self.proc_root) if entry.isdigit()]
+        except OSError:
+            return
+        
+        for pid in pids:
+            fd_dir = os.path.join(self.proc_root, str(pid), 'fd')
+            try:
+                fds = os.listdir(fd_dir)
+            except OSError:
+                # Process exited or belongs to another user
+                continue
+            
+            for fd in fds:
+                try:
+                    target = os.readlink(os.path.join(fd_dir, fd))
+                except OSError:
+                    continue
+                
+                if target.startswith('socket:['):
+                    inode_pids[int(target[8:-1])] = pid
+        
+        # Forget names of processes that are gone, so reused pids are re-read
+        live = set(pids)
+        self._process_names = {pid: name for pid, name in self._process_names.items() if pid in live}
+        self._inode_pids = inode_pids
+        self._last_scan = time.time()
+    
+    def _process_name(self, pid: int) -> str:
+        """Cached process name for a pid"""
+        name = self._process_names.get(pid)
+        if name is None:
+            try:
+                with open(os.path.join(self.proc_root, str(pid), 'comm'), 'r') as f:
+                    name = f.read().strip()
+            except OSError:
+                name = 'Unknown'
+            self._process_names[pid] = name
+        return name
+    
+    def resolve(self, sockets: List[ProcSocket]) -> List[Tuple[ProcSocket, int, str]]:
+        """
+        Attach owning pid and process name to sockets
+        
+        /proc/<pid>/fd is only walked when sockets of unknown ownership
+        appear, and at most once per rescan_interval. Sockets that stay
+        unresolved after a walk (other users' processes without privileges,
+        or kernel sockets) do not trigger further walks.
+        """
+        live_inodes = {sock.inode for sock in sockets if sock.inode}
+        unknown = live_inodes - self._inode_pids.keys() - self._unresolved
+        
+        if unknown and time.time() - self._last_scan >= self.rescan_interval:
+            self._scan_fds()
+            self._unresolved = live_inodes - self._inode_pids.keys()
+        else:
+            self._unresolved &= live_inodes
+        
+        resolved = []
+        for sock in sockets:
+            pid = self._inode_pids.get(sock.inode, 0)
+            resolved.append((sock, pid, self._process_name(pid) if pid else 'Unknown'))
+        
+        return resolved
+    
+    def snapshot(self) -> List[Tuple[ProcSocket, int, str]]:
+        """Read and resolve the current socket table"""
+        return self.resolve(self.read_sockets())
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Process Supervisor - Shared supervision for OpenVPN and Tor child processes
+
+Child output is drained line by line on a reader thread as soon as it is
+written, so verbose children never block on a full pipe. Lines are logged,
+kept in a short tail for error reports and matched against readiness
+markers. Crashed children can be restarted with exponential backoff.
+"""
+
+import sys
+import time
+import logging
+import threading
+import subprocess
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence, Any
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+class SupervisedProcess:
+    """
+    A child process with drained output, readiness detection and restarts
+    
+    Exposes the subset of the subprocess.Popen interface used by the
+    managers (pid, returncode, poll, wait, terminate, kill, send_signal), so
+    it can stand in for a Popen handle.
+    """
+    
+    def __init__(self, name: str, cmd: List[str], logger: logging.Logger,
+                 ready_markers: Sequence[str] = (), restart: bool = False,
+                 max_restarts: int = 5, backoff: float = 1.0, max_backoff: float = 60.0,
+                 on_line: Optional[Callable[[str], None]] = None,
+                 on_restart: Optional[Callable[['SupervisedProcess'], None]] = None,
+                 on_exit: Optional[Callable[['SupervisedProcess'], None]] = None,
+                 **popen_kwargs):
+        self.name = name
+        self.cmd = cmd
+        self.logger = logger
+        self.ready_markers = tuple(ready_markers)
+        self.restart = restart
+        self.max_restarts = max_restarts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.on_line = on_line
+        self.on_restart = on_restart
+        self.on_exit = on_exit
+        self.popen_kwargs = popen_kwargs
+        
+        self.popen: Optional[subprocess.Popen] = None
+        # Kept per child: cpu_percent() measures since the previous call on the same object
+        self._psutil_process = None
+        self.started_at = None
+        self.ready_at = None
+        self.restarts = 0
+        self.output = deque(maxlen=200)
+        
+        self._ready = threading.Event()
+        self._exited = threading.Event()
+        self._stopping = threading.Event()
+        self._reader_thread = None
+    
+    def start(self):
+        """Spawn the child and begin draining its output"""
+        self._spawn()
+        self._reader_thread = threading.Thread(target=self._supervise, daemon=True)
+        self._reader_thread.start()
+    
+    def _spawn(self):
+        """Start the child with stdout and stderr merged into one pipe"""
+        self._ready.clear()
+        self._exited.clear()
+        self.ready_at = None
+        self._psutil_process = None
+        
+        self.popen = subprocess.Popen(
+            self.cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            text=True,
+            errors='replace',
+            bufsize=1,
+            **self.popen_kwargs
+        )
+        self.started_at = time.time()
+        self.logger.debug(f"[{self.name}] started (pid {self.popen.pid})")
+    
+    def _supervise(self):
+        """Drain output, then restart the child if it crashed"""
+        delay = self.backoff
+        
+        while True:
+            self._drain(self.popen)
+            returncode = self.popen.wait()
+            uptime = time.time() - self.started_at
+            self._exited.set()
+            
+            if self._stopping.is_set():
+                self.logger.debug(f"[{self.name}] stopped (exit code {returncode})")
+                break
+            
+            self.logger.warning(f"[{self.name}] exited with code {returncode} after {uptime:.0f}s")
+            
+            if not self.restart or self.restarts >= self.max_restarts:
+                break
+            
+            # A child that stayed up for a while is not crash-looping
+            if uptime > self.max_backoff:
+                delay = self.backoff
+            
+            self.logger.info(f"[{self.name}] restarting in {delay:.1f}s")
+            if self._stopping.wait(delay):
+                break
+            
+            try:
+                self._spawn()
+            except OSError as e:
+                self.logger.error(f"[{self.name}] restart failed: {e}")
+                break
+            
+            self.restarts += 1
+            delay = min(delay * 2, self.max_backoff)
+            
+            if self.on_restart:
+                try:
+                    self.on_restart(self)
+                except Exception as e:
+                    self.logger.error(f"[{self.name}] restart handler failed: {e}")
+        
+        if self.on_exit:
+            try:
+                self.on_exit(self)
+            except Exception as e:
+                self.logger.error(f"[{self.name}] exit handler failed: {e}")
+    
+    def _drain(self, popen: subprocess.Popen):
+        """Read child output until the pipe closes"""
+        try:
+            for line in popen.stdout:
+                line = line.rstrip()
+                if not line:
+                    continue
+                
+                self.output.append(line)
+                self.logger.debug(f"[{self.name}] {line}")
+                
+                if not self._ready.is_set() and any(marker in line for marker in self.ready_markers):
+                    self.ready_at = time.time()
+                    self._ready.set()
+                    self.logger.info(f"[{self.name}] ready after {self.ready_at - self.started_at:.1f}s")
+                
+                if self.on_line:
+                    self.on_line(line)
+        except (OSError, ValueError):
+            pass
+        finally:
+            popen.stdout.close()
+    
+    def wait_ready(self, timeout: float) -> bool:
+        """Block until a readiness marker is seen, the child exits, or timeout expires"""
+        deadline = time.time() + timeout
+        
+        while time.time() < deadline:
+            if self._ready.wait(min(0.2, max(0, deadline - time.time()))):
+                return True
+            if self._exited.is_set():
+                return self._ready.is_set()
+        
+        return self._ready.is_set()
+    
+    def is_ready(self) -> bool:
+        """Whether the current child has reported readiness"""
+        return self._ready.is_set()
+    
+    def tail(self, lines: int = 20) -> str:
+        """Last lines of child output, for error reports"""
+        return '\n'.join(list(self.output)[-lines:])
+    
+    @property
+    def pid(self) -> Optional[int]:
+        return self.popen.pid if self.popen else None
+    
+    @property
+    def returncode(self) -> Optional[int]:
+        return self.popen.returncode if self.popen else None
+    
+    def poll(self) -> Optional[int]:
+        return self.popen.poll()
+    
+    def wait(self, timeout: Optional[float] = None) -> int:
+        return self.popen.wait(timeout=timeout)
+    
+    def send_signal(self, sig):
+        self._stopping.set()
+        self.popen.send_signal(sig)
+    
+    def terminate(self):
+        self._stopping.set()
+        self.popen.terminate()
+    
+    def kill(self):
+        self._stopping.set()
+        self.popen.kill()
+    
+    def stop(self, timeout: float = 10.0):
+        """Terminate the child without restarting it, killing it if needed"""
+        self._stopping.set()
+        
+        if self.popen.poll() is None:
+            self.popen.terminate()
+            try:
+                self.popen.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self.logger.warning(f"[{self.name}] did not terminate gracefully, killing it")
+                self.popen.kill()
+                self.popen.wait()
+        
+        if self._reader_thread:
+            self._reader_thread.join(timeout=5)
+    
+    def get_resource_usage(self) -> Dict[str, Any]:
+        """CPU, memory and uptime of the current child"""
+        usage = {
+            'pid': self.pid,
+            'running': self.popen is not None and self.popen.poll() is None,
+            'ready': self.is_ready(),
+            'restarts': self.restarts,
+            'uptime': time.time() - self.started_at if self.started_at else 0
+        }
+        
+        if PSUTIL_AVAILABLE and usage['running']:
+            try:
+                proc = self._psutil_process
+                if proc is None or proc.pid != self.pid:
+                    proc = self._psutil_process = psutil.Process(self.pid)
+                    # Prime the CPU counters; the first reading is always 0.0
+                    proc.cpu_percent(interval=None)
+                with proc.oneshot():
+                    usage['cpu_percent'] = proc.cpu_percent(interval=None)
+                    usage['memory_rss'] = proc.memory_info().rss
+                    usage['num_threads'] = proc.num_threads()
+            except psutil.Error:
+                pass
+        
+        return usage
+
+class ProcessSupervisor:
+    """Registry of supervised child processes"""
+    
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self.processes: Dict[str, SupervisedProcess] = {}
+        self._lock = threading.Lock()
+    
+    def start(self, name: str, cmd: List[str], **kwargs) -> SupervisedProcess:
+        """
+        Start and supervise a child process
+        
+        Args:
+            name: Label used in logs and resource reports
+            cmd: Command line
+            **kwargs: SupervisedProcess options and extra Popen arguments
+        
+        Returns:
+            SupervisedProcess handle
+        """
+        if sys.platform == 'win32':
+            kwargs.setdefault('creationflags', subprocess.CREATE_NEW_PROCESS_GROUP)
+        
+        on_exit = kwargs.pop('on_exit', None)
+        
+        def exited(process: SupervisedProcess):
+            with self._lock:
+                if self.processes.get(process.name) is process:
+                    del self.processes[process.name]
+            if on_exit:
+                on_exit(process)
+        
+        with self._lock:
+            unique_name = name
+            suffix = 2
+            while unique_name in self.processes:
+                unique_name = f"{name}#{suffix}"
+                suffix += 1
+            
+            process = SupervisedProcess(unique_name, cmd, self.logger, on_exit=exited, **kwargs)
+            process.start()
+            self.processes[unique_name] = process
+        
+        return process
+    
+    def get(self, name: str) -> Optional[SupervisedProcess]:
+        """Get a supervised process by name"""
+        with self._lock:
+            return self.processes.get(name)
+    
+    def stop_all(self, timeout: float = 10.0):
+        """Stop every supervised process"""
+        with self._lock:
+            processes = list(self.processes.values())
+        
+        for process in processes:
+            process.stop(timeout)
+    
+    def get_resource_usage(self) -> Dict[str, Dict[str, Any]]:
+        """Resource usage of every supervised process, keyed by name"""
+        with self._lock:
+            processes = list(self.processes.items())
+        
+        return {name: process.get_resource_usage() for name, process in processes}
+
+_supervisor: Optional[ProcessSupervisor] = None
+_supervisor_lock = threading.Lock()
+
+def get_process_supervisor(logger: Optional[logging.Logger] = None) -> ProcessSupervisor:
+    """Get the process-wide supervisor shared by the VPN and Tor managers"""
+    global _supervisor
+    
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = ProcessSupervisor(logger or logging.getLogger(__name__))
+        return _supervisor
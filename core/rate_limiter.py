@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter - Token bucket rate limiting for the CyberRotate Pro API
+
+Buckets hold three numbers per active key (tokens, last update, time at
+which the bucket is full again), so memory is O(1) per key. Buckets are
+pruned once they have refilled, when they are indistinguishable from new
+ones. The in-memory store serves single-process deployments; the SQLite
+store shares buckets between worker processes on the same host.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Dict, Tuple, Optional
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a rate limit check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0
+
+def _full_at(tokens: float, capacity: float, refill_rate: float, now: float) -> float:
+    """Time at which a bucket holding tokens has refilled to capacity"""
+    if tokens >= capacity:
+        return now
+    if refill_rate <= 0:
+        return float('inf')
+    return now + (capacity - tokens) / refill_rate
+
+class MemoryBucketStore:
+    """Process-local bucket storage"""
+    
+    def __init__(self, prune_every: int = 1000):
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._lock = threading.Lock()
+        self._operations = 0
+        self.prune_every = prune_every
+    
+    def consume(self, key: str, capacity: float, refill_rate: float, now: float) -> Tuple[bool, float]:
+        """Take one token from a bucket, returning (allowed, tokens left)"""
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            
+            self._buckets[key] = (tokens, now, _full_at(tokens, capacity, refill_rate, now))
+            
+            self._operations += 1
+            if self._operations % self.prune_every == 0:
+                self._prune(now)
+            
+            return allowed, tokens
+    
+    def _prune(self, now: float):
+        """Drop buckets that have refilled completely under their own limit"""
+        idle = [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]
+        for key in idle:
+            del self._buckets[key]
+
+class SQLiteBucketStore:
+    """Bucket storage shared between worker processes through a local SQLite file"""
+    
+    def __init__(self, db_path: str = "data/rate_limits.db", prune_every: int = 1000):
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._lock = threading.Lock()
+        self._operations = 0
+        self.prune_every = prune_every
+        
+        with self._lock:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=OFF')
+            self._connection.execute('''
+                CREATE TABLE IF NOT EXISTS buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    full_at REAL NOT NULL
+                )
+            ''')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS idx_buckets_full_at ON buckets(full_at)')
+    
+    def consume(self, key: str, capacity: float, refill_rate: float, now: float) -> Tuple[bool, float]:
+        """Take one token from a bucket, returning (allowed, tokens left)"""
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                row = cursor.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+                tokens, updated = row if row else (capacity, now)
+                tokens = min(capacity, tokens + (now - updated) * refill_rate)
+                
+                allowed = tokens >= 1.0
+                if allowed:
+                    tokens -= 1.0
+                
+                cursor.execute(
+                    'INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)',
+                    (key, tokens, now, _full_at(tokens, capacity, refill_rate, now))
+                )
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+            
+            self._operations += 1
+            if self._operations % self.prune_every == 0:
+                self._prune(now)
+            
+            return allowed, tokens
+    
+    def _prune(self, now: float):
+        """Delete buckets that have refilled completely under their own limit"""
+        self._connection.execute('DELETE FROM buckets WHERE full_at <= ?', (now,))
+
+class TokenBucketLimiter:
+    """
+    Token bucket rate limiter
+    
+    Limits are expressed in requests per hour. Each bucket holds
+    burst_ratio of the hourly limit, so short bursts are allowed while the
+    long-run rate stays at the configured limit.
+    """
+    
+    def __init__(self, store=None, burst_ratio: float = 0.1):
+        self.store = store or MemoryBucketStore()
+        self.burst_ratio = burst_ratio
+    
+    def hit(self, key: str, limit_per_hour: int, now: Optional[float] = None) -> RateLimitResult:
+        """Consume one request for key under the given hourly limit"""
+        now = time.time() if now is None else now
+        
+        capacity = max(1.0, limit_per_hour * self.burst_ratio)
+        refill_rate = limit_per_hour / 3600.0
+        
+        allowed, tokens = self.store.consume(key, capacity, refill_rate, now)
+        
+        retry_after = 0.0
+        if not allowed and refill_rate > 0:
+            retry_after = (1.0 - tokens) / refill_rate
+        
+        return RateLimitResult(
+            allowed=allowed,
+            limit=limit_per_hour,
+            remaining=int(tokens),
+            retry_after=retry_after
+        )
+
+def create_rate_limiter(config: Dict) -> TokenBucketLimiter:
+    """Create a limiter from the API server's rate_limiting config section"""
+    storage = config.get('storage', 'memory')
+    
+    if storage == 'sqlite':
+        store = SQLiteBucketStore(config.get('storage_path', 'data/rate_limits.db'))
+    else:
+        store = MemoryBucketStore()
+    
+    return TokenBucketLimiter(store, burst_ratio=config.get('burst_ratio', 0.1))
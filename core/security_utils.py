@@ -9,12 +9,13 @@ import random
 import string
 import time
 import logging
-import requests
 import json
 from typing import Dict, List, Optional, Any
 from urllib.parse import urlparse
 import os
 
+from utils.geolocation import get_geolocation_service
+
 class SecurityUtils:
     """
     Security and Anonymity Utilities
@@ -130,14 +131,10 @@ class SecurityUtils:
         }
         
         try:
-            # Check with ipinfo.io (free tier)
-            response = requests.get(
-                f'https://ipinfo.io/{ip_address}/json',
-                timeout=10
-            )
+            # Check with ipinfo.io (free tier), through the shared cache
+            data = get_geolocation_service(self.logger).lookup(ip_address)
             
-            if response.status_code == 200:
-                data = response.json()
+            if data and data.get('source') != 'offline':
                 reputation_info['sources'].append('ipinfo.io')
                 reputation_info['details']['ipinfo'] = {
                     'country': data.get('country'),
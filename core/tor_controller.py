@@ -13,6 +13,8 @@ import subprocess
 import os
 import sys
 
+from core.process_supervisor import SupervisedProcess, get_process_supervisor
+
 try:
     from stem import Signal
     from stem.control import Controller
@@ -210,6 +212,7 @@ DataDirectory {self._get_tor_data_directory()}
 GeoIPFile /usr/share/tor/geoip
 GeoIPv6File /usr/share/tor/geoip6
 Log notice file {os.path.join(self._get_tor_data_directory(), 'tor.log')}
+Log notice stdout
 PidFile {os.path.join(self._get_tor_data_directory(), 'tor.pid')}
 RunAsDaemon 0
 """
@@ -221,26 +224,29 @@ RunAsDaemon 0
                 with open(config_path, 'w') as f:
                     f.write(tor_config)
                 
-                # Start Tor process with better error handling
-                self.tor_process = subprocess.Popen(
+                # Start Tor under the supervisor, which drains its output,
+                # watches for bootstrap and restarts it if it crashes
+                self.tor_process = get_process_supervisor(self.logger).start(
+                    "tor",
                     [tor_cmd, '-f', config_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
+                    ready_markers=("Bootstrapped 100%",),
+                    restart=True,
+                    on_line=self._tor_init_handler,
+                    on_restart=self._on_tor_restart,
                     cwd=self._get_tor_data_directory()
                 )
                 
-                # Wait for Tor to start with progress checking
-                for i in range(20):  # Wait up to 20 seconds
-                    time.sleep(1)
-                    if self.is_tor_running():
-                        self.logger.info("Tor service started successfully")
-                        return True
-                    if self.tor_process.poll() is not None:
-                        # Process ended, check for errors
-                        stdout, stderr = self.tor_process.communicate()
-                        self.logger.error(f"Tor process ended early. stderr: {stderr}")
-                        break
+                # Wait up to 20 seconds for Tor to bootstrap
+                if self.tor_process.wait_ready(20) or self.is_tor_running():
+                    self.logger.info("Tor service started successfully")
+                    return True
+                
+                if self.tor_process.poll() is not None:
+                    self.logger.error(f"Tor process ended early. output: {self.tor_process.tail()}")
+                
+                # Stop supervision too, or the supervisor keeps respawning this Tor
+                self.tor_process.stop()
+                self.tor_process = None
                     
             except FileNotFoundError:
                 self.logger.debug(f"Tor command not found: {tor_cmd}")
@@ -262,6 +268,16 @@ RunAsDaemon 0
         os.makedirs(data_dir, exist_ok=True)
         return data_dir
     
+    def _on_tor_restart(self, process: SupervisedProcess):
+        """Drop the stale controller connection after Tor was restarted"""
+        if self.controller:
+            try:
+                self.controller.close()
+            except Exception:
+                pass
+            self.controller = None
+        self.is_connected = False
+    
     def _tor_init_handler(self, line: str):
         """Handle Tor initialization messages"""
         if "Bootstrapped 100%" in line:
@@ -396,7 +412,7 @@ RunAsDaemon 0
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get Tor statistics"""
-        return {
+        stats = {
             'is_connected': self.is_connected,
             'is_tor_running': self.is_tor_running(),
             'circuit_count': self.circuit_count,
@@ -407,6 +423,11 @@ RunAsDaemon 0
             'tor_port': self.tor_port,
             'control_port': self.control_port
         }
+        
+        if isinstance(self.tor_process, SupervisedProcess):
+            stats['process'] = self.tor_process.get_resource_usage()
+        
+        return stats
     
     def configure_tor(self, config: Dict[str, Any]) -> bool:
         """Configure Tor settings"""
@@ -431,7 +452,10 @@ RunAsDaemon 0
                 self.controller.close()
                 self.controller = None
             
-            if self.tor_process:
+            if isinstance(self.tor_process, SupervisedProcess):
+                self.tor_process.stop(timeout=10)
+                self.tor_process = None
+            elif self.tor_process:
                 self.tor_process.terminate()
                 self.tor_process.wait(timeout=10)
                 self.tor_process = None
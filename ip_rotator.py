@@ -35,6 +35,8 @@ from core.network_monitor import NetworkMonitor
 from utils.logger import setup_logger
 from utils.stats_collector import StatsCollector
 from utils.leak_detector import LeakDetector
+from utils.leak_monitor import LeakMonitor
+from utils.geolocation import get_geolocation_service
 from ui.interactive_menu import InteractiveMenu
 from ui.cli_interface import CLIInterface
 
@@ -71,6 +73,13 @@ class RotationConfig:
     enterprise_mode: bool = False
     database_enabled: bool = False
     web_dashboard_enabled: bool = False
+    # OpenVPN settings
+    vpn_make_before_break: bool = False
+    vpn_standby_pool_size: int = 0
+    # Leak detection settings
+    leak_check_timeout: float = 5.0
+    leak_detection_interval: int = 300
+    stun_servers: Optional[List[str]] = None
 
 class IPRotator:
     """
@@ -124,11 +133,22 @@ class IPRotator:
         # Initialize core components
         self.proxy_manager = ProxyManager(self.logger)
         self.tor_controller = TorController(self.logger)
-        self.openvpn_manager = OpenVPNManager(self.logger)
+        self.openvpn_manager = OpenVPNManager(
+            self.logger,
+            make_before_break=self.config.vpn_make_before_break,
+            standby_pool_size=self.config.vpn_standby_pool_size
+        )
         self.security_utils = SecurityUtils(self.logger)
         self.network_monitor = NetworkMonitor(self.logger)
         self.stats_collector = StatsCollector(self.logger)
-        self.leak_detector = LeakDetector(self.logger)
+        self.leak_detector = LeakDetector(self.logger, stun_servers=self.config.stun_servers)
+        self.leak_monitor = LeakMonitor(
+            self.leak_detector,
+            self.logger,
+            network_monitor=self.network_monitor,
+            interval=self.config.leak_detection_interval,
+            deadline=self.config.leak_check_timeout
+        )
         
         # Runtime state
         self.is_running = False
@@ -171,7 +191,12 @@ class IPRotator:
                     license_key=enterprise_settings.get('license_key', ''),
                     enterprise_mode=enterprise_settings.get('enabled', False),
                     database_enabled=enterprise_settings.get('database_enabled', False),
-                    web_dashboard_enabled=enterprise_settings.get('web_dashboard_enabled', False)
+                    web_dashboard_enabled=enterprise_settings.get('web_dashboard_enabled', False),
+                    vpn_make_before_break=config_data.get('openvpn', {}).get('make_before_break', False),
+                    vpn_standby_pool_size=config_data.get('openvpn', {}).get('standby_pool_size', 0),
+                    leak_check_timeout=config_data.get('monitoring', {}).get('leak_check_timeout', 5.0),
+                    leak_detection_interval=config_data.get('monitoring', {}).get('leak_detection_interval', 300),
+                    stun_servers=security_settings.get('stun_servers')
                 )
             else:
                 # Return default configuration
@@ -226,6 +251,12 @@ class IPRotator:
         
         console.print(f"{Fore.GREEN}Starting IP rotation with methods: {', '.join(self.config.methods)}{Style.RESET_ALL}")
         
+        # Leak checks re-run on network and exit IP changes, with a
+        # periodic audit in between
+        if self.config.enable_logging:
+            self.network_monitor.start_monitoring()
+            self.leak_monitor.start()
+        
         try:
             end_time = time.time() + duration if duration else None
             
@@ -260,6 +291,9 @@ class IPRotator:
             return False
         finally:
             self.is_running = False
+            if self.config.enable_logging:
+                self.leak_monitor.stop()
+                self.network_monitor.stop_monitoring()
     
     def _rotate_ip(self) -> bool:
         """
@@ -290,7 +324,7 @@ class IPRotator:
                         
                         # Check for leaks
                         if self.config.enable_logging:
-                            self._check_security_leaks()
+                            self._check_security_leaks(new_ip.get('ip'))
                         
                         return True
                     else:
@@ -341,18 +375,22 @@ class IPRotator:
         """Rotate OpenVPN connection"""
         return self.openvpn_manager.rotate_connection()
     
-    def _check_security_leaks(self):
+    def _check_security_leaks(self, exit_ip: Optional[str] = None):
         """Check for various security leaks"""
         try:
-            # Check DNS leaks
-            dns_leak = self.leak_detector.check_dns_leak()
-            if dns_leak:
-                console.print(f"{Fore.YELLOW}⚠ DNS leak detected: {dns_leak}{Style.RESET_ALL}")
+            # Only checks affected by the new exit IP or by network changes
+            # since the last run are repeated, bounded so a slow probe
+            # cannot stall the rotation loop
+            results = self.leak_monitor.on_rotation(exit_ip)
+            if results is None:
+                self.logger.debug("No relevant changes since the last leak check")
+                return
+            
+            for test_name in results['leaks_detected']:
+                console.print(f"{Fore.YELLOW}⚠ Leak detected ({test_name}): {results['tests'][test_name]}{Style.RESET_ALL}")
             
-            # Check WebRTC leaks
-            webrtc_leak = self.leak_detector.check_webrtc_leak()
-            if webrtc_leak:
-                console.print(f"{Fore.YELLOW}⚠ WebRTC leak detected: {webrtc_leak}{Style.RESET_ALL}")
+            if results['timed_out']:
+                self.logger.warning(f"Leak checks timed out: {', '.join(results['timed_out'])}")
             
         except Exception as e:
             self.logger.error(f"Error checking for leaks: {e}")
@@ -392,14 +430,27 @@ class IPRotator:
             elif self.current_method == 'proxy' and self.proxy_manager.current_proxy:
                 proxies = self.proxy_manager.get_proxy_dict()
             
+            geolocation = get_geolocation_service(self.logger)
+            
             response = requests.get('https://ipapi.co/json/', proxies=proxies, timeout=self.config.timeout, verify=False)
             if response.status_code == 200:
-                return response.json()
+                data = response.json()
+                
+                # Later lookups of this exit IP are answered from the cache
+                if data.get('ip'):
+                    geolocation.store(data['ip'], data, 'ipapi.co')
+                return data
             else:
-                # Fallback to simple IP check
+                # Fallback to simple IP check, located from the cache or
+                # offline database when available
                 response = requests.get('https://httpbin.org/ip', proxies=proxies, timeout=self.config.timeout, verify=False)
                 if response.status_code == 200:
-                    return {'ip': response.json().get('origin')}
+                    ip = response.json().get('origin')
+                    info = {'ip': ip}
+                    country = geolocation.country(ip)
+                    if country:
+                        info['country'] = country
+                    return info
         except Exception as e:
             self.logger.error(f"Error getting current IP: {e}")
         
@@ -0,0 +1,46 @@
+"""Shared pytest configuration for the CyberRotate Pro test suite"""
+
+import sys
+import asyncio
+import logging
+from pathlib import Path
+
+import pytest
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.database_manager import DatabaseManager, SQLITE_ASYNC_AVAILABLE
+
+def run(coro):
+    """Run a coroutine to completion on a fresh event loop"""
+    return asyncio.run(coro)
+
+async def execute(conn, query, params=()):
+    """Run a query on a pooled SQLite connection and return every row"""
+    if SQLITE_ASYNC_AVAILABLE:
+        cursor = await conn.execute(query, params)
+        return await cursor.fetchall()
+    return conn.execute(query, params).fetchall()
+
+async def fetchall(db, query, params=()):
+    """Run a query on one of a DatabaseManager's connections"""
+    async with db.get_connection() as conn:
+        return await execute(conn, query, params)
+
+@pytest.fixture
+def logger():
+    return logging.getLogger("cyberrotate-tests")
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / 'cyberrotate.db'
+
+@pytest.fixture
+def db(db_path):
+    """Initialized SQLite DatabaseManager, closed after the test"""
+    manager = DatabaseManager(f"sqlite:///{db_path}")
+    run(manager.initialize_database())
+    yield manager
+    run(manager.close())
@@ -0,0 +1,114 @@
+"""Tests for buffered analytics ingestion"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from core.database_manager import DatabaseManager
+from conftest import run, fetchall
+
+@pytest.fixture
+def db(db):
+    db.analytics_retry_backoff = 0.01
+    return db
+
+async def count_events(db):
+    return (await fetchall(db, "SELECT COUNT(*) FROM analytics_all"))[0][0]
+
+async def log_and_flush(db, events, **kwargs):
+    for user_id, event_type in events:
+        await db.log_analytics_event(user_id, event_type, **kwargs)
+    written = await db.flush_analytics()
+    # With aiosqlite the size-triggered flush runs alongside and writes part of the events
+    if db._analytics_size_flush is not None:
+        written += await db._analytics_size_flush
+    return written, await count_events(db)
+
+def test_batch_written(db):
+    written, stored = run(log_and_flush(db, [(1, f'event{i}') for i in range(1200)]))
+    
+    assert written == 1200
+    assert stored == 1200
+    assert db.get_analytics_ingestion_stats()['pending'] == 0
+
+def test_unknown_user_does_not_drop_batch(db):
+    # Foreign keys are not enforced, as before pooling
+    written, stored = run(log_and_flush(db, [(1, 'valid'), (999, 'unknown user')]))
+    
+    assert (written, stored) == (2, 2)
+    assert db.analytics_dropped == 0
+
+def test_bad_row_dropped_alone(db):
+    async def scenario():
+        await db.log_analytics_event(1, 'first')
+        # A value sqlite3 cannot bind fails the whole executemany
+        await db.log_analytics_event(1, 'bad', user_agent=object())
+        await db.log_analytics_event(1, 'last')
+        return await db.flush_analytics(), await count_events(db)
+    
+    assert run(scenario()) == (2, 2)
+    assert db.analytics_dropped == 1
+
+def test_transient_failure_requeues_with_backoff(db, monkeypatch):
+    write = db._write_analytics_batch
+    failures = [2]
+    
+    async def flaky(batch):
+        if failures[0]:
+            failures[0] -= 1
+            raise sqlite3.OperationalError("database is locked")
+        await write(batch)
+    
+    monkeypatch.setattr(db, '_write_analytics_batch', flaky)
+    
+    async def scenario():
+        for i in range(10):
+            await db.log_analytics_event(1, f'event{i}')
+        
+        first = await db.flush_analytics()
+        pending = db.get_analytics_ingestion_stats()['pending']
+        # Still backing off
+        skipped = await db.flush_analytics()
+        await asyncio.sleep(0.05)
+        second = await db.flush_analytics()
+        
+        order = [row[0] for row in await fetchall(db, "SELECT event_type FROM analytics_all ORDER BY id")]
+        return first, pending, skipped, second, order
+    
+    first, pending, skipped, second, order = run(scenario())
+    
+    assert (first, pending, skipped, second) == (0, 10, 0, 10)
+    assert order == [f'event{i}' for i in range(10)]
+    assert db.analytics_dropped == 0
+
+def test_persistent_failure_dropped_after_retries(db, monkeypatch):
+    async def locked(batch):
+        raise sqlite3.OperationalError("database is locked")
+    
+    monkeypatch.setattr(db, '_write_analytics_batch', locked)
+    db.analytics_max_retries = 2
+    
+    async def scenario():
+        await db.log_analytics_event(1, 'event')
+        for _ in range(3):
+            await db.flush_analytics(force=True)
+    
+    run(scenario())
+    
+    assert db.analytics_dropped == 1
+    assert db.get_analytics_ingestion_stats()['pending'] == 0
+
+def test_close_flushes_pending_events(tmp_path):
+    path = tmp_path / 'close.db'
+    
+    async def scenario():
+        db = DatabaseManager(f"sqlite:///{path}")
+        await db.initialize_database()
+        await db.log_analytics_event(1, 'event')
+        await db.close()
+    
+    run(scenario())
+    
+    with sqlite3.connect(str(path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM analytics_all").fetchone()[0] == 1
@@ -0,0 +1,199 @@
+"""Tests for the enterprise API server's rotation jobs"""
+
+import threading
+from unittest import mock
+
+import pytest
+
+# The API server pulls in Flask and the full networking stack
+for dependency in ('flask', 'flask_cors', 'flask_limiter', 'jwt', 'requests',
+                   'netifaces', 'psutil', 'stem', 'cryptography'):
+    pytest.importorskip(dependency)
+
+from core.api_server_enterprise import EnterpriseAPIServer
+from core.openvpn_manager import OpenVPNManager
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """API server with its database in tmp_path and no background monitoring"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(EnterpriseAPIServer, 'start_monitoring', lambda self: None)
+    # The config index lives beside the package, not in the working directory
+    monkeypatch.setattr(OpenVPNManager, '_load_available_configs', lambda self: None)
+    
+    server = EnterpriseAPIServer({})
+    yield server
+    server.rotation_executor.shutdown(wait=True)
+    server.db_connection.close()
+
+@pytest.fixture
+def blocked_vpn(server):
+    """Mocked VPN manager whose rotations wait until released"""
+    release = threading.Event()
+    
+    def rotate_connection(country=None):
+        release.wait(5)
+        return True
+    
+    server.vpn_manager = mock.Mock()
+    server.vpn_manager.rotate_connection.side_effect = rotate_connection
+    server.vpn_manager.connect_by_name.side_effect = lambda name: release.wait(5)
+    yield server.vpn_manager
+    release.set()
+
+def test_same_vpn_rotation_is_coalesced(server, blocked_vpn):
+    first = server.submit_rotation('vpn', {'country': 'US'})
+    second = server.submit_rotation('vpn', {'country': 'US', 'async': True})
+    
+    assert second is first
+    assert first.waiters == 2
+
+def test_vpn_rotations_for_different_countries_are_not_coalesced(server, blocked_vpn):
+    us_job = server.submit_rotation('vpn', {'country': 'US'})
+    de_job = server.submit_rotation('vpn', {'country': 'DE'})
+    
+    assert de_job is not us_job
+
+def test_vpn_rotations_for_different_servers_are_not_coalesced(server, blocked_vpn):
+    by_server = server.submit_rotation('vpn', {'server': 'us-east'})
+    by_country = server.submit_rotation('vpn', {'country': 'US'})
+    other_server = server.submit_rotation('vpn', {'server': 'us-west'})
+    
+    assert len({by_server.job_id, by_country.job_id, other_server.job_id}) == 3
+
+def test_each_country_gets_its_own_rotation(server):
+    server.vpn_manager = mock.Mock()
+    server.vpn_manager.rotate_connection.return_value = True
+    
+    jobs = [server.submit_rotation('vpn', {'country': country}) for country in ('US', 'DE')]
+    for job in jobs:
+        job.future.result(timeout=5)
+    
+    countries = sorted(call.kwargs['country'] for call in server.vpn_manager.rotate_connection.call_args_list)
+    assert countries == ['DE', 'US']
+    assert all(job.status == 'completed' for job in jobs)
+
+def test_auto_shares_the_proxy_job(server):
+    release = threading.Event()
+    server.proxy_manager = mock.Mock()
+    server.proxy_manager.rotate_proxy.side_effect = lambda: release.wait(5)
+    
+    try:
+        first = server.submit_rotation('proxy', {})
+        second = server.submit_rotation('auto', {'country': 'US'})
+        assert second is first
+    finally:
+        release.set()
+
+def test_finished_job_is_not_joined(server):
+    server.tor_controller = mock.Mock()
+    server.tor_controller.new_circuit.return_value = True
+    
+    first = server.submit_rotation('tor', {})
+    first.future.result(timeout=5)
+    second = server.submit_rotation('tor', {})
+    
+    assert second is not first
+    second.future.result(timeout=5)
+    assert server.tor_controller.new_circuit.call_count == 2
+
+@pytest.fixture
+def probes(server):
+    """Mocked service probes behind the status snapshot"""
+    server.network_monitor = mock.Mock()
+    server.network_monitor.get_public_ip.return_value = {'ip': '198.51.100.1', 'location': 'US'}
+    server.network_monitor.get_network_interfaces.return_value = {}
+    server.proxy_manager = mock.Mock()
+    server.proxy_manager.get_current_proxy.return_value = None
+    server.proxy_manager.proxies = []
+    server.proxy_manager.get_working_proxies.return_value = []
+    server.proxy_manager.get_failed_proxies.return_value = []
+    server.vpn_manager = mock.Mock()
+    server.vpn_manager.is_connected.return_value = False
+    server.tor_controller = mock.Mock()
+    server.tor_controller.is_tor_running.return_value = False
+    server.stats = mock.Mock()
+    server.stats.get_stats.return_value = {}
+    return server
+
+def test_status_is_served_from_the_snapshot(server, probes):
+    first = server.get_system_status()
+    second = server.get_system_status()
+    
+    # Collected once on first use, then served from the cache
+    assert server.network_monitor.get_public_ip.call_count == 1
+    assert second['network']['current_ip'] == first['network']['current_ip'] == '198.51.100.1'
+    assert not second['snapshot']['stale']
+    assert second['snapshot']['refresh_interval'] == server.status_refresh_interval
+
+def test_old_snapshot_is_reported_stale(server, probes):
+    server.refresh_status_snapshot()
+    server._status_snapshot_time -= server.status_refresh_interval * 2 + 1
+    
+    metadata = server.get_system_status()['snapshot']
+    assert metadata['stale']
+    assert metadata['age'] > server.status_refresh_interval * 2
+
+def test_refresh_replaces_the_snapshot(server, probes):
+    server.refresh_status_snapshot()
+    server.network_monitor.get_public_ip.return_value = {'ip': '198.51.100.2', 'location': 'DE'}
+    server.vpn_manager.is_connected.return_value = True
+    server.vpn_manager.current_config.name = 'de-1'
+    
+    server.refresh_status_snapshot()
+    status = server.get_detailed_system_status()
+    
+    assert status['network']['current_ip'] == '198.51.100.2'
+    assert status['services']['vpn'] == {'active': True, 'current': 'de-1'}
+    assert not status['snapshot']['stale']
+    assert server.network_monitor.get_public_ip.call_count == 2
+
+def test_subscriber_receives_health_change(server, probes):
+    server.refresh_status_snapshot()
+    subscriber = server.subscribe_events()
+    
+    server.vpn_manager.is_connected.return_value = True
+    server.vpn_manager.current_config.name = 'us-1'
+    server.network_monitor.get_public_ip.return_value = {'ip': '198.51.100.2', 'location': 'US'}
+    server.refresh_status_snapshot()
+    
+    event = subscriber.get_nowait()
+    assert event['type'] == 'health'
+    assert event['data'] == {
+        'services': {'vpn': {'active': True, 'current': 'us-1'}},
+        'current_ip': '198.51.100.2',
+        'previous_ip': '198.51.100.1'
+    }
+    assert subscriber.empty()
+
+def test_unchanged_health_publishes_nothing(server, probes):
+    subscriber = server.subscribe_events()
+    
+    # The first snapshot has nothing to compare against
+    server.refresh_status_snapshot()
+    server.refresh_status_snapshot()
+    
+    assert subscriber.empty()
+
+def test_unsubscribed_client_gets_no_events(server):
+    subscriber = server.subscribe_events()
+    server.unsubscribe_events(subscriber)
+    
+    server.publish_event('health', {})
+    assert subscriber.empty()
+
+def test_full_subscriber_queue_drops_events(server):
+    server.event_queue_size = 1
+    slow = server.subscribe_events()
+    
+    server.publish_event('health', {'n': 1})
+    server.publish_event('health', {'n': 2})
+    
+    assert slow.get_nowait()['data'] == {'n': 1}
+    assert slow.empty()
+
+def test_subscribers_are_capped(server):
+    server.max_event_subscribers = 1
+    
+    assert server.subscribe_events() is not None
+    assert server.subscribe_events() is None
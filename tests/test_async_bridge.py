@@ -0,0 +1,87 @@
+"""Tests for the shared background event loop"""
+
+import asyncio
+import concurrent.futures
+import threading
+
+import pytest
+
+from core.async_bridge import AsyncBridge
+
+@pytest.fixture
+def bridge():
+    bridge = AsyncBridge()
+    yield bridge
+    bridge.stop()
+
+async def current_loop_and_thread():
+    return asyncio.get_running_loop(), threading.current_thread()
+
+def test_runs_on_one_loop(bridge):
+    first = bridge.run(current_loop_and_thread())
+    second = bridge.run(current_loop_and_thread())
+    
+    assert first == second
+    assert first[1] is not threading.current_thread()
+
+def test_usable_from_many_threads(bridge):
+    async def double(x):
+        await asyncio.sleep(0.01)
+        return 2 * x
+    
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda x: bridge.run(double(x)), range(32)))
+    
+    assert results == [2 * x for x in range(32)]
+
+def test_exceptions_propagate(bridge):
+    async def fail():
+        raise ValueError("boom")
+    
+    with pytest.raises(ValueError):
+        bridge.run(fail())
+
+def test_timeout_cancels_coroutine(bridge):
+    cancelled = threading.Event()
+    
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    
+    with pytest.raises(concurrent.futures.TimeoutError):
+        bridge.run(slow(), timeout=0.05)
+    assert cancelled.wait(1)
+
+def test_run_from_loop_thread_is_rejected(bridge):
+    async def nested():
+        return bridge.run(asyncio.sleep(0))
+    
+    with pytest.raises(RuntimeError):
+        bridge.run(nested())
+
+def test_stop_cancels_background_tasks(bridge):
+    started = threading.Event()
+    cancelled = threading.Event()
+    
+    async def forever():
+        started.set()
+        try:
+            await asyncio.sleep(3600)
+        finally:
+            cancelled.set()
+    
+    bridge.submit(forever())
+    assert started.wait(1)
+    bridge.stop()
+    
+    assert cancelled.is_set()
+    assert bridge.loop.is_closed()
+
+def test_restart_after_stop(bridge):
+    bridge.run(asyncio.sleep(0))
+    bridge.stop()
+    
+    assert bridge.run(asyncio.sleep(0, result='again')) == 'again'
@@ -0,0 +1,82 @@
+"""Tests for the per-interface bandwidth ring buffer"""
+
+import pytest
+
+from core.bandwidth_series import BandwidthSeries, to_mbps
+
+def fill(series, rates, start=0.0):
+    """Append one sample per second with the given upload rates (download = 2x)"""
+    sent = recv = 0
+    series.append(start, sent, recv)
+    for i, rate in enumerate(rates, 1):
+        sent += rate
+        recv += 2 * rate
+        series.append(start + i, sent, recv)
+
+def test_latest_and_rates():
+    series = BandwidthSeries(capacity=10)
+    assert series.latest() == {}
+    
+    fill(series, [100, 300])
+    assert series.latest() == {'upload_speed': 300.0, 'download_speed': 600.0}
+    assert series.rate(60) == {'upload_speed': 200.0, 'download_speed': 400.0}
+    # Only the newest two samples are inside a one second window
+    assert series.rate(1) == {'upload_speed': 300.0, 'download_speed': 600.0}
+
+def test_ring_buffer_wraps():
+    series = BandwidthSeries(capacity=4)
+    fill(series, [10, 20, 30, 40, 50, 60])
+    
+    assert len(series) == 4
+    assert series.total == 7
+    assert [s['upload_speed'] for s in series.samples()] == [30.0, 40.0, 50.0, 60.0]
+    assert [s['timestamp'] for s in series.samples()] == [3.0, 4.0, 5.0, 6.0]
+
+def test_counter_reset_is_skipped():
+    series = BandwidthSeries(capacity=10)
+    series.append(0.0, 1000, 1000)
+    series.append(1.0, 2000, 2000)
+    series.append(2.0, 10, 10)
+    
+    assert series.latest() == {'upload_speed': 0.0, 'download_speed': 0.0}
+    assert series.rate(60)['upload_speed'] == 0.0
+
+def test_ewma():
+    series = BandwidthSeries(capacity=10, ewma_alpha=0.5)
+    fill(series, [100, 200])
+    
+    # Seeded with the first rate, then 100 + 0.5 * (200 - 100)
+    assert series.ewma()['upload_speed'] == pytest.approx(150.0)
+    assert series.ewma()['download_speed'] == pytest.approx(300.0)
+
+def test_percentiles_exclude_first_sample():
+    series = BandwidthSeries(capacity=100)
+    assert series.percentiles() == {}
+    
+    fill(series, list(range(1, 21)))
+    upload = series.percentiles(points=(50, 95, 100))['upload_speed']
+    assert upload == {'p50': 10.0, 'p95': 19.0, 'p100': 20.0}
+
+def test_percentiles_are_nearest_rank():
+    series = BandwidthSeries(capacity=10)
+    fill(series, [1, 2, 3, 4, 5])
+    
+    # Rank ceil(p/100 * n): 2.5 -> 3 and 4.75 -> 5, never rounded to even
+    upload = series.percentiles(points=(0, 50, 95, 100))['upload_speed']
+    assert upload == {'p0': 1.0, 'p50': 3.0, 'p95': 5.0, 'p100': 5.0}
+
+def test_percentiles_after_wrap_use_every_slot():
+    series = BandwidthSeries(capacity=5)
+    fill(series, [1, 2, 3, 4, 5, 6, 7])
+    
+    assert series.percentiles(points=(0, 100))['upload_speed'] == {'p0': 3.0, 'p100': 7.0}
+
+def test_summary_and_units():
+    series = BandwidthSeries(capacity=10)
+    assert series.summary()['last_sample'] is None
+    
+    fill(series, [125000])
+    summary = series.summary(window=60)
+    assert summary['samples'] == 2
+    assert summary['last_sample'] == 1.0
+    assert to_mbps(summary['average']['upload_speed']) == pytest.approx(1.0)
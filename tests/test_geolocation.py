@@ -0,0 +1,137 @@
+"""Tests for the offline geolocation database and lookup cache"""
+
+import pytest
+
+pytest.importorskip("requests")
+
+from utils.geolocation import OfflineGeoDatabase, GeolocationService, build_offline_database
+
+@pytest.fixture
+def geo_db(tmp_path):
+    csv_path = tmp_path / 'ranges.csv'
+    # Unsorted on purpose, with rows that must be skipped
+    csv_path.write_text(
+        "8.8.8.0,8.8.8.255,US\n"
+        "1.0.0.0,1.0.0.255,au\n"
+        "2001:db8::,2001:db8::ffff,DE\n"
+        "not-an-ip,1.2.3.4,FR\n"
+        "9.9.9.0,9.9.9.255,USA\n"
+        "1.0.4.0,1.0.7.255,AU\n"
+    )
+    
+    db_path = tmp_path / 'geoip.db'
+    assert build_offline_database(str(csv_path), str(db_path)) == 4
+    
+    db = OfflineGeoDatabase(str(db_path))
+    yield db
+    db.close()
+
+@pytest.mark.parametrize('ip, country', [
+    ('1.0.0.0', 'AU'),
+    ('1.0.0.255', 'AU'),
+    ('1.0.5.17', 'AU'),
+    ('8.8.8.8', 'US'),
+    ('2001:db8::1', 'DE'),
+    ('1.0.1.0', None),       # between ranges
+    ('0.255.255.255', None),  # before the first range
+    ('255.255.255.255', None),
+    ('9.9.9.9', None),       # invalid country code was skipped
+    ('2001:db8::1:0', None),
+    ('not-an-ip', None),
+])
+def test_offline_lookup(geo_db, ip, country):
+    assert geo_db.country(ip) == country
+
+def test_rejects_invalid_file(tmp_path):
+    path = tmp_path / 'bogus.db'
+    path.write_bytes(b'NOTGEO' + b'\0' * 40)
+    
+    with pytest.raises(ValueError):
+        OfflineGeoDatabase(str(path))
+
+def test_rejects_truncated_file(tmp_path, geo_db):
+    path = tmp_path / 'truncated.db'
+    path.write_bytes(open(geo_db.path, 'rb').read()[:-1])
+    
+    with pytest.raises(ValueError):
+        OfflineGeoDatabase(str(path))
+
+def test_offline_fallback(logger, geo_db):
+    service = GeolocationService(logger, offline_db_path=geo_db.path, online=False)
+    
+    assert service.lookup('8.8.8.8') == {'ip': '8.8.8.8', 'country': 'US', 'source': 'offline'}
+    assert service.country('1.0.0.1') == 'AU'
+    assert service.lookup('1.0.1.0') == {}
+
+def test_cache_lru_and_ttl(logger, monkeypatch):
+    service = GeolocationService(logger, offline_db_path=None, cache_size=2, ttl=10, online=False)
+    now = [1000.0]
+    monkeypatch.setattr('utils.geolocation.time.time', lambda: now[0])
+    
+    service.store('1.1.1.1', {'country': 'AU'})
+    service.store('2.2.2.2', {'country': 'FR'})
+    assert service.lookup('1.1.1.1') == {'country': 'AU'}
+    
+    # 2.2.2.2 is now least recently used
+    service.store('3.3.3.3', {'country': 'US'})
+    assert service.lookup('2.2.2.2') == {}
+    assert service.lookup('1.1.1.1') == {'country': 'AU'}
+    
+    now[0] += 11
+    assert service.lookup('1.1.1.1') == {}
+    
+    stats = service.get_cache_stats()
+    assert stats['hits'] == 2
+    assert stats['offline_db'] is None
+
+class FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self._data = data
+    
+    def json(self):
+        return self._data
+
+def test_unreachable_service_is_skipped_for_every_address(logger, geo_db, monkeypatch):
+    import requests
+    
+    now = [1000.0]
+    calls = []
+    
+    def offline_get(url, **kwargs):
+        calls.append(url)
+        raise requests.ConnectionError("network is unreachable")
+    
+    monkeypatch.setattr('utils.geolocation.time.time', lambda: now[0])
+    monkeypatch.setattr('utils.geolocation.requests.get', offline_get)
+    service = GeolocationService(logger, offline_db_path=geo_db.path, failure_ttl=60)
+    
+    assert service.lookup('8.8.8.8')['country'] == 'US'
+    assert service.lookup('1.0.0.1')['country'] == 'AU'
+    assert service.lookup('2001:db8::1')['country'] == 'DE'
+    assert len(calls) == 1
+    
+    now[0] += 61
+    assert service.lookup('1.0.4.1')['country'] == 'AU'
+    assert len(calls) == 2
+
+def test_failed_lookup_is_cached_briefly(logger, monkeypatch):
+    now = [1000.0]
+    responses = [FakeResponse(429), FakeResponse(200, {'country': 'US'})]
+    calls = []
+    
+    def get(url, **kwargs):
+        calls.append(url)
+        return responses.pop(0)
+    
+    monkeypatch.setattr('utils.geolocation.time.time', lambda: now[0])
+    monkeypatch.setattr('utils.geolocation.requests.get', get)
+    service = GeolocationService(logger, offline_db_path=None, failure_ttl=30)
+    
+    assert service.lookup('8.8.8.8') == {}
+    assert service.lookup('8.8.8.8') == {}
+    assert len(calls) == 1
+    
+    now[0] += 31
+    assert service.lookup('8.8.8.8') == {'country': 'US'}
+    assert len(calls) == 2
@@ -0,0 +1,93 @@
+"""Tests for the VPN server latency prober"""
+
+import socket
+import threading
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from core.latency_prober import LatencyProber
+
+@dataclass
+class Config:
+    name: str
+    server: str
+    port: int
+    protocol: str = 'udp'
+    country: str = ''
+
+@pytest.fixture
+def udp_responder():
+    """Local UDP server answering every datagram"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(0.1)
+    running = True
+    
+    def serve():
+        while running:
+            try:
+                data, addr = sock.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            sock.sendto(data, addr)
+    
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield sock.getsockname()[1]
+    running = False
+    thread.join()
+    sock.close()
+
+def silent_port():
+    """UDP port that is bound but never answers"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    return sock
+
+def test_probe_udp(logger, udp_responder):
+    prober = LatencyProber(logger, timeout=1.0)
+    result = prober.probe('127.0.0.1', udp_responder, 'udp')
+    
+    assert result.reachable
+    assert prober.get_cached('127.0.0.1', udp_responder, 'udp') is result
+
+def test_cold_select_probes_one_round_inline(logger, udp_responder):
+    silent = [silent_port() for _ in range(6)]
+    configs = [Config('fast', '127.0.0.1', udp_responder)]
+    configs += [Config(f'silent{i}', '127.0.0.1', s.getsockname()[1]) for i, s in enumerate(silent)]
+    
+    prober = LatencyProber(logger, timeout=0.3, max_workers=2)
+    
+    start = time.time()
+    prober.select(configs)
+    # One round of two probes, not ceil(7/2) rounds
+    assert time.time() - start < 0.6
+    
+    # The rest is measured in the background
+    prober._refresh_thread.join(5)
+    for config in configs:
+        assert prober.get_cached(config.server, config.port, config.protocol)
+    assert prober.select(configs).name == 'fast'
+    
+    for s in silent:
+        s.close()
+
+def test_expired_results_are_used_while_refreshing(logger, udp_responder):
+    configs = [Config('fast', '127.0.0.1', udp_responder)]
+    prober = LatencyProber(logger, timeout=0.5, cache_ttl=0.01)
+    prober.probe_configs(configs)
+    time.sleep(0.02)
+    
+    assert prober.get_cached('127.0.0.1', udp_responder) is None
+    assert prober.select(configs).name == 'fast'
+    prober._refresh_thread.join(5)
+
+def test_country_filter(logger):
+    configs = [Config('us', '127.0.0.1', 1, country='US')]
+    prober = LatencyProber(logger, timeout=0.1)
+    
+    assert prober.select(configs, country='de') is None
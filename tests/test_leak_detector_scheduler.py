@@ -0,0 +1,74 @@
+"""Tests for deadline-bounded leak check scheduling"""
+
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from utils.leak_detector import LeakDetector
+
+def check(delay=0.0, leak=False, error=None):
+    def run(context=None):
+        time.sleep(delay)
+        if error:
+            raise error
+        return {'leak_detected': leak}
+    return run
+
+@pytest.fixture
+def detector(logger, monkeypatch):
+    detector = LeakDetector(logger)
+    monkeypatch.setattr(detector, '_get_public_ip', lambda: '203.0.113.1')
+    for name in ('dns_leak', 'webrtc_leak', 'ipv6_leak', 'timezone_leak', 'geolocation_consistency'):
+        monkeypatch.setattr(detector, f'check_{name}', check())
+    return detector
+
+def test_runs_selected_checks(detector):
+    results = detector.check_all_leaks(checks=['dns_leak', 'ipv6_leak', 'unknown'])
+    
+    assert set(results['tests']) == {'dns_leak', 'ipv6_leak'}
+    assert results['leaks_detected'] == []
+    assert results['timed_out'] == []
+
+def test_leaks_and_errors_reported(detector, monkeypatch):
+    monkeypatch.setattr(detector, 'check_dns_leak', check(leak=True))
+    monkeypatch.setattr(detector, 'check_ipv6_leak', check(error=RuntimeError("no route")))
+    
+    results = detector.check_all_leaks()
+    
+    assert results['leaks_detected'] == ['dns_leak']
+    assert results['total_leaks'] == 1
+    assert results['tests']['ipv6_leak'] == {'error': 'no route'}
+
+def test_budget_exceeded_is_timed_out(detector, monkeypatch):
+    monkeypatch.setattr(detector, 'check_webrtc_leak', check(delay=2.0))
+    
+    start = time.time()
+    results = detector.check_all_leaks(deadline=5, budgets={'webrtc_leak': 0.2})
+    
+    assert time.time() - start < 1.0
+    assert results['timed_out'] == ['webrtc_leak']
+    assert results['tests']['webrtc_leak']['timed_out']
+    assert results['tests']['dns_leak'] == {'leak_detected': False}
+
+def test_run_deadline_caps_budgets(detector, monkeypatch):
+    monkeypatch.setattr(detector, 'check_dns_leak', check(delay=2.0))
+    monkeypatch.setattr(detector, 'check_ipv6_leak', check(delay=2.0))
+    
+    start = time.time()
+    results = detector.check_all_leaks(deadline=0.3, budgets={'dns_leak': 10})
+    
+    assert time.time() - start < 1.0
+    assert sorted(results['timed_out']) == ['dns_leak', 'ipv6_leak']
+
+def test_fail_fast_skips_pending_checks(detector, monkeypatch):
+    monkeypatch.setattr(detector, 'check_dns_leak', check(leak=True))
+    monkeypatch.setattr(detector, 'check_webrtc_leak', check(delay=2.0))
+    
+    start = time.time()
+    results = detector.check_all_leaks(checks=['dns_leak', 'webrtc_leak'], deadline=5, fail_fast=True)
+    
+    assert time.time() - start < 1.0
+    assert results['leaks_detected'] == ['dns_leak']
+    assert results['skipped'] == ['webrtc_leak']
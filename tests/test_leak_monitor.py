@@ -0,0 +1,78 @@
+"""Tests for incremental leak monitoring"""
+
+import pytest
+
+from utils.leak_monitor import LeakMonitor, LEAK_CHECKS
+
+class FakeLeakDetector:
+    """Records requested checks and reports the configured ones as unfinished"""
+    
+    def __init__(self):
+        self.calls = []
+        self.timed_out = []
+    
+    def check_all_leaks(self, checks=None, deadline=None, fail_fast=False, budgets=None):
+        self.calls.append(list(checks))
+        return {
+            'tests': {name: {'leak_detected': False} for name in checks if name not in self.timed_out},
+            'leaks_detected': [],
+            'timed_out': [name for name in checks if name in self.timed_out],
+            'skipped': []
+        }
+
+@pytest.fixture
+def monitor(logger, tmp_path):
+    resolv_conf = tmp_path / 'resolv.conf'
+    resolv_conf.write_text('nameserver 10.0.0.1\n')
+    return LeakMonitor(FakeLeakDetector(), logger, resolv_conf=str(resolv_conf))
+
+def test_first_rotation_runs_everything(monitor):
+    monitor.on_rotation('1.2.3.4')
+    assert monitor.leak_detector.calls == [LEAK_CHECKS]
+
+def test_unchanged_rotation_is_skipped(monitor):
+    monitor.on_rotation('1.2.3.4')
+    assert monitor.on_rotation('1.2.3.4') is None
+    assert monitor.skipped_runs == 1
+
+def test_exit_ip_change_reruns_dependent_checks(monitor):
+    monitor.on_rotation('1.2.3.4')
+    monitor.on_rotation('5.6.7.8')
+    
+    assert monitor.leak_detector.calls[-1] == ['webrtc_leak']
+
+def test_checks_run_per_rotation(monitor):
+    monitor.on_rotation('10.0.0.1')
+    calls = monitor.leak_detector.calls
+    
+    for i in range(2, 12):
+        before = sum(len(call) for call in calls)
+        monitor.on_rotation(f'10.0.0.{i}')
+        assert sum(len(call) for call in calls) - before == 1
+    
+    assert monitor.runs == 11
+
+def test_network_change_marks_checks_stale(monitor):
+    monitor.on_rotation('1.2.3.4')
+    monitor._on_network_change({'kinds': ['address']})
+    
+    assert monitor.get_stale_checks() == ['webrtc_leak', 'ipv6_leak']
+
+def test_resolv_conf_change_reruns_dns_check(monitor):
+    monitor.on_rotation('1.2.3.4')
+    with open(monitor.resolv_conf, 'a') as f:
+        f.write('nameserver 10.0.0.2\n')
+    
+    monitor.run_pending()
+    assert monitor.leak_detector.calls[-1] == ['dns_leak']
+
+def test_unfinished_checks_stay_stale(monitor):
+    monitor.leak_detector.timed_out = ['webrtc_leak']
+    monitor.on_rotation('1.2.3.4')
+    
+    assert monitor.get_stale_checks() == ['webrtc_leak']
+    assert 'webrtc_leak' not in monitor.results
+
+def test_audit_round_robin(monitor):
+    audited = [monitor.audit() and monitor.leak_detector.calls[-1][0] for _ in range(len(LEAK_CHECKS) + 1)]
+    assert audited == LEAK_CHECKS + LEAK_CHECKS[:1]
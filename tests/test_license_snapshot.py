@@ -0,0 +1,144 @@
+"""Tests for cached license decisions"""
+
+import asyncio
+import datetime
+import time
+
+import pytest
+
+pytest.importorskip("cryptography")
+pytest.importorskip("requests")
+
+from core.license_manager import LicenseInfo, LicenseSnapshot, LicenseManager, FEATURE_BITS
+
+def license_info(features=('api', 'enterprise_features'), valid=True, days=30):
+    now = datetime.datetime.now()
+    return LicenseInfo(
+        license_key='KEY',
+        license_type='enterprise',
+        organization='Example',
+        max_users=25,
+        features=list(features),
+        issue_date=now - datetime.timedelta(days=1),
+        expiry_date=now + datetime.timedelta(days=days),
+        valid=valid,
+        last_validated=now
+    )
+
+def test_empty_snapshot_allows_nothing():
+    snapshot = LicenseSnapshot.from_license_info(None)
+    
+    assert not snapshot.allows()
+    assert not snapshot.allows('api')
+    assert snapshot.max_users == 1
+
+def test_feature_bits():
+    snapshot = LicenseSnapshot.from_license_info(license_info())
+    
+    assert snapshot.allows()
+    assert snapshot.allows('api')
+    assert snapshot.allows('enterprise_features')
+    assert not snapshot.allows('never_licensed')
+    assert snapshot.max_users == 25
+    
+    # Bits are shared, so a feature keeps its bit across snapshots
+    other = LicenseSnapshot.from_license_info(license_info(features=('api',)))
+    assert other.feature_bits == FEATURE_BITS['api']
+    assert not other.allows('enterprise_features')
+
+def test_invalid_license():
+    assert not LicenseSnapshot.from_license_info(license_info(valid=False)).allows('api')
+
+def test_expiry():
+    snapshot = LicenseSnapshot.from_license_info(license_info(days=-1))
+    
+    assert not snapshot.allows()
+    assert not snapshot.allows('api')
+    assert snapshot.expires_at < time.time()
+
+def test_snapshot_is_immutable():
+    snapshot = LicenseSnapshot.from_license_info(license_info())
+    
+    with pytest.raises(AttributeError):
+        snapshot.valid = False
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    # No background validation task in tests
+    monkeypatch.setattr(LicenseManager, '_start_validation_thread', lambda self: None)
+    return LicenseManager(local_cache_path=str(tmp_path / 'license_cache.json'))
+
+def test_key_derived_lazily_once(manager, monkeypatch):
+    calls = []
+    derive = LicenseManager._get_encryption_key
+    monkeypatch.setattr(LicenseManager, '_get_encryption_key',
+                        lambda self: calls.append(1) or derive(self))
+    
+    assert manager._encryption_key is None
+    assert manager.encryption_key == manager.encryption_key
+    assert calls == [1]
+
+def test_assigning_license_info_swaps_snapshot(manager):
+    assert not manager.is_feature_enabled('api')
+    
+    manager.license_info = license_info()
+    assert manager.is_feature_enabled('api')
+    assert manager.get_max_users() == 25
+    
+    manager.license_info = None
+    assert not manager.is_feature_enabled('api')
+    assert manager.get_max_users() == 1
+
+def test_cache_rewritten_only_on_change(manager, monkeypatch):
+    encrypted = []
+    encrypt = manager._encrypt_data
+    monkeypatch.setattr(manager, '_encrypt_data', lambda data: encrypted.append(data) or encrypt(data))
+    
+    manager.local_cache['KEY'] = {'license_key': 'KEY', 'features': ['api']}
+    manager._save_cache()
+    mtime = manager.local_cache_path.stat().st_mtime_ns
+    
+    manager._save_cache()
+    assert len(encrypted) == 1
+    assert manager.local_cache_path.stat().st_mtime_ns == mtime
+    
+    manager.local_cache['KEY'] = {'license_key': 'KEY', 'features': ['api', 'analytics']}
+    manager._save_cache()
+    assert len(encrypted) == 2
+
+def test_revalidation_without_changes_writes_nothing(manager, monkeypatch):
+    now = datetime.datetime.now()
+    server_calls = []
+    
+    async def check_license_server(license_key):
+        server_calls.append(license_key)
+        return {
+            'valid': True,
+            'license_type': 'enterprise',
+            'organization': 'Example',
+            'max_users': 25,
+            'enabled_features': ['api'],
+            'issue_date': (now - datetime.timedelta(days=1)).isoformat(),
+            'expiry_date': (now + datetime.timedelta(days=30)).isoformat()
+        }
+    
+    encrypted = []
+    encrypt = manager._encrypt_data
+    monkeypatch.setattr(manager, '_encrypt_data', lambda data: encrypted.append(data) or encrypt(data))
+    monkeypatch.setattr(manager, '_check_license_server', check_license_server)
+    # Every validation goes to the server
+    manager.validation_interval = 0
+    
+    asyncio.run(manager.validate_license('KEY'))
+    mtime = manager.local_cache_path.stat().st_mtime_ns
+    contents = manager.local_cache_path.read_text()
+    
+    time.sleep(0.01)
+    info = asyncio.run(manager.validate_license('KEY'))
+    
+    assert len(server_calls) == 2
+    assert len(encrypted) == 1
+    assert manager.local_cache_path.stat().st_mtime_ns == mtime
+    assert manager.local_cache_path.read_text() == contents
+    # The in-memory entry still carries the latest validation time
+    assert manager.local_cache['KEY']['last_validated'] == str(info.last_validated)
@@ -0,0 +1,36 @@
+"""Tests for the rtnetlink change watcher"""
+
+import threading
+
+import pytest
+
+from core.netlink_watcher import NetlinkWatcher, NLMSG_HEADER, netlink_available
+
+def message(msg_type, payload=b''):
+    return NLMSG_HEADER.pack(NLMSG_HEADER.size + len(payload), msg_type, 0, 0, 0) + payload
+
+def test_parse_batched_messages(logger):
+    watcher = NetlinkWatcher(logger, lambda kinds: None)
+    
+    # Payloads are padded to 4 byte boundaries
+    data = message(16, b'abc\0') + message(21) + message(24, b'x' * 8) + message(3)
+    assert watcher._parse(data) == {'link', 'address', 'route'}
+
+def test_parse_truncated_buffer(logger):
+    watcher = NetlinkWatcher(logger, lambda kinds: None)
+    
+    assert watcher._parse(message(20)[:-2]) == set()
+    assert watcher._parse(NLMSG_HEADER.pack(0, 16, 0, 0, 0)) == set()
+
+@pytest.mark.skipif(not netlink_available(), reason="rtnetlink requires Linux")
+def test_stop_immediately_after_start(logger, monkeypatch):
+    errors = []
+    monkeypatch.setattr(threading, 'excepthook', lambda args: errors.append(args.exc_value))
+    
+    for _ in range(5):
+        watcher = NetlinkWatcher(logger, lambda kinds: None)
+        if not watcher.start():
+            pytest.skip("rtnetlink socket unavailable")
+        watcher.stop()
+    
+    assert errors == []
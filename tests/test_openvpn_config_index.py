@@ -0,0 +1,162 @@
+"""Tests for the persistent OpenVPN config index"""
+
+import os
+
+import pytest
+
+from core.openvpn_config_index import OpenVPNConfigIndex
+
+class CountingParser:
+    """Parses a file into one entry holding its contents, recording each call"""
+    
+    def __init__(self):
+        self.parsed = []
+    
+    def __call__(self, path):
+        name = os.path.basename(path)
+        self.parsed.append(name)
+        with open(path) as f:
+            return [{'name': name, 'content': f.read()}]
+
+@pytest.fixture
+def config_dir(tmp_path):
+    path = tmp_path / 'configs'
+    path.mkdir()
+    return path
+
+@pytest.fixture
+def parser():
+    return CountingParser()
+
+@pytest.fixture
+def make_index(tmp_path, config_dir, parser, logger):
+    def make():
+        return OpenVPNConfigIndex(str(config_dir), logger, parser,
+                                  index_path=str(tmp_path / 'index.json'))
+    return make
+
+def write(path, content, mtime_ns=None):
+    path.write_text(content)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def contents(configs):
+    return {config['name']: config['content'] for config in configs}
+
+def test_initial_scan_then_unchanged(config_dir, parser, make_index):
+    write(config_dir / 'us.ovpn', 'remote us 1194')
+    write(config_dir / 'notes.txt', 'ignored')
+    index = make_index()
+    
+    configs, changed = index.refresh()
+    assert changed
+    assert contents(configs) == {'us.ovpn': 'remote us 1194'}
+    
+    configs, changed = index.refresh()
+    assert not changed
+    assert contents(configs) == {'us.ovpn': 'remote us 1194'}
+    assert parser.parsed == ['us.ovpn']
+
+def test_added_file_is_parsed_alone(config_dir, parser, make_index):
+    write(config_dir / 'us.ovpn', 'remote us 1194')
+    index = make_index()
+    index.refresh()
+    
+    write(config_dir / 'de.ovpn', 'remote de 1194')
+    configs, changed = index.refresh()
+    
+    assert changed
+    assert parser.parsed == ['us.ovpn', 'de.ovpn']
+    assert [config['name'] for config in configs] == ['de.ovpn', 'us.ovpn']
+
+def test_modified_file_is_reparsed(config_dir, parser, make_index):
+    write(config_dir / 'us.ovpn', 'remote us 1194', mtime_ns=1_000_000_000)
+    write(config_dir / 'de.ovpn', 'remote de 1194')
+    index = make_index()
+    index.refresh()
+    
+    write(config_dir / 'us.ovpn', 'remote us-east 443', mtime_ns=2_000_000_000)
+    configs, changed = index.refresh()
+    
+    assert changed
+    assert sorted(parser.parsed) == ['de.ovpn', 'us.ovpn', 'us.ovpn']
+    assert contents(configs)['us.ovpn'] == 'remote us-east 443'
+
+def test_same_size_rewrite_is_detected_by_mtime(config_dir, parser, make_index):
+    write(config_dir / 'us.ovpn', 'remote us1 1194', mtime_ns=1_000_000_000)
+    index = make_index()
+    index.refresh()
+    
+    write(config_dir / 'us.ovpn', 'remote us2 1194', mtime_ns=1_000_000_001)
+    configs, changed = index.refresh()
+    
+    assert changed
+    assert contents(configs) == {'us.ovpn': 'remote us2 1194'}
+
+def test_same_size_rewrite_with_restored_mtime_is_not_seen(config_dir, parser, make_index):
+    # Change detection is by (mtime, size) only; contents are not hashed
+    write(config_dir / 'us.ovpn', 'remote us1 1194', mtime_ns=1_000_000_000)
+    index = make_index()
+    index.refresh()
+    
+    write(config_dir / 'us.ovpn', 'remote us2 1194', mtime_ns=1_000_000_000)
+    configs, changed = index.refresh()
+    
+    assert not changed
+    assert contents(configs) == {'us.ovpn': 'remote us1 1194'}
+
+def test_deleted_file_is_dropped(config_dir, parser, make_index):
+    write(config_dir / 'us.ovpn', 'remote us 1194')
+    write(config_dir / 'de.ovpn', 'remote de 1194')
+    index = make_index()
+    index.refresh()
+    
+    (config_dir / 'de.ovpn').unlink()
+    configs, changed = index.refresh()
+    
+    assert changed
+    assert contents(configs) == {'us.ovpn': 'remote us 1194'}
+    assert len(parser.parsed) == 2
+
+def test_servers_json_comes_last(config_dir, make_index):
+    write(config_dir / 'servers.json', '[]')
+    write(config_dir / 'zz.ovpn', 'remote zz 1194')
+    write(config_dir / 'aa.ovpn', 'remote aa 1194')
+    
+    configs, _ = make_index().refresh()
+    assert [config['name'] for config in configs] == ['aa.ovpn', 'zz.ovpn', 'servers.json']
+
+def test_persisted_index_skips_parsing_on_restart(config_dir, parser, make_index):
+    write(config_dir / 'us.ovpn', 'remote us 1194')
+    make_index().refresh()
+    
+    configs, changed = make_index().refresh()
+    
+    assert not changed
+    assert contents(configs) == {'us.ovpn': 'remote us 1194'}
+    assert parser.parsed == ['us.ovpn']
+
+def test_index_for_another_directory_is_ignored(tmp_path, config_dir, parser, make_index, logger):
+    write(config_dir / 'us.ovpn', 'remote us 1194')
+    make_index().refresh()
+    
+    other_dir = tmp_path / 'other'
+    other_dir.mkdir()
+    write(other_dir / 'us.ovpn', 'remote other 1194')
+    other = OpenVPNConfigIndex(str(other_dir), logger, parser, index_path=str(tmp_path / 'index.json'))
+    
+    configs, changed = other.refresh()
+    assert changed
+    assert contents(configs) == {'us.ovpn': 'remote other 1194'}
+
+def test_missing_directory_keeps_entries(config_dir, make_index):
+    write(config_dir / 'us.ovpn', 'remote us 1194')
+    index = make_index()
+    index.refresh()
+    
+    (config_dir / 'us.ovpn').unlink()
+    config_dir.rmdir()
+    configs, changed = index.refresh()
+    
+    assert not changed
+    assert contents(configs) == {'us.ovpn': 'remote us 1194'}
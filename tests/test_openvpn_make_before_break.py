@@ -0,0 +1,226 @@
+"""Tests for make-before-break OpenVPN rotation and standby tunnels"""
+
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("psutil")
+netifaces = pytest.importorskip("netifaces")
+
+from core.openvpn_manager import OpenVPNManager, OpenVPNConfig, StandbyTunnel
+
+class FakeProcess:
+    """Supervised OpenVPN process that records signals in a shared event log"""
+    
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+        self.returncode = None
+    
+    def poll(self):
+        return self.returncode
+    
+    def send_signal(self, sig):
+        self.events.append(('stop', self.name))
+        self.returncode = 0
+    
+    terminate = send_signal
+    
+    def wait(self, timeout=None):
+        return self.returncode
+    
+    def kill(self):
+        self.returncode = -9
+    
+    def wait_ready(self, timeout):
+        return False
+    
+    def tail(self):
+        return ''
+
+class FakeManagement:
+    """Management client that reports a fixed connection outcome"""
+    
+    def __init__(self, connected=True):
+        self.connected = connected
+        self.state = 'CONNECTED' if connected else 'EXITING'
+        self.state_description = ''
+        self.last_error = None
+        self.sock = object()
+        self.closed = False
+    
+    def attach(self, timeout=10.0, is_alive=None):
+        return True
+    
+    def wait_for_connected(self, timeout):
+        return self.connected
+    
+    def is_connected(self):
+        return self.connected and not self.closed
+    
+    def close(self):
+        self.closed = True
+
+def make_config(name, country='US', server=None):
+    return OpenVPNConfig(name=name, config_file=f'/tmp/{name}.ovpn', country=country, city='',
+                         server=server or f'{name}.example.net', port=1194, protocol='udp')
+
+@pytest.fixture
+def events():
+    return []
+
+@pytest.fixture
+def manager(logger, events, monkeypatch):
+    monkeypatch.setattr(OpenVPNManager, '_find_openvpn_binary', lambda self: '/usr/sbin/openvpn')
+    monkeypatch.setattr(OpenVPNManager, '_load_available_configs', lambda self: None)
+    monkeypatch.setattr(sys, 'platform', 'linux')
+    
+    # Mocked `ip route` and host networking
+    def run(cmd, **kwargs):
+        events.append(tuple(cmd))
+    monkeypatch.setattr('core.openvpn_manager.subprocess.run', run)
+    monkeypatch.setattr('core.openvpn_manager.netifaces.interfaces', lambda: ['lo', 'eth0', 'tun0'])
+    monkeypatch.setattr('core.openvpn_manager.netifaces.gateways',
+                        lambda: {'default': {netifaces.AF_INET: ('192.0.2.1', 'eth0')}})
+    monkeypatch.setattr('core.openvpn_manager.socket.gethostbyname',
+                        lambda host: {'old.example.net': '198.51.100.1'}.get(host, '198.51.100.2'))
+    
+    manager = OpenVPNManager(logger, make_before_break=True)
+    manager.available_configs = [make_config('old'), make_config('new'), make_config('de', 'DE')]
+    
+    # An established tunnel on tun0
+    manager.current_config = manager.available_configs[0]
+    manager.current_process = FakeProcess('old', events)
+    manager.current_management = FakeManagement()
+    manager.current_device = 'tun0'
+    manager.current_routes = [['198.51.100.1/32', 'via', '192.0.2.1'],
+                              ['0.0.0.0/1', 'dev', 'tun0'], ['128.0.0.0/1', 'dev', 'tun0']]
+    return manager
+
+@pytest.fixture
+def started(manager, events, monkeypatch):
+    """Replace process start with fakes; set 'connected' to choose the outcome"""
+    started = {'connected': True, 'tunnels': []}
+    
+    def start_openvpn(config, device=None, standby=False):
+        tunnel = (FakeProcess(config.name, events), FakeManagement(started['connected']), device, standby)
+        started['tunnels'].append(tunnel)
+        return tunnel[0], tunnel[1]
+    
+    monkeypatch.setattr(manager, '_start_openvpn', start_openvpn)
+    return started
+
+def route_commands(events, action):
+    return [event[3:] for event in events if event[:3] == ('ip', 'route', action)]
+
+def test_new_tunnel_is_promoted_before_old_is_stopped(manager, started, events):
+    old_process, old_management = manager.current_process, manager.current_management
+    
+    assert manager.connect_make_before_break(manager.available_configs[1])
+    
+    process, management, device, _ = started['tunnels'][0]
+    assert device == 'tun1'
+    assert manager.current_process is process
+    assert manager.current_management is management
+    assert manager.current_device == 'tun1'
+    assert manager.current_config.name == 'new'
+    
+    # Routes point at the new tunnel before the old process is signalled
+    assert route_commands(events, 'replace') == [
+        ('198.51.100.2/32', 'via', '192.0.2.1'),
+        ('0.0.0.0/1', 'dev', 'tun1'),
+        ('128.0.0.0/1', 'dev', 'tun1'),
+    ]
+    last_replace = max(i for i, event in enumerate(events) if event[:3] == ('ip', 'route', 'replace'))
+    assert events.index(('stop', 'old')) > last_replace
+    assert old_management.closed
+    
+    # Only the old server pin is deleted; the /1 halves were replaced in place
+    assert route_commands(events, 'del') == [('198.51.100.1/32', 'via', '192.0.2.1')]
+    assert manager._reserved_devices == set()
+
+def test_failed_new_tunnel_keeps_old_one(manager, started, events):
+    started['connected'] = False
+    old_process, old_management = manager.current_process, manager.current_management
+    
+    assert not manager.connect_make_before_break(manager.available_configs[1])
+    
+    process, management, _, _ = started['tunnels'][0]
+    assert ('stop', 'new') in events
+    assert management.closed
+    
+    assert manager.current_process is old_process
+    assert manager.current_management is old_management
+    assert manager.current_config.name == 'old'
+    assert manager.current_device == 'tun0'
+    assert old_process.poll() is None
+    assert not old_management.closed
+    assert route_commands(events, 'replace') == []
+    assert route_commands(events, 'del') == []
+    assert manager._reserved_devices == set()
+
+def test_start_failure_keeps_old_tunnel(manager, events, monkeypatch):
+    def start_openvpn(config, device=None, standby=False):
+        raise OSError("exec failed")
+    monkeypatch.setattr(manager, '_start_openvpn', start_openvpn)
+    
+    assert not manager.connect_make_before_break(manager.available_configs[1])
+    assert manager.current_config.name == 'old'
+    assert manager.current_process.poll() is None
+    assert events == []
+    assert manager._reserved_devices == set()
+
+def test_not_connected_falls_back_to_plain_connect(manager, started, monkeypatch):
+    manager.current_process.returncode = 1
+    connected = []
+    monkeypatch.setattr(manager, 'connect', lambda config=None, country=None: connected.append(config) or True)
+    
+    assert manager.connect_make_before_break(manager.available_configs[1])
+    assert connected == [manager.available_configs[1]]
+    assert started['tunnels'] == []
+
+def test_rotation_uses_standby_tunnel(manager, started, events):
+    standby = StandbyTunnel(config=manager.available_configs[2], process=FakeProcess('de', events),
+                            management=FakeManagement(), device='tun2', established_at=time.time())
+    manager.standby_tunnels = [standby]
+    
+    assert manager.rotate_connection(country='de')
+    
+    # No new process: the standby tunnel is only routed to
+    assert started['tunnels'] == []
+    assert manager.current_process is standby.process
+    assert manager.current_device == 'tun2'
+    assert manager.standby_tunnels == []
+    assert ('0.0.0.0/1', 'dev', 'tun2') in route_commands(events, 'replace')
+    assert ('stop', 'old') in events
+    assert manager._pool_refill_event.is_set()
+
+def test_standby_tunnel_for_another_country_is_left(manager, started, monkeypatch):
+    standby = StandbyTunnel(config=manager.available_configs[2], process=FakeProcess('de', []),
+                            management=FakeManagement(), device='tun2', established_at=time.time())
+    manager.standby_tunnels = [standby]
+    monkeypatch.setattr(manager.latency_prober, 'select',
+                        lambda configs, country=None: next(c for c in configs if c.country == country))
+    
+    assert manager.rotate_connection(country='US')
+    
+    assert manager.standby_tunnels == [standby]
+    assert manager.current_config.name == 'new'
+    assert started['tunnels'][0][2] == 'tun1'
+
+def test_dead_standby_tunnel_is_dropped(manager, started, events, monkeypatch):
+    dead = FakeProcess('de', events)
+    dead.returncode = 1
+    lost = FakeManagement()
+    lost.connected = False
+    manager.standby_tunnels = [
+        StandbyTunnel(config=manager.available_configs[2], process=dead,
+                      management=FakeManagement(), device='tun2', established_at=time.time()),
+        StandbyTunnel(config=manager.available_configs[1], process=FakeProcess('new', events),
+                      management=lost, device='tun3', established_at=time.time()),
+    ]
+    
+    assert manager._take_standby_tunnel() is None
+    assert manager.standby_tunnels == []
+    assert ('stop', 'new') in events
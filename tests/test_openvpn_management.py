@@ -0,0 +1,130 @@
+"""Tests for the OpenVPN management interface client"""
+
+import socket
+import threading
+
+import pytest
+
+from core.openvpn_management import OpenVPNManagementClient
+
+@pytest.fixture
+def client(logger):
+    client = OpenVPNManagementClient(logger, name="test")
+    yield client
+    client.close()
+
+def test_state_notification(client):
+    client._handle_line('>STATE:1700000000,CONNECTED,SUCCESS,10.8.0.6,198.51.100.7,1194,,')
+    
+    assert client.is_connected()
+    assert client.wait_for_connected(0)
+    assert client.get_status()['description'] == 'SUCCESS'
+    assert (client.local_ip, client.remote_ip, client.remote_port) == ('10.8.0.6', '198.51.100.7', '1194')
+
+def test_intermediate_states_keep_earlier_addresses(client):
+    client._handle_line('>STATE:1700000000,ASSIGN_IP,,10.8.0.6,,,,')
+    client._handle_line('>STATE:1700000001,ADD_ROUTES,,,,,,')
+    
+    assert client.state == 'ADD_ROUTES'
+    assert client.local_ip == '10.8.0.6'
+    assert not client.is_connected()
+
+def test_state_command_reply(client):
+    # Replies to the one-shot 'state' command carry no '>STATE:' prefix
+    client._handle_line('1700000000,CONNECTED,SUCCESS,10.8.0.6,198.51.100.7,1194,,')
+    
+    assert client.is_connected()
+    assert client.remote_ip == '198.51.100.7'
+
+def test_reconnect_clears_connected(client):
+    client._handle_line('>STATE:1700000000,CONNECTED,SUCCESS,10.8.0.6,198.51.100.7,1194,,')
+    client._handle_line('>STATE:1700000050,RECONNECTING,ping-restart,,,,,')
+    
+    assert not client.is_connected()
+    assert client.state_description == 'ping-restart'
+
+def test_bytecount(client):
+    client._handle_line('>BYTECOUNT:1024,2048')
+    
+    assert (client.bytes_in, client.bytes_out) == (1024, 2048)
+
+def test_fatal_fails_the_connection(client):
+    client._handle_line('>FATAL:Cannot open TUN/TAP dev /dev/net/tun')
+    
+    assert client.state == 'EXITING'
+    assert client.last_error == 'Cannot open TUN/TAP dev /dev/net/tun'
+    # Failure ends the wait at once instead of running out the timeout
+    assert not client.wait_for_connected(5)
+
+def test_password_verification_failed(client):
+    client._handle_line(">PASSWORD:Need 'Auth' username/password")
+    assert client.state == 'INITIAL'
+    
+    client._handle_line(">PASSWORD:Verification Failed: 'Auth'")
+    assert client.state == 'EXITING'
+    assert client.last_error == 'authentication failed'
+
+def test_log_lines_do_not_change_state(client):
+    client._handle_line('>LOG:1700000000,N,Initialization Sequence Completed')
+    client._handle_line('>LOG:1700000000,,no flags')
+    client._handle_line('>LOG:truncated')
+    
+    assert client.state == 'INITIAL'
+
+@pytest.mark.parametrize('line', [
+    '>STATE:',
+    '>STATE:1700000000',
+    '>BYTECOUNT:',
+    '>BYTECOUNT:12',
+    '>BYTECOUNT:abc,def',
+    '>HOLD:Waiting for hold release:0',
+    'SUCCESS: real-time state notification set to ON',
+    'ERROR: unknown command, enter \'help\' for more options',
+    'END',
+    '1700000000',
+    '',
+])
+def test_malformed_and_unrelated_lines_are_ignored(client, line):
+    client._handle_line('>BYTECOUNT:5,6')
+    client._handle_line(line)
+    
+    assert client.state == 'INITIAL'
+    assert (client.bytes_in, client.bytes_out) == (5, 6)
+    assert client.last_error is None
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="requires Unix sockets")
+def test_attach_reads_notifications(client):
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(client.address)
+    server.listen(1)
+    received = []
+    release = threading.Event()
+    
+    def fake_openvpn():
+        conn, _ = server.accept()
+        with conn:
+            # Split records across reads, with CRLF line endings as OpenVPN sends
+            conn.sendall(b'>INFO:OpenVPN Management Interface Version 5\r\n>STATE:1700000000,CONN')
+            conn.sendall(b'ECTED,SUCCESS,10.8.0.6,198.51.100.7,1194,,\r\n>BYTECOUNT:10,20\r\n')
+            received.append(conn.recv(4096))
+            release.wait(5)
+    
+    thread = threading.Thread(target=fake_openvpn, daemon=True)
+    thread.start()
+    
+    try:
+        assert client.attach(timeout=5)
+        assert client.wait_for_connected(5)
+        release.set()
+        thread.join(5)
+        
+        assert b'state on\n' in received[0]
+        assert client.remote_ip == '198.51.100.7'
+        
+        # The interface closing means OpenVPN exited
+        client.reader_thread.join(5)
+        assert client.state == 'EXITING'
+        assert not client.is_connected()
+    finally:
+        release.set()
+        server.close()
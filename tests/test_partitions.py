@@ -0,0 +1,83 @@
+"""Tests for daily partitions and partition-based retention (SQLite)"""
+
+from datetime import datetime, timedelta
+
+from core.database_manager import DatabaseManager, PARTITIONED_TABLES
+from conftest import run, execute, fetchall
+
+async def tables(db):
+    return {row[0] for row in await fetchall(db, "SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+def analytics_record(event_type, timestamp):
+    return (1, event_type, None, None, None, timestamp)
+
+def test_today_and_tomorrow_partitions_created(db):
+    today = datetime.utcnow().date()
+    names = run(tables(db))
+    
+    for table in PARTITIONED_TABLES:
+        assert db._partition_name(table, today) in names
+        assert db._partition_name(table, today + timedelta(days=1)) in names
+
+def test_partition_names_round_trip(db):
+    day = datetime(2024, 2, 29).date()
+    name = db._partition_name('analytics', day)
+    
+    assert name == 'analytics_p20240229'
+    assert db._partition_day('analytics', name) == day
+    assert db._partition_day('analytics', 'analytics_all') is None
+    assert db._partition_day('api_usage', name) is None
+
+def test_rows_routed_to_daily_partitions(db):
+    now = datetime.utcnow().replace(microsecond=0)
+    old = now - timedelta(days=100)
+    
+    async def scenario():
+        await db._write_analytics_batch([analytics_record('new', now), analytics_record('old', old)])
+        old_rows = await fetchall(db, f"SELECT event_type FROM {db._partition_name('analytics', old.date())}")
+        all_rows = await fetchall(db, "SELECT event_type FROM analytics_all ORDER BY event_type")
+        return old_rows, all_rows
+    
+    old_rows, all_rows = run(scenario())
+    assert [row[0] for row in old_rows] == ['old']
+    assert [row[0] for row in all_rows] == ['new', 'old']
+
+def test_retention_drops_expired_partitions(db):
+    now = datetime.utcnow().replace(microsecond=0)
+    old = now - timedelta(days=100)
+    
+    async def scenario():
+        await db._write_analytics_batch([analytics_record('new', now), analytics_record('old', old)])
+        
+        # A row in the pre-partitioning base table is deleted row by row
+        async with db.get_connection() as conn:
+            query = "INSERT INTO analytics (user_id, event_type, timestamp) VALUES (?, ?, ?)"
+            for params in ((1, 'legacy-old', old.isoformat(sep=' ')), (1, 'legacy-new', now.isoformat(sep=' '))):
+                await execute(conn, query, params)
+        
+        result = await db.cleanup_old_data(days=90)
+        remaining = await fetchall(db, "SELECT event_type FROM analytics_all ORDER BY event_type")
+        return result, await tables(db), [row[0] for row in remaining]
+    
+    result, names, remaining = run(scenario())
+    old_partition = db._partition_name('analytics', old.date())
+    
+    assert result['dropped_partitions'] == [old_partition]
+    assert old_partition not in names
+    assert db._partition_name('analytics', now.date()) in names
+    assert remaining == ['legacy-new', 'new']
+
+def test_partitions_discovered_on_restart(db_path, db):
+    old = datetime.utcnow().replace(microsecond=0) - timedelta(days=100)
+    run(db._write_analytics_batch([analytics_record('old', old)]))
+    run(db.close())
+    
+    reopened = DatabaseManager(f"sqlite:///{db_path}")
+    run(reopened.initialize_database())
+    try:
+        assert db._partition_name('analytics', old.date()) in reopened._partitions
+        assert run(reopened.cleanup_old_data(days=90))['dropped_partitions'] == [
+            db._partition_name('analytics', old.date())
+        ]
+    finally:
+        run(reopened.close())
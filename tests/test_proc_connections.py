@@ -0,0 +1,96 @@
+"""Tests for the /proc/net socket table reader"""
+
+import os
+
+import pytest
+
+from core.proc_connections import ProcConnectionTable
+
+TCP_HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+
+def tcp_row(local, remote, state, inode):
+    return f"   0: {local} {remote} {state} 00000000:00000000 00:00000000 00000000  1000        0 {inode} 1 0000000000000000 20 4 30 10 -1\n"
+
+@pytest.fixture
+def proc_root(tmp_path):
+    net = tmp_path / 'net'
+    net.mkdir()
+    
+    # 127.0.0.1:8080 listening, 10.0.0.2:40000 -> 1.2.3.4:443 established
+    (net / 'tcp').write_text(TCP_HEADER +
+                             tcp_row('0100007F:1F90', '00000000:0000', '0A', 1001) +
+                             tcp_row('0200000A:9C40', '04030201:01BB', '01', 1002) +
+                             tcp_row('00000000:0016', '00000000:0000', '0A', 1003))
+    # [::]:53 unconnected
+    (net / 'udp6').write_text(TCP_HEADER +
+                              tcp_row('00000000000000000000000000000000:0035',
+                                      '00000000000000000000000000000000:0000', '07', 2001))
+    
+    # Process 42 owns the established socket
+    fd = tmp_path / '42' / 'fd'
+    fd.mkdir(parents=True)
+    os.symlink('socket:[1002]', fd / '3')
+    os.symlink('/dev/null', fd / '0')
+    (tmp_path / '42' / 'comm').write_text('openvpn\n')
+    
+    return tmp_path
+
+def test_read_sockets(logger, proc_root):
+    sockets = ProcConnectionTable(logger, proc_root=str(proc_root)).read_sockets()
+    by_inode = {sock.inode: sock for sock in sockets}
+    
+    assert len(sockets) == 4
+    
+    listener = by_inode[1001]
+    assert (listener.local_address, listener.local_port) == ('127.0.0.1', 8080)
+    assert (listener.remote_address, listener.remote_port) == ('', 0)
+    assert listener.status == 'LISTEN'
+    
+    established = by_inode[1002]
+    assert (established.remote_address, established.remote_port) == ('1.2.3.4', 443)
+    assert established.status == 'ESTABLISHED'
+    
+    # Wildcard addresses are reported like psutil does
+    assert by_inode[1003].local_address == '0.0.0.0'
+    assert by_inode[2001].local_address == '::'
+    assert by_inode[2001].protocol == 'udp6'
+    assert by_inode[2001].status == 'NONE'
+
+def test_resolve_owners(logger, proc_root):
+    table = ProcConnectionTable(logger, proc_root=str(proc_root))
+    owners = {sock.inode: (pid, name) for sock, pid, name in table.snapshot()}
+    
+    assert owners[1002] == (42, 'openvpn')
+    assert owners[1001] == (0, 'Unknown')
+
+def test_unresolved_sockets_do_not_trigger_rescans(logger, proc_root, monkeypatch):
+    table = ProcConnectionTable(logger, proc_root=str(proc_root), rescan_interval=0)
+    table.snapshot()
+    
+    scans = []
+    original = table._scan_fds
+    monkeypatch.setattr(table, '_scan_fds', lambda: (scans.append(1), original()))
+    
+    table.snapshot()
+    assert scans == []
+    
+    # A new socket of unknown ownership triggers one walk
+    with open(proc_root / 'net' / 'tcp', 'a') as f:
+        f.write(tcp_row('0200000A:9C41', '04030201:01BB', '01', 1004))
+    table.snapshot()
+    table.snapshot()
+    assert scans == [1]
+
+def test_process_names_forgotten_when_pid_exits(logger, proc_root):
+    table = ProcConnectionTable(logger, proc_root=str(proc_root))
+    table.snapshot()
+    assert table._process_names == {42: 'openvpn'}
+    
+    for entry in (proc_root / '42' / 'fd').iterdir():
+        entry.unlink()
+    (proc_root / '42' / 'fd').rmdir()
+    (proc_root / '42' / 'comm').unlink()
+    (proc_root / '42').rmdir()
+    
+    table._scan_fds()
+    assert table._process_names == {}
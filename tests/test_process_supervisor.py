@@ -0,0 +1,78 @@
+"""Tests for the child process supervisor"""
+
+import sys
+import time
+
+from core.process_supervisor import SupervisedProcess, ProcessSupervisor
+
+def python_cmd(code):
+    return [sys.executable, '-c', code]
+
+def test_ready_marker_and_output(logger):
+    lines = []
+    process = SupervisedProcess('child', python_cmd("print('booting'); print('Initialization Sequence Completed')"),
+                                logger, ready_markers=('Sequence Completed',), on_line=lines.append)
+    process.start()
+    
+    assert process.wait_ready(5)
+    process.wait(5)
+    process.stop()
+    assert lines == ['booting', 'Initialization Sequence Completed']
+    assert 'booting' in process.tail()
+
+def test_exit_without_marker_is_not_ready(logger):
+    process = SupervisedProcess('child', python_cmd("print('failed')"), logger, ready_markers=('ready',))
+    process.start()
+    
+    assert not process.wait_ready(5)
+    process.stop()
+
+def test_restarts_with_backoff(logger):
+    restarted = []
+    process = SupervisedProcess('crashy', python_cmd("import sys; sys.exit(1)"), logger,
+                                restart=True, max_restarts=3, backoff=0.05, max_backoff=1.0,
+                                on_restart=lambda p: restarted.append(time.time()))
+    started = time.time()
+    process.start()
+    process._reader_thread.join(10)
+    
+    assert process.restarts == 3
+    assert len(restarted) == 3
+    # Delays of 0.05, 0.1 and 0.2 seconds
+    assert restarted[-1] - started >= 0.35
+    assert restarted[2] - restarted[1] > restarted[1] - restarted[0]
+
+def test_stop_prevents_restart(logger):
+    process = SupervisedProcess('sleeper', python_cmd("import time; time.sleep(30)"), logger,
+                                restart=True, backoff=0.05)
+    process.start()
+    process.stop(timeout=5)
+    
+    assert process.poll() is not None
+    assert not process._reader_thread.is_alive()
+    assert process.restarts == 0
+
+def test_stop_during_backoff(logger):
+    process = SupervisedProcess('crashy', python_cmd("import sys; sys.exit(1)"), logger,
+                                restart=True, backoff=30)
+    process.start()
+    process.wait(5)
+    
+    start = time.time()
+    process.stop()
+    assert time.time() - start < 5
+    assert process.restarts == 0
+
+def test_supervisor_registry(logger):
+    supervisor = ProcessSupervisor(logger)
+    first = supervisor.start('worker', python_cmd("import time; time.sleep(30)"))
+    second = supervisor.start('worker', python_cmd("import time; time.sleep(30)"))
+    
+    assert first.name == 'worker'
+    assert second.name == 'worker#2'
+    assert set(supervisor.get_resource_usage()) == {'worker', 'worker#2'}
+    
+    supervisor.stop_all(timeout=5)
+    first._reader_thread.join(5)
+    second._reader_thread.join(5)
+    assert supervisor.get('worker') is None
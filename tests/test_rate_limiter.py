@@ -0,0 +1,104 @@
+"""Tests for the token bucket rate limiter"""
+
+import pytest
+
+from core.rate_limiter import (
+    MemoryBucketStore, SQLiteBucketStore, TokenBucketLimiter, create_rate_limiter
+)
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_store(request, tmp_path):
+    def make(**kwargs):
+        if request.param == 'sqlite':
+            return SQLiteBucketStore(str(tmp_path / 'rate_limits.db'), **kwargs)
+        return MemoryBucketStore(**kwargs)
+    return make
+
+@pytest.fixture
+def store(make_store):
+    return make_store()
+
+def bucket_keys(store):
+    if isinstance(store, SQLiteBucketStore):
+        return {row[0] for row in store._connection.execute('SELECT key FROM buckets')}
+    return set(store._buckets)
+
+def test_burst_then_reject(store):
+    limiter = TokenBucketLimiter(store, burst_ratio=0.1)
+    
+    # 3600/hour with a 10% burst allows 360 requests at once
+    results = [limiter.hit('k', 3600, now=1000.0) for _ in range(361)]
+    
+    assert all(r.allowed for r in results[:360])
+    assert not results[360].allowed
+    assert results[360].remaining == 0
+    assert results[360].retry_after == pytest.approx(1.0)
+
+def test_refill_over_time(store):
+    limiter = TokenBucketLimiter(store, burst_ratio=0.1)
+    for _ in range(360):
+        limiter.hit('k', 3600, now=1000.0)
+    
+    assert not limiter.hit('k', 3600, now=1000.0).allowed
+    # One token per second at 3600/hour
+    assert limiter.hit('k', 3600, now=1001.0).allowed
+    assert not limiter.hit('k', 3600, now=1001.0).allowed
+
+def test_keys_are_independent(store):
+    limiter = TokenBucketLimiter(store, burst_ratio=0.1)
+    
+    # Small limits still allow one request
+    assert limiter.hit('a', 5, now=0.0).allowed
+    assert not limiter.hit('a', 5, now=0.0).allowed
+    assert limiter.hit('b', 5, now=0.0).allowed
+
+def test_bucket_never_exceeds_capacity(store):
+    limiter = TokenBucketLimiter(store, burst_ratio=0.1)
+    limiter.hit('k', 100, now=0.0)
+    
+    # A long idle period refills to capacity (10), not beyond
+    allowed = [limiter.hit('k', 100, now=100000.0).allowed for _ in range(11)]
+    assert allowed == [True] * 10 + [False]
+
+def test_store_prunes_refilled_buckets(make_store):
+    store = make_store(prune_every=2)
+    store.consume('old', 10.0, 1.0, now=0.0)
+    store.consume('new', 10.0, 1.0, now=100.0)
+    
+    assert bucket_keys(store) == {'new'}
+
+def test_prune_uses_each_buckets_own_limit(make_store):
+    limiter = TokenBucketLimiter(make_store(prune_every=2), burst_ratio=0.1)
+    
+    # 5/hour clamps capacity to one token that takes 720s to come back
+    assert limiter.hit('slow', 5, now=0.0).allowed
+    # A busy key refills in 360s and triggers a prune at 400s
+    limiter.hit('busy', 3600, now=400.0)
+    
+    assert 'slow' in bucket_keys(limiter.store)
+    assert not limiter.hit('slow', 5, now=400.0).allowed
+    assert limiter.hit('slow', 5, now=800.0).allowed
+
+def test_sqlite_store_prunes_table(tmp_path):
+    store = SQLiteBucketStore(str(tmp_path / 'rate_limits.db'), prune_every=100)
+    for i in range(99):
+        store.consume(f'k{i}', 10.0, 1.0, now=0.0)
+    store.consume('last', 10.0, 1.0, now=60.0)
+    
+    assert bucket_keys(store) == {'last'}
+
+def test_sqlite_store_is_shared(tmp_path):
+    path = str(tmp_path / 'rate_limits.db')
+    first = TokenBucketLimiter(SQLiteBucketStore(path), burst_ratio=0.1)
+    second = TokenBucketLimiter(SQLiteBucketStore(path), burst_ratio=0.1)
+    
+    assert first.hit('k', 10, now=0.0).allowed
+    assert not second.hit('k', 10, now=0.0).allowed
+
+def test_create_rate_limiter(tmp_path):
+    assert isinstance(create_rate_limiter({}).store, MemoryBucketStore)
+    
+    limiter = create_rate_limiter({'storage': 'sqlite', 'storage_path': str(tmp_path / 'rl.db'),
+                                   'burst_ratio': 0.5})
+    assert isinstance(limiter.store, SQLiteBucketStore)
+    assert limiter.burst_ratio == 0.5
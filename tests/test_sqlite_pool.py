@@ -0,0 +1,81 @@
+"""Tests for the pooled SQLite connections"""
+
+import asyncio
+
+import pytest
+
+from core.database_manager import SQLiteConnectionPool
+from conftest import execute
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / 'pool.db'), pool_size=2)
+    yield pool
+    asyncio.run(pool.close())
+
+def test_connections_are_reused(pool):
+    async def run():
+        for _ in range(5):
+            async with pool.acquire() as conn:
+                await execute(conn, "SELECT 1")
+        return pool.get_stats()
+    
+    assert asyncio.run(run()) == {'size': 2, 'open': 1, 'idle': 1, 'waiting': 0}
+
+def test_pragmas_applied(pool):
+    async def run():
+        async with pool.acquire() as conn:
+            return (await execute(conn, "PRAGMA journal_mode"))[0][0]
+    
+    assert asyncio.run(run()) == 'wal'
+
+def test_commit_on_success_and_rollback_on_error(pool):
+    async def run():
+        async with pool.acquire() as conn:
+            await execute(conn, "CREATE TABLE t (v INTEGER)")
+            await execute(conn, "INSERT INTO t VALUES (1)")
+        
+        with pytest.raises(RuntimeError):
+            async with pool.acquire() as conn:
+                await execute(conn, "INSERT INTO t VALUES (2)")
+                raise RuntimeError("boom")
+        
+        async with pool.acquire() as conn:
+            return [row[0] for row in await execute(conn, "SELECT v FROM t")]
+    
+    assert asyncio.run(run()) == [1]
+
+def test_foreign_keys_not_enforced(pool):
+    # The existing schema's REFERENCES clauses have never been enforced
+    async def run():
+        async with pool.acquire() as conn:
+            await execute(conn, "CREATE TABLE parent (id INTEGER PRIMARY KEY)")
+            await execute(conn, "CREATE TABLE child (parent_id INTEGER REFERENCES parent(id))")
+            await execute(conn, "INSERT INTO child VALUES (999)")
+    
+    asyncio.run(run())
+
+def test_waiters_get_returned_connections(pool):
+    async def worker(results):
+        async with pool.acquire() as conn:
+            await asyncio.sleep(0.01)
+            results.append((await execute(conn, "SELECT 1"))[0][0])
+    
+    async def run():
+        results = []
+        await asyncio.gather(*(worker(results) for _ in range(6)))
+        return results, pool.get_stats()
+    
+    results, stats = asyncio.run(run())
+    assert results == [1] * 6
+    assert stats['open'] == 2
+    assert stats['waiting'] == 0
+
+def test_closed_pool_rejects_acquire(pool):
+    async def run():
+        await pool.close()
+        async with pool.acquire():
+            pass
+    
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
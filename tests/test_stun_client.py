@@ -0,0 +1,145 @@
+"""Tests for the STUN binding client, against a local UDP stand-in"""
+
+import asyncio
+import socket
+import struct
+import threading
+import time
+
+import pytest
+
+from utils.stun_client import (
+    STUN_HEADER, STUN_MAGIC_COOKIE, BINDING_SUCCESS, ATTR_XOR_MAPPED_ADDRESS, ATTR_MAPPED_ADDRESS,
+    build_binding_request, parse_binding_response, parse_server, query_stun_servers
+)
+
+def binding_response(transaction_id, address, port, xor=True):
+    """Binding Success Response carrying one (XOR-)MAPPED-ADDRESS attribute"""
+    raw = socket.inet_aton(address)
+    if xor:
+        port ^= STUN_MAGIC_COOKIE >> 16
+        raw = bytes(b ^ k for b, k in zip(raw, struct.pack('>I', STUN_MAGIC_COOKIE)))
+    
+    value = struct.pack('>BBH', 0, 0x01, port) + raw
+    attribute = struct.pack('>HH', ATTR_XOR_MAPPED_ADDRESS if xor else ATTR_MAPPED_ADDRESS, len(value)) + value
+    return STUN_HEADER.pack(BINDING_SUCCESS, len(attribute), STUN_MAGIC_COOKIE, transaction_id) + attribute
+
+class StunStandIn:
+    """Local STUN server reporting each request's source address"""
+    
+    def __init__(self, drop_first=0, silent=False):
+        self.drop_first = drop_first
+        self.silent = silent
+        self.requests = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.1)
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+    
+    @property
+    def server(self):
+        return '127.0.0.1:%d' % self.sock.getsockname()[1]
+    
+    def _serve(self):
+        while self.running:
+            try:
+                data, addr = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            
+            self.requests += 1
+            if self.silent or self.requests <= self.drop_first:
+                continue
+            
+            _, _, _, transaction_id = STUN_HEADER.unpack_from(data, 0)
+            self.sock.sendto(binding_response(transaction_id, addr[0], addr[1]), addr)
+    
+    def close(self):
+        self.running = False
+        self.thread.join()
+        self.sock.close()
+
+@pytest.fixture
+def stand_in():
+    servers = []
+    
+    def create(**kwargs):
+        server = StunStandIn(**kwargs)
+        servers.append(server)
+        return server
+    
+    yield create
+    for server in servers:
+        server.close()
+
+def test_parse_server():
+    assert parse_server('stun.example.com') == ('stun.example.com', 3478)
+    assert parse_server('stun.example.com:19302') == ('stun.example.com', 19302)
+    assert parse_server('[2001:db8::1]:5349') == ('2001:db8::1', 5349)
+    assert parse_server('[2001:db8::1]') == ('2001:db8::1', 3478)
+
+def test_parse_binding_response():
+    transaction_id = b'\x01' * 12
+    
+    assert parse_binding_response(binding_response(transaction_id, '203.0.113.5', 54321),
+                                  transaction_id) == ('203.0.113.5', 54321)
+    assert parse_binding_response(binding_response(transaction_id, '203.0.113.5', 54321, xor=False),
+                                  transaction_id) == ('203.0.113.5', 54321)
+    
+    # Another transaction, a request, or a truncated datagram
+    assert parse_binding_response(binding_response(b'\x02' * 12, '203.0.113.5', 1), transaction_id) is None
+    assert parse_binding_response(build_binding_request(transaction_id), transaction_id) is None
+    assert parse_binding_response(b'\x01\x01', transaction_id) is None
+
+def test_query_reports_mapped_address(stand_in):
+    server = stand_in()
+    result, = query_stun_servers([server.server], timeout=1.0)
+    
+    assert result.error is None
+    assert result.mapped_address == '127.0.0.1'
+    assert result.mapped_port > 0
+    assert result.rtt is not None
+
+def test_retransmits_lost_request(stand_in):
+    server = stand_in(drop_first=1)
+    result, = query_stun_servers([server.server], timeout=1.0)
+    
+    assert result.mapped_address == '127.0.0.1'
+    assert server.requests == 2
+
+def test_servers_are_queried_concurrently(stand_in):
+    silent = stand_in(silent=True)
+    answering = stand_in()
+    
+    start = time.time()
+    results = query_stun_servers([silent.server, answering.server], timeout=0.5)
+    
+    assert time.time() - start < 0.9
+    assert results[0].error == 'timeout'
+    assert results[1].mapped_address == '127.0.0.1'
+
+def test_timeout_includes_resolution(stand_in, monkeypatch):
+    silent = stand_in(silent=True)
+    getaddrinfo = asyncio.base_events.BaseEventLoop.getaddrinfo
+    
+    async def slow_getaddrinfo(self, *args, **kwargs):
+        await asyncio.sleep(0.3)
+        return await getaddrinfo(self, *args, **kwargs)
+    
+    monkeypatch.setattr(asyncio.base_events.BaseEventLoop, 'getaddrinfo', slow_getaddrinfo)
+    
+    start = time.time()
+    result, = query_stun_servers([silent.server], timeout=0.5)
+    
+    assert result.error == 'timeout'
+    assert time.time() - start < 0.7
+
+def test_unreachable_server_reports_error():
+    result, = query_stun_servers(['stun.invalid:3478'], timeout=0.5)
+    
+    assert result.mapped_address is None
+    assert result.error
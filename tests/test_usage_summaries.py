@@ -0,0 +1,53 @@
+"""Tests for the incrementally maintained daily usage summaries"""
+
+from conftest import run
+
+async def create_users(db):
+    return [await db.create_user(f"user{i}", f"user{i}@example.com", "hash") for i in range(2)]
+
+def test_sessions_counted_incrementally(db):
+    async def scenario():
+        alice, bob = await create_users(db)
+        await db.create_session(alice, 's1')
+        await db.create_session(alice, 's2')
+        await db.create_session(bob, 's3')
+        
+        assert await db.end_session('s1', data_transferred=1000)
+        assert await db.end_session('s3', status='failed', data_transferred=50)
+        # Already closed or unknown sessions are not counted twice
+        assert not await db.end_session('s1')
+        assert not await db.end_session('missing')
+        
+        return await db.get_usage_stats_windows((30, 7, 1)), await db.get_usage_stats(user_id=alice)
+    
+    windows, alice_stats = run(scenario())
+    
+    for days in (30, 7, 1):
+        assert windows[days]['total_sessions'] == 3
+        assert windows[days]['successful_sessions'] == 1
+        assert windows[days]['total_data'] == 1050
+        assert windows[days]['avg_duration'] is not None
+    
+    assert alice_stats['total_sessions'] == 2
+    assert alice_stats['total_data'] == 1000
+
+def test_no_sessions(db):
+    stats = run(db.get_usage_stats_windows((30, 7)))
+    
+    assert stats[30] == {'total_sessions': 0, 'successful_sessions': 0, 'total_data': 0, 'avg_duration': None}
+    assert set(stats) == {30, 7}
+
+def test_rebuild_matches_incremental(db):
+    async def scenario():
+        alice, bob = await create_users(db)
+        for i in range(5):
+            await db.create_session(alice if i % 2 else bob, f's{i}')
+        for i in range(3):
+            await db.end_session(f's{i}', data_transferred=10 * i)
+        
+        incremental = await db.get_usage_stats_windows()
+        await db.rebuild_usage_summaries()
+        return incremental, await db.get_usage_stats_windows()
+    
+    incremental, rebuilt = run(scenario())
+    assert incremental == rebuilt
@@ -109,6 +109,25 @@ class ProCLIInterface:
         except requests.exceptions.RequestException as e:
             console.print(f"[red]API request failed: {e}[/red]")
             sys.exit(1)
+    
+    def stream_events(self):
+        """Yield events pushed by the API server's event stream"""
+        if not self.api_key:
+            self.api_key = self.load_api_key()
+        
+        headers = {'Accept': 'text/event-stream'}
+        if self.api_key:
+            headers['X-API-Key'] = self.api_key
+        
+        url = f"{self.api_base_url}/events/stream"
+        
+        with requests.get(url, headers=headers, stream=True, timeout=(10, None)) as response:
+            response.raise_for_status()
+            
+            for line in response.iter_lines(decode_unicode=True):
+                # Only data lines carry events; comments are heartbeats
+                if line and line.startswith('data:'):
+                    yield json.loads(line[5:].strip())
 
 @click.group()
 @click.option('--config', default='config/config.json', help='Configuration file path')
@@ -261,6 +280,31 @@ def rotate(ctx, method, server):
         except Exception as e:
             console.print(f"[red]✗ Rotation error: {e}[/red]")
 
+@cli.command()
+@click.pass_context
+def watch(ctx):
+    """Watch rotation, health and leak events in real time"""
+    cli_obj = ctx.obj['cli']
+    console.print("[green]Watching CyberRotate Pro events (Ctrl+C to stop)...[/green]")
+    
+    try:
+        for event in cli_obj.stream_events():
+            event_type = event.get('type')
+            data = event.get('data', {})
+            timestamp = event.get('timestamp', '')
+            
+            if event_type == 'rotation':
+                status = "[green]✓[/green]" if data.get('success') else "[red]✗[/red]"
+                console.print(f"{timestamp} {status} rotation via {data.get('method')} ({data.get('response_time', 0):.2f}s)")
+            elif event_type == 'health':
+                console.print(f"{timestamp} [cyan]health[/cyan] IP {data.get('current_ip')} services {data.get('services')}")
+            elif event_type == 'leak':
+                console.print(f"{timestamp} [red]⚠ leak detected: {data.get('type')}[/red]")
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Stopped watching events[/yellow]")
+    except requests.exceptions.RequestException as e:
+        console.print(f"[red]Event stream failed: {e}[/red]")
+
 @cli.group()
 def proxy():
     """Proxy management commands"""
@@ -517,15 +561,16 @@ def server():
 @click.option('--host', default='0.0.0.0', help='Host to bind to')
 @click.option('--port', default=8080, help='Port to bind to')
 @click.option('--debug', is_flag=True, help='Enable debug mode')
+@click.option('--production', is_flag=True, help='Serve through waitress with a thread pool')
 @click.pass_context
-def start(ctx, host, port, debug):
+def start(ctx, host, port, debug, production):
     """Start API server"""
     console.print(f"[green]Starting CyberRotate Pro API Server on {host}:{port}[/green]")
     
     try:
         config = {}
         server = EnterpriseAPIServer(config)
-        server.run(host=host, port=port, debug=debug)
+        server.run(host=host, port=port, debug=debug, production=production)
     except KeyboardInterrupt:
         console.print("\n[yellow]Server stopped by user[/yellow]")
     except Exception as e:
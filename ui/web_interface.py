@@ -8,7 +8,6 @@ from flask_socketio import SocketIO, emit
 from flask_cors import CORS
 import json
 import os
-import asyncio
 from datetime import datetime, timedelta
 import threading
 import time
@@ -17,6 +16,7 @@ from pathlib import Path
 # Import CyberRotate modules
 from core.api_server_enterprise import app as api_app
 from core.database_manager import get_database_manager
+from core.async_bridge import run_sync
 from core.license_manager import get_license_manager
 from utils.logger import Logger
 from utils.stats_collector import StatsCollector
@@ -38,6 +38,11 @@ stats_collector = StatsCollector(logger.logger)
 db_manager = get_database_manager()
 license_manager = get_license_manager()
 
+try:
+    run_sync(db_manager.initialize_database())
+except Exception as e:
+    logger.logger.error(f"Database initialization failed: {e}")
+
 # Global state
 current_status = {
     'connected': False,
@@ -104,22 +109,16 @@ def api_status():
 def analytics_overview():
     """Get analytics overview"""
     try:
-        # Get usage stats from database
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        stats_30d = loop.run_until_complete(db_manager.get_usage_stats(days=30))
-        stats_7d = loop.run_until_complete(db_manager.get_usage_stats(days=7))
-        stats_24h = loop.run_until_complete(db_manager.get_usage_stats(days=1))
-        
-        loop.close()
+        # Get usage stats from database, on the shared event loop. All three
+        # windows come from one query over the daily summaries.
+        stats = run_sync(db_manager.get_usage_stats_windows((30, 7, 1)))
         
         return jsonify({
             'status': 'success',
             'data': {
-                '30_days': stats_30d,
-                '7_days': stats_7d,
-                '24_hours': stats_24h,
+                '30_days': stats[30],
+                '7_days': stats[7],
+                '24_hours': stats[1],
                 'timestamp': datetime.now().isoformat()
             }
         })
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Geolocation - Shared IP geolocation with caching and an offline database
+
+Online lookups are cached in an LRU with a TTL, so repeated lookups of the
+same exit IP, DNS server or proxy during rotation do not hit third-party
+rate limits. An optional offline database answers country lookups locally
+and keeps geolocation working when the online services are unreachable.
+
+Offline database format (all integers big-endian):
+    magic    6 bytes   b'CRGEO1'
+    count    4 bytes   number of records
+    records  count * 34 bytes, sorted by start address:
+             start (16 bytes) | end (16 bytes) | country code (2 bytes ASCII)
+IPv4 ranges are stored as IPv4-mapped IPv6 addresses (::ffff:a.b.c.d), so
+one sorted table covers both families. Build it with build_offline_database()
+from a CSV of start_ip,end_ip,country_code rows (e.g. a DB-IP or IP2Location
+LITE export).
+"""
+
+import os
+import csv
+import mmap
+import time
+import struct
+import bisect
+import logging
+import threading
+import ipaddress
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+
+import requests
+
+DB_MAGIC = b'CRGEO1'
+DB_HEADER = struct.Struct('>6sI')
+DB_RECORD_SIZE = 34
+
+LOCATION_SERVICES = {
+    'ipinfo.io': 'https://ipinfo.io/{ip}/json',
+    'ip-api.com': 'http://ip-api.com/json/{ip}',
+    'ipapi.co': 'https://ipapi.co/{ip}/json/',
+}
+
+def _address_key(ip_address: str) -> bytes:
+    """16-byte big-endian key for an IPv4 or IPv6 address"""
+    address = ipaddress.ip_address(ip_address)
+    if address.version == 4:
+        address = ipaddress.IPv6Address(f'::ffff:{address}')
+    return address.packed
+
+class _RangeStarts:
+    """Sequence view of the record start keys, for bisect"""
+    
+    def __init__(self, data: mmap.mmap, count: int):
+        self.data = data
+        self.count = count
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __getitem__(self, index: int) -> bytes:
+        offset = DB_HEADER.size + index * DB_RECORD_SIZE
+        return self.data[offset:offset + 16]
+
+class OfflineGeoDatabase:
+    """Memory-mapped sorted range table of IP address to country code"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, self.count = DB_HEADER.unpack_from(self._data, 0)
+        if magic != DB_MAGIC or len(self._data) < DB_HEADER.size + self.count * DB_RECORD_SIZE:
+            self.close()
+            raise ValueError(f"Not a valid geolocation database: {path}")
+        
+        self._starts = _RangeStarts(self._data, self.count)
+    
+    def country(self, ip_address: str) -> Optional[str]:
+        """Country code for an address, or None if it is not covered"""
+        try:
+            key = _address_key(ip_address)
+        except ValueError:
+            return None
+        
+        # Last range starting at or before the address
+        index = bisect.bisect_right(self._starts, key) - 1
+        if index < 0:
+            return None
+        
+        offset = DB_HEADER.size + index * DB_RECORD_SIZE
+        end = self._data[offset + 16:offset + 32]
+        if key > end:
+            return None
+        
+        return self._data[offset + 32:offset + 34].decode('ascii')
+    
+    def close(self):
+        try:
+            self._data.close()
+        finally:
+            self._file.close()
+
+def build_offline_database(csv_path: str, output_path: str) -> int:
+    """
+    Build an offline database from start_ip,end_ip,country_code CSV rows
+    
+    Returns:
+        Number of ranges written
+    """
+    records = []
+    
+    with open(csv_path, 'r', newline='') as f:
+        for row in csv.reader(f):
+            if len(row) < 3 or len(row[2]) != 2:
+                continue
+            try:
+                records.append((_address_key(row[0].strip()), _address_key(row[1].strip()),
+                                row[2].strip().upper().encode('ascii')))
+            except ValueError:
+                continue
+    
+    records.sort()
+    
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'wb') as f:
+        f.write(DB_HEADER.pack(DB_MAGIC, len(records)))
+        for start, end, country in records:
+            f.write(start + end + country)
+    
+    return len(records)
+
+class GeolocationService:
+    """IP geolocation with an LRU+TTL cache and an optional offline database"""
+    
+    def __init__(self, logger: logging.Logger, offline_db_path: Optional[str] = 'data/geoip.db',
+                 cache_size: int = 4096, ttl: float = 3600.0, timeout: float = 10.0,
+                 online: bool = True, failure_ttl: float = 60.0):
+        """
+        Args:
+            logger: Logger instance
+            offline_db_path: Offline database to load if it exists
+            cache_size: Maximum cached lookups
+            ttl: Seconds a cached lookup stays valid
+            timeout: Timeout for online lookups
+            online: Allow online lookups; False answers from the offline
+                database only
+            failure_ttl: Seconds a failed online lookup is remembered, and
+                an unreachable service is skipped, before trying it again
+        """
+        self.logger = logger
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.timeout = timeout
+        self.online = online
+        self.failure_ttl = failure_ttl
+        
+        self._cache: OrderedDict = OrderedDict()
+        self._unreachable_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        self.offline_db = None
+        if offline_db_path and os.path.exists(offline_db_path):
+            try:
+                self.offline_db = OfflineGeoDatabase(offline_db_path)
+                self.logger.info(f"Loaded offline geolocation database ({self.offline_db.count} ranges)")
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Could not load offline geolocation database: {e}")
+    
+    def _get_cached(self, key) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            expires, value = entry
+            if expires < time.time():
+                del self._cache[key]
+                self.misses += 1
+                return None
+            
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def store(self, ip_address: str, data: Dict[str, Any], service: str = 'ipinfo.io',
+              ttl: Optional[float] = None):
+        """Cache a lookup result obtained elsewhere"""
+        with self._lock:
+            self._cache[(service, ip_address)] = (time.time() + (self.ttl if ttl is None else ttl), data)
+            self._cache.move_to_end((service, ip_address))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def lookup(self, ip_address: str, service: str = 'ipinfo.io',
+               proxies: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Location of an IP address in the given service's response format
+        
+        Falls back to the offline database (country only) when the service
+        cannot be reached. Failed lookups are cached for failure_ttl, and a
+        service that cannot be connected to is skipped for every address
+        for that long, so offline lookups do not each wait out the timeout.
+        """
+        if not ip_address:
+            return {}
+        
+        cached = self._get_cached((service, ip_address))
+        if cached is not None:
+            return cached
+        
+        online_failed = False
+        if self.online and service in LOCATION_SERVICES and time.time() >= self._unreachable_until.get(service, 0):
+            try:
+                url = LOCATION_SERVICES[service].format(ip=ip_address)
+                response = requests.get(url, proxies=proxies, timeout=self.timeout)
+                if response.status_code == 200:
+                    data = response.json()
+                    self.store(ip_address, data, service)
+                    return data
+                self.logger.debug(f"Geolocation lookup for {ip_address} via {service} returned HTTP {response.status_code}")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.logger.debug(f"Geolocation lookup for {ip_address} via {service} failed: {e}")
+                # A failing proxy says nothing about the direct route
+                if not proxies:
+                    with self._lock:
+                        self._unreachable_until[service] = time.time() + self.failure_ttl
+            except Exception as e:
+                self.logger.debug(f"Geolocation lookup for {ip_address} via {service} failed: {e}")
+            online_failed = True
+        
+        result = {}
+        country = self.offline_db.country(ip_address) if self.offline_db else None
+        if country:
+            result = {'ip': ip_address, 'country': country, 'source': 'offline'}
+        
+        if online_failed:
+            self.store(ip_address, result, service, ttl=self.failure_ttl)
+        
+        return result
+    
+    def country(self, ip_address: str) -> Optional[str]:
+        """Country code for an address, answered offline when possible"""
+        if self.offline_db:
+            country = self.offline_db.country(ip_address)
+            if country:
+                return country
+        
+        return self.lookup(ip_address).get('country')
+    
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self._unreachable_until.clear()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Cache size and hit rate"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / total * 100) if total else 0,
+            'offline_db': self.offline_db.path if self.offline_db else None
+        }
+
+_service: Optional[GeolocationService] = None
+_service_lock = threading.Lock()
+
+def get_geolocation_service(logger: Optional[logging.Logger] = None) -> GeolocationService:
+    """Get the process-wide geolocation service"""
+    global _service
+    
+    with _service_lock:
+        if _service is None:
+            _service = GeolocationService(logger or logging.getLogger(__name__))
+        return _service
@@ -13,7 +13,63 @@ from typing import Dict, List, Optional, Any, Tuple
 import subprocess
 import os
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, Future, FIRST_COMPLETED
+
+from utils.geolocation import LOCATION_SERVICES, get_geolocation_service
+from utils.stun_client import DEFAULT_STUN_SERVERS, query_stun_servers
+
+class LeakCheckContext:
+    """
+    Lookups shared by the checks of one leak detection run
+    
+    The public IP, DNS servers and geolocations are each fetched at most once
+    per run, concurrently, and every check waits on the same result.
+    """
+    
+    def __init__(self, detector: 'LeakDetector', max_workers: int = 8):
+        self.detector = detector
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+    
+    def _memo(self, key: Tuple, func, *args) -> Future:
+        """Start a lookup unless it is already running or done"""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None:
+                future = self._futures[key] = self.executor.submit(func, *args)
+            return future
+    
+    def public_ip(self) -> Optional[str]:
+        return self._memo(('public_ip',), self.detector._get_public_ip).result()
+    
+    def public_ipv6(self) -> Optional[str]:
+        return self._memo(('public_ipv6',), self.detector._get_public_ipv6).result()
+    
+    def dns_servers(self) -> List[str]:
+        return self._memo(('dns_servers',), self.detector._get_system_dns_servers).result()
+    
+    def resolve(self, hostname: str) -> str:
+        return self._memo(('resolve', hostname), socket.gethostbyname, hostname).result()
+    
+    def location(self, ip_address: Optional[str]) -> Dict[str, Any]:
+        if not ip_address:
+            return {}
+        return self._memo(('location', ip_address), self.detector._get_ip_location, ip_address).result()
+    
+    def prefetch_locations(self, ip_addresses: List[str]):
+        """Start geolocation lookups for several addresses in parallel"""
+        for ip_address in ip_addresses:
+            if ip_address:
+                self._memo(('location', ip_address), self.detector._get_ip_location, ip_address)
+    
+    def submit(self, func, *args, **kwargs) -> Future:
+        """Run an unmemoized lookup on the shared pool"""
+        return self.executor.submit(func, *args, **kwargs)
+    
+    def close(self):
+        self.executor.shutdown(wait=False)
 
 class LeakDetector:
     """
@@ -27,7 +83,7 @@ class LeakDetector:
     - Browser fingerprinting leaks
     """
     
-    def __init__(self, logger: logging.Logger):
+    def __init__(self, logger: logging.Logger, stun_servers: Optional[List[str]] = None):
         """Initialize leak detector"""
         self.logger = logger
         self.test_results = {}
@@ -46,46 +102,127 @@ class LeakDetector:
             'https://www.whatismyipaddress.com/webrtc-test',
         ]
         
+        # STUN servers queried by the WebRTC check ('host[:port]')
+        self.stun_servers = stun_servers or list(DEFAULT_STUN_SERVERS)
+        self.stun_timeout = 2.0
+        
         # Test configuration
         self.timeout = 10
         self.max_workers = 5
         
+        # Seconds a full run may take, and the latency budget of each check
+        self.deadline = 15.0
+        self.check_budgets = {
+            'dns_leak': 8.0,
+            'webrtc_leak': 4.0,
+            'ipv6_leak': 6.0,
+            'timezone_leak': 6.0,
+            'geolocation_consistency': 8.0
+        }
+        
+        # Shared with the rotator and security utils, so lookups are cached
+        self.geolocation = get_geolocation_service(logger)
+        
         self.logger.info("Leak Detector initialized")
     
-    def check_all_leaks(self) -> Dict[str, Any]:
-        """Run comprehensive leak detection"""
+    def check_all_leaks(self, checks: Optional[List[str]] = None, deadline: Optional[float] = None,
+                        fail_fast: bool = False, budgets: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Run comprehensive leak detection
+        
+        Checks run concurrently. A check that exceeds its latency budget is
+        reported as timed out instead of holding up the run.
+        
+        Args:
+            checks: Names of the checks to run (default: all)
+            deadline: Seconds the whole run may take (default: self.deadline)
+            fail_fast: Return as soon as any check confirms a leak
+            budgets: Per-check latency budgets overriding self.check_budgets
+        
+        Returns:
+            Dict with per-check results, detected leaks and timed out checks
+        """
         self.logger.info("Starting comprehensive leak detection...")
         
+        check_funcs = {
+            'dns_leak': self.check_dns_leak,
+            'webrtc_leak': self.check_webrtc_leak,
+            'ipv6_leak': self.check_ipv6_leak,
+            'timezone_leak': self.check_timezone_leak,
+            'geolocation_consistency': self.check_geolocation_consistency
+        }
+        checks = [name for name in (checks or check_funcs) if name in check_funcs]
+        budgets = dict(self.check_budgets, **(budgets or {}))
+        
         start_time = time.time()
+        run_deadline = start_time + (deadline if deadline is not None else self.deadline)
         results = {
             'timestamp': start_time,
             'test_duration': 0,
             'leaks_detected': [],
+            'timed_out': [],
             'tests': {}
         }
         
-        # Run all leak detection tests
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {
-                executor.submit(self.check_dns_leak): 'dns_leak',
-                executor.submit(self.check_webrtc_leak): 'webrtc_leak',
-                executor.submit(self.check_ipv6_leak): 'ipv6_leak',
-                executor.submit(self.check_timezone_leak): 'timezone_leak',
-                executor.submit(self.check_geolocation_consistency): 'geolocation_consistency'
-            }
-            
-            for future in as_completed(futures):
-                test_name = futures[future]
-                try:
-                    test_result = future.result()
-                    results['tests'][test_name] = test_result
-                    
-                    if test_result and test_result.get('leak_detected'):
-                        results['leaks_detected'].append(test_name)
+        # Lookups shared by all tests; start the public IP fetch right away
+        context = LeakCheckContext(self)
+        context._memo(('public_ip',), self._get_public_ip)
+        
+        # Run the selected leak detection tests. The pool is not waited on
+        # when the run ends, so a check stuck in a slow request cannot
+        # extend it past its budget.
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(checks))))
+        futures = {}
+        expiries = {}
+        for test_name in checks:
+            future = executor.submit(check_funcs[test_name], context)
+            futures[future] = test_name
+            expiries[future] = min(start_time + budgets.get(test_name, self.deadline), run_deadline)
+        
+        pending = set(futures)
+        try:
+            while pending:
+                now = time.time()
+                for future in [f for f in pending if expiries[f] <= now]:
+                    pending.discard(future)
+                    future.cancel()
+                    test_name = futures[future]
+                    self.logger.warning(f"{test_name} exceeded its latency budget")
+                    results['tests'][test_name] = {
+                        'error': 'Check exceeded its latency budget',
+                        'timed_out': True,
+                        'budget': expiries[future] - start_time
+                    }
+                    results['timed_out'].append(test_name)
+                
+                if not pending:
+                    break
+                
+                timeout = max(0, min(expiries[f] for f in pending) - now)
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    test_name = futures[future]
+                    try:
+                        test_result = future.result()
+                        results['tests'][test_name] = test_result
                         
-                except Exception as e:
-                    self.logger.error(f"Error in {test_name}: {e}")
-                    results['tests'][test_name] = {'error': str(e)}
+                        if test_result and test_result.get('leak_detected'):
+                            results['leaks_detected'].append(test_name)
+                            
+                    except Exception as e:
+                        self.logger.error(f"Error in {test_name}: {e}")
+                        results['tests'][test_name] = {'error': str(e)}
+                
+                if fail_fast and results['leaks_detected'] and pending:
+                    # A confirmed leak is enough; don't wait on the rest
+                    results['skipped'] = [futures[f] for f in pending]
+                    for future in pending:
+                        future.cancel()
+                    break
+        finally:
+            executor.shutdown(wait=False)
+            context.close()
         
         results['test_duration'] = time.time() - start_time
         results['total_leaks'] = len(results['leaks_detected'])
@@ -100,13 +237,20 @@ class LeakDetector:
         
         return results
     
-    def check_dns_leak(self) -> Optional[Dict[str, Any]]:
+    def check_dns_leak(self, context: Optional[LeakCheckContext] = None) -> Optional[Dict[str, Any]]:
         """Check for DNS leaks"""
+        own_context = context is None
+        if own_context:
+            context = LeakCheckContext(self)
+        
         try:
             self.logger.debug("Checking for DNS leaks...")
             
+            # Start the DNS server list while the public IP is fetched
+            context._memo(('dns_servers',), self._get_system_dns_servers)
+            
             # Get current public IP for comparison
-            current_ip = self._get_public_ip()
+            current_ip = context.public_ip()
             if not current_ip:
                 return {'error': 'Could not determine public IP'}
             
@@ -114,15 +258,19 @@ class LeakDetector:
             dns_results = []
             
             # Test 1: Direct DNS query
-            dns_servers = self._get_system_dns_servers()
+            dns_servers = context.dns_servers()
+            
+            # Geolocate the exit IP and every DNS server in parallel
+            context.prefetch_locations([current_ip] + dns_servers)
+            
             for dns_server in dns_servers:
                 try:
                     # Perform DNS lookup
-                    result = socket.gethostbyname('google.com')
+                    result = context.resolve('google.com')
                     
                     # Check if DNS server is in same country/region as VPN
-                    dns_location = self._get_ip_location(dns_server)
-                    current_location = self._get_ip_location(current_ip)
+                    dns_location = context.location(dns_server)
+                    current_location = context.location(current_ip)
                     
                     dns_results.append({
                         'dns_server': dns_server,
@@ -152,54 +300,65 @@ class LeakDetector:
         except Exception as e:
             self.logger.error(f"Error checking DNS leaks: {e}")
             return {'error': str(e)}
+        finally:
+            if own_context:
+                context.close()
     
-    def check_webrtc_leak(self) -> Optional[Dict[str, Any]]:
+    def check_webrtc_leak(self, context: Optional[LeakCheckContext] = None) -> Optional[Dict[str, Any]]:
         """Check for WebRTC leaks"""
+        own_context = context is None
+        if own_context:
+            context = LeakCheckContext(self)
+        
         try:
             self.logger.debug("Checking for WebRTC leaks...")
             
-            # This is a simplified WebRTC leak detection
-            # In a full implementation, you would use selenium or similar to test in a real browser
-            
+            # The address STUN servers see UDP traffic come from is what a
+            # browser's WebRTC stack exposes; it must match the exit IP
             webrtc_result = {
                 'leak_detected': False,
                 'test_type': 'webrtc_leak',
-                'method': 'simplified_test',
-                'note': 'Full WebRTC testing requires browser automation',
+                'method': 'stun_binding',
                 'timestamp': time.time()
             }
             
-            # Try to detect WebRTC through available methods
-            try:
-                # Check if WebRTC ports are open (basic test)
-                webrtc_ports = [3478, 5349, 19302]  # Common WebRTC STUN ports
-                
-                for port in webrtc_ports:
-                    try:
-                        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                        sock.settimeout(2)
-                        # Try to connect to Google's STUN server
-                        sock.connect(('stun.l.google.com', port))
-                        sock.close()
-                        
-                        webrtc_result['webrtc_connectivity'] = True
-                        webrtc_result['accessible_ports'] = webrtc_result.get('accessible_ports', [])
-                        webrtc_result['accessible_ports'].append(port)
-                        
-                    except:
-                        continue
-                
-            except Exception as e:
-                webrtc_result['error'] = str(e)
+            # Query every STUN server while the exit IP is fetched, so the
+            # check takes about one round trip
+            stun_future = context.submit(query_stun_servers, self.stun_servers, self.stun_timeout)
+            current_ip = context.public_ip()
+            stun_results = stun_future.result()
+            
+            mapped_addresses = sorted({r.mapped_address for r in stun_results if r.mapped_address})
+            webrtc_result['exit_ip'] = current_ip
+            webrtc_result['mapped_addresses'] = mapped_addresses
+            webrtc_result['stun_results'] = [asdict(r) for r in stun_results]
+            webrtc_result['webrtc_connectivity'] = bool(mapped_addresses)
+            
+            if not mapped_addresses:
+                webrtc_result['note'] = 'No STUN server answered; outbound UDP appears to be blocked'
+            elif not current_ip:
+                webrtc_result['note'] = 'Could not determine public IP to compare with'
+            else:
+                leaked = [address for address in mapped_addresses if address != current_ip]
+                if leaked:
+                    webrtc_result['leak_detected'] = True
+                    webrtc_result['leaked_addresses'] = leaked
             
             return webrtc_result
             
         except Exception as e:
             self.logger.error(f"Error checking WebRTC leaks: {e}")
             return {'error': str(e)}
+        finally:
+            if own_context:
+                context.close()
     
-    def check_ipv6_leak(self) -> Optional[Dict[str, Any]]:
+    def check_ipv6_leak(self, context: Optional[LeakCheckContext] = None) -> Optional[Dict[str, Any]]:
         """Check for IPv6 leaks"""
+        own_context = context is None
+        if own_context:
+            context = LeakCheckContext(self)
+        
         try:
             self.logger.debug("Checking for IPv6 leaks...")
             
@@ -209,6 +368,9 @@ class LeakDetector:
                 'timestamp': time.time()
             }
             
+            # Fetch the public IPv6 address while the local check runs
+            context._memo(('public_ipv6',), self._get_public_ipv6)
+            
             # Check if IPv6 is enabled
             try:
                 # Try to get IPv6 address
@@ -221,13 +383,14 @@ class LeakDetector:
                 ipv6_result['ipv6_enabled'] = True
                 
                 # Check public IPv6
-                public_ipv6 = self._get_public_ipv6()
+                public_ipv6 = context.public_ipv6()
                 if public_ipv6:
                     ipv6_result['public_ipv6'] = public_ipv6
                     
                     # Compare with IPv4 geolocation
-                    ipv4_location = self._get_ip_location(self._get_public_ip())
-                    ipv6_location = self._get_ip_location(public_ipv6)
+                    context.prefetch_locations([public_ipv6])
+                    ipv4_location = context.location(context.public_ip())
+                    ipv6_location = context.location(public_ipv6)
                     
                     if ipv4_location and ipv6_location:
                         different_location = (
@@ -246,9 +409,16 @@ class LeakDetector:
         except Exception as e:
             self.logger.error(f"Error checking IPv6 leaks: {e}")
             return {'error': str(e)}
+        finally:
+            if own_context:
+                context.close()
     
-    def check_timezone_leak(self) -> Optional[Dict[str, Any]]:
+    def check_timezone_leak(self, context: Optional[LeakCheckContext] = None) -> Optional[Dict[str, Any]]:
         """Check for timezone leaks"""
+        own_context = context is None
+        if own_context:
+            context = LeakCheckContext(self)
+        
         try:
             self.logger.debug("Checking for timezone leaks...")
             
@@ -260,8 +430,8 @@ class LeakDetector:
             timezone_offset = (local_time - utc_time).total_seconds() / 3600
             
             # Get expected timezone based on public IP
-            current_ip = self._get_public_ip()
-            ip_location = self._get_ip_location(current_ip) if current_ip else {}
+            current_ip = context.public_ip()
+            ip_location = context.location(current_ip)
             expected_timezone = ip_location.get('timezone', 'Unknown')
             
             timezone_result = {
@@ -283,31 +453,39 @@ class LeakDetector:
         except Exception as e:
             self.logger.error(f"Error checking timezone leaks: {e}")
             return {'error': str(e)}
+        finally:
+            if own_context:
+                context.close()
     
-    def check_geolocation_consistency(self) -> Optional[Dict[str, Any]]:
+    def check_geolocation_consistency(self, context: Optional[LeakCheckContext] = None) -> Optional[Dict[str, Any]]:
         """Check consistency of geolocation across different services"""
+        own_context = context is None
+        if own_context:
+            context = LeakCheckContext(self)
+        
         try:
             self.logger.debug("Checking geolocation consistency...")
             
-            current_ip = self._get_public_ip()
+            current_ip = context.public_ip()
             if not current_ip:
                 return {'error': 'Could not determine public IP'}
             
-            # Get location from multiple services
-            location_services = [
-                ('ipinfo.io', f'https://ipinfo.io/{current_ip}/json'),
-                ('ip-api.com', f'http://ip-api.com/json/{current_ip}'),
-                ('ipapi.co', f'https://ipapi.co/{current_ip}/json/'),
-            ]
-            
             locations = []
             
-            for service_name, url in location_services:
+            # Query all services at once; repeated checks of the same exit
+            # IP are answered from the geolocation cache
+            futures = {
+                context.submit(self.geolocation.lookup, current_ip, service_name): service_name
+                for service_name in LOCATION_SERVICES
+            }
+            
+            for future in as_completed(futures):
+                service_name = futures[future]
                 try:
-                    response = requests.get(url, timeout=self.timeout)
-                    if response.status_code == 200:
-                        data = response.json()
-                        
+                    data = future.result()
+                    
+                    # Offline answers are not the service's own view
+                    if data and data.get('source') != 'offline':
                         # Normalize location data
                         location = self._normalize_location_data(service_name, data)
                         locations.append(location)
@@ -347,6 +525,9 @@ class LeakDetector:
         except Exception as e:
             self.logger.error(f"Error checking geolocation consistency: {e}")
             return {'error': str(e)}
+        finally:
+            if own_context:
+                context.close()
     
     def _get_public_ip(self) -> Optional[str]:
         """Get current public IP address"""
@@ -375,13 +556,7 @@ class LeakDetector:
     
     def _get_ip_location(self, ip_address: str) -> Dict[str, Any]:
         """Get location information for an IP address"""
-        try:
-            response = requests.get(f'https://ipinfo.io/{ip_address}/json', timeout=self.timeout)
-            if response.status_code == 200:
-                return response.json()
-        except:
-            pass
-        return {}
+        return self.geolocation.lookup(ip_address)
     
     def _get_system_dns_servers(self) -> List[str]:
         """Get system DNS servers"""
@@ -443,7 +618,7 @@ class LeakDetector:
             })
         elif service_name == 'ip-api.com':
             normalized.update({
-                'country': data.get('country'),
+                'country': data.get('countryCode'),
                 'region': data.get('regionName'),
                 'city': data.get('city'),
                 'timezone': data.get('timezone'),
@@ -451,7 +626,7 @@ class LeakDetector:
             })
         elif service_name == 'ipapi.co':
             normalized.update({
-                'country': data.get('country_name'),
+                'country': data.get('country_code'),
                 'region': data.get('region'),
                 'city': data.get('city'),
                 'timezone': data.get('timezone'),
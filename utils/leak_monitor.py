@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Leak Monitor - Incremental leak monitoring driven by network changes
+
+Rather than re-running every leak check after each rotation, checks are
+marked stale by the events that can change their outcome: interface,
+address and route changes reported by NetworkMonitor, edits to
+/etc/resolv.conf, and a new exit IP. Only stale checks are re-run. In
+between, a sampled audit re-runs one check at a time, round-robin, so every
+check is still exercised once per leak detection interval.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Set, Any
+
+# Checks whose outcome can change with each kind of event
+CHECKS_BY_CHANGE = {
+    'link': {'dns_leak', 'webrtc_leak', 'ipv6_leak'},
+    'address': {'webrtc_leak', 'ipv6_leak'},
+    'route': {'dns_leak', 'webrtc_leak', 'ipv6_leak'},
+    'dns': {'dns_leak'},
+    # Only the WebRTC verdict compares addresses with the exit IP itself; the
+    # location-based checks are left to the sampled audit
+    'exit_ip': {'webrtc_leak'},
+}
+
+LEAK_CHECKS = ['dns_leak', 'webrtc_leak', 'ipv6_leak', 'timezone_leak', 'geolocation_consistency']
+
+class LeakMonitor:
+    """Re-run leak checks only when something they depend on changed"""
+    
+    def __init__(self, leak_detector, logger: logging.Logger, network_monitor=None,
+                 interval: float = 300.0, deadline: float = 5.0,
+                 resolv_conf: str = '/etc/resolv.conf'):
+        """
+        Args:
+            leak_detector: LeakDetector running the checks
+            logger: Logger instance
+            network_monitor: NetworkMonitor reporting interface changes
+            interval: Seconds in which every check is audited once
+            deadline: Latency bound of each incremental run
+            resolv_conf: Resolver configuration watched for DNS changes
+        """
+        self.leak_detector = leak_detector
+        self.logger = logger
+        self.network_monitor = network_monitor
+        self.interval = interval
+        self.deadline = deadline
+        self.resolv_conf = resolv_conf
+        
+        # Nothing has been checked yet
+        self._stale: Set[str] = set(LEAK_CHECKS)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        
+        self.exit_ip = None
+        self._resolv_conf_state = self._stat_resolv_conf()
+        self._audit_index = 0
+        self.last_audit = time.time()
+        
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.runs = 0
+        self.skipped_runs = 0
+        
+        self.thread = None
+        self.running = False
+    
+    def mark_stale(self, change: str):
+        """Mark the checks affected by a kind of change for re-running"""
+        with self._lock:
+            self._stale |= CHECKS_BY_CHANGE.get(change, set())
+    
+    def get_stale_checks(self) -> List[str]:
+        """Checks that will run on the next incremental pass"""
+        with self._lock:
+            return [name for name in LEAK_CHECKS if name in self._stale]
+    
+    def _on_network_change(self, change: Dict[str, Any]):
+        """NetworkMonitor listener"""
+        for kind in change.get('kinds', []):
+            self.mark_stale(kind)
+        if change.get('added') or change.get('removed'):
+            self.mark_stale('link')
+        self._wake.set()
+    
+    def _stat_resolv_conf(self):
+        try:
+            st = os.stat(self.resolv_conf)
+            return (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+    
+    def _check_resolv_conf(self):
+        """Mark DNS checks stale if the resolver configuration changed"""
+        state = self._stat_resolv_conf()
+        if state != self._resolv_conf_state:
+            self._resolv_conf_state = state
+            self.logger.debug(f"{self.resolv_conf} changed")
+            self.mark_stale('dns')
+    
+    def on_rotation(self, exit_ip: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Record the exit IP after a rotation and re-run the checks made stale
+        
+        Returns:
+            Leak detection results, or None if nothing needed re-checking
+        """
+        if exit_ip and exit_ip != self.exit_ip:
+            self.exit_ip = exit_ip
+            self.mark_stale('exit_ip')
+        
+        results = self.run_pending()
+        if results is None:
+            self.skipped_runs += 1
+        return results
+    
+    def run_pending(self, deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Run the stale checks, if any"""
+        self._check_resolv_conf()
+        
+        with self._lock:
+            checks = [name for name in LEAK_CHECKS if name in self._stale]
+            self._stale.clear()
+        
+        if not checks:
+            return None
+        
+        return self._run(checks, deadline)
+    
+    def audit(self) -> Dict[str, Any]:
+        """Re-run the next check in round-robin order"""
+        name = LEAK_CHECKS[self._audit_index % len(LEAK_CHECKS)]
+        self._audit_index += 1
+        self.last_audit = time.time()
+        
+        self.logger.debug(f"Leak audit: {name}")
+        return self._run([name], None)
+    
+    def _run(self, checks: List[str], deadline: Optional[float]) -> Dict[str, Any]:
+        results = self.leak_detector.check_all_leaks(
+            checks=checks,
+            deadline=deadline if deadline is not None else self.deadline,
+            fail_fast=True
+        )
+        self.runs += 1
+        
+        # Checks that did not get to finish are tried again next time
+        unfinished = set(results['timed_out']) | set(results.get('skipped', []))
+        
+        with self._lock:
+            self._stale |= unfinished
+        
+        for name in checks:
+            if name not in unfinished:
+                self.results[name] = results['tests'].get(name)
+        
+        return results
+    
+    def start(self):
+        """Start listening for changes and auditing in the background"""
+        if self.running:
+            return
+        
+        self.running = True
+        if self.network_monitor:
+            self.network_monitor.add_change_listener(self._on_network_change)
+        
+        self.thread = threading.Thread(target=self._monitor_loop, daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """Stop background monitoring"""
+        self.running = False
+        self._wake.set()
+        
+        if self.network_monitor:
+            self.network_monitor.remove_change_listener(self._on_network_change)
+        
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+    
+    def _monitor_loop(self):
+        """Run stale checks on changes and audit one check per time slice"""
+        # Every check is audited once per interval
+        audit_every = self.interval / len(LEAK_CHECKS)
+        
+        while self.running:
+            # resolv.conf has no change notification, so it is polled
+            timeout = min(5.0, max(0, self.last_audit + audit_every - time.time()))
+            self._wake.wait(timeout)
+            self._wake.clear()
+            
+            if not self.running:
+                break
+            
+            try:
+                results = self.run_pending()
+                if results and results['leaks_detected']:
+                    self.logger.warning(f"Leak detected after network change: {', '.join(results['leaks_detected'])}")
+                
+                if time.time() - self.last_audit >= audit_every:
+                    results = self.audit()
+                    if results['leaks_detected']:
+                        self.logger.warning(f"Leak detected by audit: {', '.join(results['leaks_detected'])}")
+            except Exception as e:
+                self.logger.error(f"Error in leak monitoring: {e}")
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Latest result per check and run counters"""
+        return {
+            'exit_ip': self.exit_ip,
+            'stale_checks': self.get_stale_checks(),
+            'results': dict(self.results),
+            'runs': self.runs,
+            'skipped_runs': self.skipped_runs,
+            'last_audit': self.last_audit
+        }
@@ -7,7 +7,7 @@ Created by Yashab Alam - Founder & CEO of ZehraSec
 import time
 import json
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable
 from dataclasses import dataclass, asdict
 from collections import defaultdict, deque
 from pathlib import Path
@@ -59,6 +59,9 @@ class StatsCollector:
         # Thread safety
         self._lock = threading.Lock()
         
+        # Callbacks notified of every recorded rotation event
+        self._listeners: List[Callable[[RotationEvent], None]] = []
+        
         # Configuration
         self.stats_file = Path("data/stats/rotation_stats.json")
         self.stats_file.parent.mkdir(parents=True, exist_ok=True)
@@ -90,6 +93,23 @@ class StatsCollector:
                 self._save_stats()
             
             self.logger.debug(f"Recorded rotation: {method} - {'Success' if success else 'Failed'}")
+        
+        # Notify listeners outside the lock so slow consumers cannot block recording
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                self.logger.error(f"Rotation listener failed: {e}")
+    
+    def add_listener(self, callback: Callable[[RotationEvent], None]):
+        """Register a callback invoked with each recorded RotationEvent"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[RotationEvent], None]):
+        """Unregister a rotation event callback"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
     
     def _update_method_stats(self, event: RotationEvent):
         """Update statistics for a specific method"""
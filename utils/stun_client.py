@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+STUN Client - Minimal STUN binding client (RFC 5389)
+
+Sends Binding Requests to several STUN servers at once over asyncio
+datagram endpoints and reports the address each server saw the request
+come from. That mapped address is what a browser's WebRTC stack would
+expose, so comparing it with the tunnel exit IP reveals UDP traffic that
+bypasses the tunnel.
+"""
+
+import os
+import time
+import socket
+import struct
+import asyncio
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+STUN_MAGIC_COOKIE = 0x2112A442
+STUN_HEADER = struct.Struct('>HHI12s')
+
+BINDING_REQUEST = 0x0001
+BINDING_SUCCESS = 0x0101
+
+ATTR_MAPPED_ADDRESS = 0x0001
+ATTR_XOR_MAPPED_ADDRESS = 0x0020
+
+DEFAULT_STUN_SERVERS = [
+    'stun.l.google.com:19302',
+    'stun1.l.google.com:19302',
+    'stun.cloudflare.com:3478',
+]
+
+@dataclass
+class StunResult:
+    """Outcome of a binding request to one STUN server"""
+    server: str
+    mapped_address: Optional[str] = None
+    mapped_port: Optional[int] = None
+    rtt: Optional[float] = None
+    error: Optional[str] = None
+
+def parse_server(server: str, default_port: int = 3478) -> Tuple[str, int]:
+    """Split 'host[:port]' (or '[v6addr]:port') into host and port"""
+    if server.startswith('['):
+        host, _, port = server[1:].partition(']')
+        return host, int(port[1:]) if port.startswith(':') else default_port
+    if server.count(':') == 1:
+        host, port = server.split(':')
+        return host, int(port)
+    return server, default_port
+
+def build_binding_request(transaction_id: bytes) -> bytes:
+    """Binding Request with no attributes"""
+    return STUN_HEADER.pack(BINDING_REQUEST, 0, STUN_MAGIC_COOKIE, transaction_id)
+
+def parse_binding_response(data: bytes, transaction_id: bytes) -> Optional[Tuple[str, int]]:
+    """
+    Mapped address from a Binding Success Response
+    
+    Returns:
+        (address, port), or None if the datagram is not a success response
+        to this transaction
+    """
+    if len(data) < STUN_HEADER.size:
+        return None
+    
+    msg_type, length, cookie, tid = STUN_HEADER.unpack_from(data, 0)
+    if msg_type != BINDING_SUCCESS or cookie != STUN_MAGIC_COOKIE or tid != transaction_id:
+        return None
+    
+    mapped = None
+    offset = STUN_HEADER.size
+    end = min(len(data), STUN_HEADER.size + length)
+    
+    while offset + 4 <= end:
+        attr_type, attr_length = struct.unpack_from('>HH', data, offset)
+        value = data[offset + 4:offset + 4 + attr_length]
+        
+        if attr_type in (ATTR_XOR_MAPPED_ADDRESS, ATTR_MAPPED_ADDRESS) and len(value) >= 8:
+            family = value[1]
+            port = struct.unpack_from('>H', value, 2)[0]
+            raw = value[4:8] if family == 0x01 else value[4:20]
+            
+            if attr_type == ATTR_XOR_MAPPED_ADDRESS:
+                port ^= STUN_MAGIC_COOKIE >> 16
+                key = struct.pack('>I', STUN_MAGIC_COOKIE) + transaction_id
+                raw = bytes(b ^ k for b, k in zip(raw, key))
+            
+            address = socket.inet_ntop(socket.AF_INET if family == 0x01 else socket.AF_INET6, raw)
+            
+            # XOR-MAPPED-ADDRESS takes precedence over the legacy attribute
+            if attr_type == ATTR_XOR_MAPPED_ADDRESS:
+                return address, port
+            mapped = (address, port)
+        
+        # Attributes are padded to 4 byte boundaries
+        offset += 4 + ((attr_length + 3) & ~3)
+    
+    return mapped
+
+class _BindingProtocol(asyncio.DatagramProtocol):
+    """Datagram endpoint waiting for the response to one transaction"""
+    
+    def __init__(self, transaction_id: bytes, response: asyncio.Future):
+        self.transaction_id = transaction_id
+        self.response = response
+    
+    def datagram_received(self, data, addr):
+        mapped = parse_binding_response(data, self.transaction_id)
+        if mapped and not self.response.done():
+            self.response.set_result(mapped)
+    
+    def error_received(self, exc):
+        if not self.response.done():
+            self.response.set_exception(exc)
+
+async def _binding(server: str, timeout: float, family: int) -> StunResult:
+    """Send a binding request to one server and wait for its response"""
+    loop = asyncio.get_running_loop()
+    result = StunResult(server=server)
+    transport = None
+    
+    # Resolution and both transmissions share one timeout
+    deadline = loop.time() + timeout
+    
+    def remaining() -> float:
+        return max(0.0, deadline - loop.time())
+    
+    try:
+        host, port = parse_server(server)
+        infos = await asyncio.wait_for(
+            loop.getaddrinfo(host, port, family=family, type=socket.SOCK_DGRAM), remaining())
+        
+        transaction_id = os.urandom(12)
+        response = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _BindingProtocol(transaction_id, response),
+            remote_addr=infos[0][4][:2], family=infos[0][0])
+        
+        request = build_binding_request(transaction_id)
+        started = time.time()
+        transport.sendto(request)
+        
+        # One retransmission halfway through, in case the first datagram was lost
+        try:
+            mapped = await asyncio.wait_for(asyncio.shield(response), remaining() / 2)
+        except asyncio.TimeoutError:
+            transport.sendto(request)
+            mapped = await asyncio.wait_for(response, remaining())
+        
+        result.rtt = (time.time() - started) * 1000
+        result.mapped_address, result.mapped_port = mapped
+    except asyncio.TimeoutError:
+        result.error = 'timeout'
+    except (OSError, ValueError, IndexError) as e:
+        result.error = str(e) or type(e).__name__
+    finally:
+        if transport:
+            transport.close()
+    
+    return result
+
+async def query_stun_servers_async(servers: List[str], timeout: float = 2.0,
+                                   family: int = socket.AF_INET) -> List[StunResult]:
+    """Query all servers concurrently"""
+    return list(await asyncio.gather(*(_binding(server, timeout, family) for server in servers)))
+
+def query_stun_servers(servers: Optional[List[str]] = None, timeout: float = 2.0,
+                       family: int = socket.AF_INET) -> List[StunResult]:
+    """
+    Query STUN servers concurrently from synchronous code
+    
+    Args:
+        servers: 'host[:port]' entries (default: DEFAULT_STUN_SERVERS)
+        timeout: Seconds to wait for each server, including resolution
+        family: Address family to query over
+    
+    Returns:
+        One StunResult per server, in the given order
+    """
+    return asyncio.run(query_stun_servers_async(servers or DEFAULT_STUN_SERVERS, timeout, family))